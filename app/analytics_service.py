@@ -0,0 +1,175 @@
+#
+# ------------------------------------------------------------
+# فایل: app/analytics_service.py
+# (جدید V2.3 - آمار افزایشی عملکرد و خلاصه روزانه)
+# ------------------------------------------------------------
+#
+
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional, Any
+
+from config.settings import DAILY_SUMMARY_ENABLED, DAILY_SUMMARY_HOUR_UTC
+from infra.telegram_bot import telegram_reporter
+from utils.clock import clock
+
+
+class TradeStats:
+    """
+    آمار تجمعی مجموعه‌ای از معاملات. هر معامله در O(1) اعمال می شود
+    و هیچ تاریخچه‌ای نگهداری نمی شود (بدون نیاز به خواندن دوباره trades.csv).
+    """
+
+    __slots__ = (
+        "trades", "wins", "losses", "gross_profit", "gross_loss",
+        "net_pnl", "peak_pnl", "max_drawdown"
+    )
+
+    def __init__(self):
+        self.trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0   # (مقدار مثبت)
+        self.net_pnl = 0.0      # منحنی سرمایه نسبی (مجموع PnL)
+        self.peak_pnl = 0.0
+        self.max_drawdown = 0.0 # (بر حسب USDT، از سقف منحنی سرمایه)
+
+    def add(self, pnl_usdt: float):
+        self.trades += 1
+        if pnl_usdt > 0:
+            self.wins += 1
+            self.gross_profit += pnl_usdt
+        else:
+            self.losses += 1
+            self.gross_loss -= pnl_usdt
+
+        self.net_pnl += pnl_usdt
+        if self.net_pnl > self.peak_pnl:
+            self.peak_pnl = self.net_pnl
+        drawdown = self.peak_pnl - self.net_pnl
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.trades * 100.0 if self.trades else 0.0
+
+    @property
+    def expectancy(self) -> float:
+        """ میانگین PnL هر معامله (USDT). """
+        return self.net_pnl / self.trades if self.trades else 0.0
+
+    @property
+    def profit_factor(self) -> Optional[float]:
+        """ سود ناخالص / ضرر ناخالص (None اگر هنوز ضرری ثبت نشده). """
+        if self.gross_loss == 0:
+            return None
+        return self.gross_profit / self.gross_loss
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'trades': self.trades,
+            'wins': self.wins,
+            'losses': self.losses,
+            'win_rate': self.win_rate,
+            'expectancy': self.expectancy,
+            'profit_factor': self.profit_factor,
+            'net_pnl': self.net_pnl,
+            'max_drawdown': self.max_drawdown,
+        }
+
+
+class AnalyticsService:
+    """
+    آمار زنده عملکرد: کلی، روزانه، به تفکیک نماد و رژیم بازار.
+    record_trade از callback خروج (زیر قفل state) فراخوانی می شود؛
+    خلاصه روزانه از نخ زمان‌بندی و فقط از روی شمارنده‌ها ساخته می شود.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = TradeStats()
+        self.daily = TradeStats()
+        self.by_symbol: Dict[str, TradeStats] = {}
+        self.by_regime: Dict[str, TradeStats] = {}
+        self._last_summary_day: Optional[str] = None
+        self.summary_enabled = DAILY_SUMMARY_ENABLED # (در پروسه شارد خاموش؛ خلاصه از هماهنگ‌کننده)
+
+    def record_trade(self, symbol: str, pnl_usdt: float, regime: str = ""):
+        """ اعمال یک معامله بسته شده روی همه آمارها. """
+        with self._lock:
+            self.total.add(pnl_usdt)
+            self.daily.add(pnl_usdt)
+            self.by_symbol.setdefault(symbol, TradeStats()).add(pnl_usdt)
+            self.by_regime.setdefault(regime or "UNKNOWN", TradeStats()).add(pnl_usdt)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'total': self.total.as_dict(),
+                'daily': self.daily.as_dict(),
+                'by_symbol': {s: st.as_dict() for s, st in self.by_symbol.items()},
+                'by_regime': {r: st.as_dict() for r, st in self.by_regime.items()},
+            }
+
+    # --- خلاصه روزانه ---
+
+    @staticmethod
+    def _format_stats(stats: TradeStats) -> str:
+        pf = f"{stats.profit_factor:.2f}" if stats.profit_factor is not None else "∞"
+        return (
+            f"Trades: {stats.trades} (W {stats.wins} / L {stats.losses})\n"
+            f"Win Rate: {stats.win_rate:.1f} %\n"
+            f"Expectancy: {stats.expectancy:+.4f} $\n"
+            f"Profit Factor: {pf}\n"
+            f"Net P&L: {stats.net_pnl:+.2f} $\n"
+            f"Max Drawdown: {stats.max_drawdown:.2f} $"
+        )
+
+    def build_daily_summary(self, daily: Optional[TradeStats] = None) -> str:
+        """
+        متن خلاصه (فقط از شمارنده‌ها؛ مستقل از طول تاریخچه).
+        daily: آمار روز جدا شده در maybe_send_daily_summary (پیش‌فرض: آمار روز جاری).
+        """
+        with self._lock:
+            parts = [
+                "<b>از خلاصه قبلی</b>\n" + self._format_stats(daily if daily is not None else self.daily),
+                "<b>کل</b>\n" + self._format_stats(self.total),
+            ]
+            if self.by_regime:
+                regimes = "\n".join(
+                    f"{r}: {st.trades} ترید، {st.win_rate:.0f}% برد، {st.net_pnl:+.2f} $"
+                    for r, st in sorted(self.by_regime.items())
+                )
+                parts.append("<b>رژیم بازار</b>\n" + regimes)
+            if self.by_symbol:
+                best = max(self.by_symbol.items(), key=lambda kv: kv[1].net_pnl)
+                worst = min(self.by_symbol.items(), key=lambda kv: kv[1].net_pnl)
+                parts.append(
+                    f"<b>نمادها</b>\nبهترین: {best[0]} ({best[1].net_pnl:+.2f} $)\n"
+                    f"بدترین: {worst[0]} ({worst[1].net_pnl:+.2f} $)"
+                )
+        return "\n\n".join(parts)
+
+    def maybe_send_daily_summary(self, now: Optional[float] = None):
+        """ ارسال خلاصه یک بار در روز، بعد از ساعت DAILY_SUMMARY_HOUR_UTC (از نخ زمان‌بندی). """
+        if not self.summary_enabled:
+            return
+        dt = datetime.fromtimestamp(now if now is not None else clock.time(), tz=timezone.utc)
+        day = dt.strftime('%Y-%m-%d')
+        if self._last_summary_day is None:
+            # (اولین اجرا: روز جاری مبنا قرار می گیرد؛ خلاصه از فردا ارسال می شود)
+            self._last_summary_day = day
+            return
+        if day == self._last_summary_day or dt.hour < DAILY_SUMMARY_HOUR_UTC:
+            return
+
+        # (آمار روز زیر قفل جدا می شود؛ معاملات حین ارسال کند تلگرام در روز بعد شمرده می شوند)
+        with self._lock:
+            daily, self.daily = self.daily, TradeStats()
+        summary_day, self._last_summary_day = self._last_summary_day, day
+        telegram_reporter.send_daily_summary(summary_day, self.build_daily_summary(daily))
+
+# --- نمونه سازی ---
+analytics_service = AnalyticsService()
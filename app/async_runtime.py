@@ -0,0 +1,170 @@
+#
+# ------------------------------------------------------------
+# فایل: app/async_runtime.py
+# (جدید V2.3 - runtime تک event loop برای فید، REST و تلگرام)
+# ------------------------------------------------------------
+#
+
+import asyncio
+from typing import List, Optional
+
+import aiohttp
+
+from config.settings import (
+    PAPER_MODE, TIME_FRAME, CANDLE_BUFFER_SIZE, ORDER_SYNC_INTERVAL_SECONDS,
+    ASYNC_REST_CONCURRENCY, TICK_RECORDER_ENABLED
+)
+from config.strategy_config import strategy_config
+from infra.async_exchange_client import AsyncExchangeClient
+from infra.telegram_bot import telegram_reporter
+from infra.tick_recorder import tick_recorder
+from app import bot_loop as bot_loop_module
+from app.bot_loop import bot_loop, LBANK_WS_URL
+from app.order_manager import order_manager
+from app.order_tracker import order_tracker
+from app.analytics_service import analytics_service
+from app.shadow_runner import shadow_runner
+from utils.feed_monitor import feed_monitor
+from utils.clock import clock
+
+RECONNECT_DELAY_SECONDS = 5
+HTTP_TIMEOUT_SECONDS = 10
+
+
+class AsyncBotRuntime:
+    """
+    اجرای ربات روی یک event loop:
+    - WebSocket با aiohttp (به جای نخ websocket-client)
+    - سفارش‌ها و warm-up با ccxt.async_support
+    - پیام‌های تلگرام با aiohttp (بدون مسدود کردن)
+    منطق پیام‌ها، StateManager و سیاست‌های domain همان نسخه BotLoop هستند.
+    """
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.exchange: Optional[AsyncExchangeClient] = None
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None # (V2.3) - برای ping کلاینت
+        self._stop = asyncio.Event()
+
+    async def _warm_up(self, symbols: List[str]):
+        """ بارگیری همزمان کندل‌های تاریخی همه مارکت‌ها با محدودیت همزمانی. """
+        semaphore = asyncio.Semaphore(ASYNC_REST_CONCURRENCY)
+
+        async def _load(symbol_pair: str):
+            symbol_api = symbol_pair.replace('_', '/').upper()
+            async with semaphore:
+                candles = await self.exchange.fetch_candles(symbol_api, TIME_FRAME, CANDLE_BUFFER_SIZE)
+            bot_loop.load_initial_candles(symbol_api, candles)
+
+        print(f"⏳ Warm-up ناهمزمان {len(symbols)} مارکت (همزمانی {ASYNC_REST_CONCURRENCY})...")
+        await asyncio.gather(*(_load(s) for s in symbols))
+        print("✅ Warm-up کامل شد.")
+
+    async def _run_feed(self):
+        """ اتصال WebSocket با اتصال مجدد خودکار. """
+        while not self._stop.is_set():
+            try:
+                print(f"⏳ در حال اتصال به WebSocket LBank در {LBANK_WS_URL} (asyncio)...")
+                async with self.session.ws_connect(LBANK_WS_URL) as ws:
+                    self._ws = ws
+                    for sub_msg in bot_loop.subscription_messages():
+                        await ws.send_str(sub_msg)
+                    print(f"✅ اشتراک {len(bot_loop_module.ACTIVE_SYMBOLS)} مارکت ارسال شد.")
+
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            if TICK_RECORDER_ENABLED:
+                                tick_recorder.record(msg.data)
+                            try:
+                                reply = bot_loop.handle_feed_message(msg.data)
+                                if reply:
+                                    await ws.send_str(reply)
+                            except Exception as e:
+                                print(f"خطای پردازش پیام WebSocket: {e}")
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except Exception as e:
+                print(f"خطای WebSocket: {e}")
+                telegram_reporter.send_error_report("خطای WebSocket", str(e))
+            self._ws = None
+
+            if not self._stop.is_set():
+                print("اتصال WebSocket قطع شد. تلاش برای اتصال مجدد...")
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    async def _run_scheduled(self):
+        while not self._stop.is_set():
+            if not PAPER_MODE:
+                # (OrderTracker از ccxt همزمان استفاده می کند؛ یک نخ کوتاه‌مدت به ازای هر چرخه)
+                await asyncio.to_thread(order_tracker.refresh)
+            analytics_service.maybe_send_daily_summary()
+            strategy_config.reload_if_changed()
+            shadow_runner.flush()
+            await self._check_feed_health()
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=ORDER_SYNC_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _check_feed_health(self):
+        """ (V2.3) - مانند BotLoop._check_feed_health: sweep نمادهای کهنه و ping کلاینت برای RTT. """
+        now = clock.monotonic()
+        feed_monitor.sweep(now)
+        feed_monitor.send_pending_alerts()
+        ws = self._ws
+        if ws is None or ws.closed:
+            return
+        ping_msg = feed_monitor.heartbeat_message(now)
+        if ping_msg:
+            try:
+                await ws.send_str(ping_msg)
+            except Exception as e:
+                print(f"⚠️ ارسال ping فید انجام نشد: {e}")
+
+    async def run(self, symbols: Optional[List[str]] = None):
+        self.loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+
+        # انتخاب مارکت‌ها و ثبت آن‌ها (بدون warm-up همزمان)
+        bot_loop._initialize_services(symbols, warm_up=False)
+        if not bot_loop.running:
+            print("🚫 ربات متوقف شد. لطفاً خطاهای Warm-up را بررسی کنید.")
+            return
+
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS))
+        self.exchange = AsyncExchangeClient()
+        order_manager.use_async_backend(self.loop, self.exchange.place_order)
+        telegram_reporter.use_async_session(self.loop, self.session)
+
+        try:
+            await self._warm_up(bot_loop_module.ACTIVE_SYMBOLS)
+            telegram_reporter.send_system_report(
+                f"🟢 ربات V2.3 (asyncio) راه‌اندازی شد ({len(bot_loop_module.ACTIVE_SYMBOLS)} مارکت)",
+                f"حالت اجرا: {'Paper Mode' if PAPER_MODE else 'Live Trade'}"
+            )
+            await asyncio.gather(self._run_feed(), self._run_scheduled())
+        finally:
+            await self.shutdown()
+
+    def request_stop(self):
+        """ توقف از هر نخ. """
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._stop.set)
+
+    async def shutdown(self):
+        self._stop.set()
+        bot_loop.stop_bot()
+        if self.exchange is not None:
+            await self.exchange.close()
+        if self.session is not None:
+            await self.session.close()
+
+
+def run_async_bot(symbols: Optional[List[str]] = None):
+    """ نقطه ورود runtime asyncio. """
+    runtime = AsyncBotRuntime()
+    try:
+        asyncio.run(runtime.run(symbols))
+    except KeyboardInterrupt:
+        print("\n👋 ZetaBot: توقف دستی ربات (asyncio).")
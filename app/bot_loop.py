@@ -7,23 +7,39 @@
 
 import time
 import threading
-import websocket 
 import json
 from datetime import datetime
 from typing import Dict, Any, List, Optional 
 
 # --- وارد کردن ماژول‌ها ---
 from config.settings import (
-    PAPER_MODE, TIME_FRAME, CANDLE_BUFFER_SIZE, MAX_ENTRIES_PER_MINUTE
+    PAPER_MODE, TIME_FRAME, CANDLE_BUFFER_SIZE,
+    HTF_TREND_CONFIRM_TF, ORDER_BOOK_ENABLED, ORDER_BOOK_DEPTH,
+    ORDER_SYNC_INTERVAL_SECONDS, TOP_PAIRS_COUNT, SHARED_MEMORY_ENABLED,
+    OFFLINE_MODE, OFFLINE_SYMBOLS, TICK_RECORDER_ENABLED, STATUS_HTTP_ENABLED,
+    SIGNAL_EVAL_MODE, SIGNAL_EVAL_MIN_CHANGE_PCT, SIGNAL_EVAL_MIN_INTERVAL_SECONDS,
+    SHADOW_STRATEGIES_ENABLED
 )
+from config.strategy_config import strategy_config
 from infra.exchange_client import exchange_client
 from infra.telegram_bot import telegram_reporter
 from infra.persistence_service import persistence_service
+from infra.tick_recorder import tick_recorder
 from app.state_manager import state_manager
 from app.trading_service import trading_service
-from domain.entry_policy import get_final_signal 
-from domain.models import MarketSafetyMode
+from app.order_manager import order_manager
+from app.order_tracker import order_tracker
+from app.analytics_service import analytics_service
+from app.status_service import status_publisher, status_server
+from app.shadow_runner import shadow_runner
+from domain.entry_policy import get_final_signal, confirm_higher_timeframe_trend, classify_market_regime
+from domain.models import MarketSafetyMode, KbarEvent, IndicatorsEvent, SignalEvent
 from utils.indicators import calculate_all_indicators 
+from utils.clock import clock
+from utils.signal_gate import SignalGate, EVAL_CANDLE_CLOSE
+from utils.profiler import profiler
+from utils.event_bus import event_bus
+from utils.feed_monitor import feed_monitor
 # --- (جدید V2.1) ---
 from utils.market_selector import pick_top_pairs 
 
@@ -36,27 +52,48 @@ class BotLoop:
 
     def __init__(self):
         self.running = True 
-        self.tick_lock = threading.Lock() 
+        # (V2.3) - قفل مشترک با callback های OrderManager
+        self.tick_lock = state_manager.lock
         self.websocket_thread: Optional[threading.Thread] = None
-        self.ws_app: Optional[websocket.WebSocketApp] = None 
+        self.ws_app = None # (websocket.WebSocketApp - فقط در start_websocket وارد می شود)
         self.is_first_run = True 
-        # (V2.1) - ضد اسپم (قانون ۸ ترید در دقیقه)
-        self.entry_timestamps: Dict[str, List[int]] = {} 
+        # (V2.3) - حذف ارزیابی‌های تکراری اندیکاتور/سیگنال برای kbar های یک دقیقه باز
+        self.signal_gate = SignalGate(SIGNAL_EVAL_MODE, SIGNAL_EVAL_MIN_CHANGE_PCT, SIGNAL_EVAL_MIN_INTERVAL_SECONDS)
 
-    def _initialize_services(self):
-        """ (V2.1) - راه‌اندازی سرویس‌ها و انتخاب ۲۵ مارکت. """
+    def _initialize_services(self, symbols: Optional[List[str]] = None, warm_up: bool = True,
+                             offline: bool = OFFLINE_MODE):
+        """
+        (V2.1) - راه‌اندازی سرویس‌ها و انتخاب ۲۵ مارکت.
+        (V2.3) - اگر symbols داده شود (پروسه شارد)، انتخاب مارکت انجام نمی شود.
+        (V2.3) - warm_up=False برای runtime asyncio که کندل‌ها را به صورت ناهمزمان بارگیری می کند.
+        (V2.3) - offline=True برای بازپخش فید ضبط شده (بدون REST).
+        """
         
         global ACTIVE_SYMBOLS
         
         persistence_service.start()
+        telegram_reporter.start()
+        strategy_config.reload() # (V2.3) - پارامترهای استراتژی از فایل (در صورت وجود)
+        if SHADOW_STRATEGIES_ENABLED and not shadow_runner.variants:
+            shadow_runner.load()
+        if TICK_RECORDER_ENABLED:
+            tick_recorder.start()
+        if STATUS_HTTP_ENABLED:
+            status_publisher.attach(event_bus) # (V2.3) - انتشار وضعیت روی نخ مشترک خودش
+            status_server.start()
+        order_manager.set_state_lock(self.tick_lock)
+        order_tracker.set_state_lock(self.tick_lock)
         
-        # --- (جدید V2.1) انتخاب ۲۵ مارکت برتر ---
-        if not exchange_client or not exchange_client.is_connected:
+        # (V2.3) - اتصال صریح REST (یا راه‌اندازی آفلاین Paper)
+        if not exchange_client.connect(offline=offline):
              print("🚫 خطای بحرانی: exchange_client در زمان Warm-up متصل نیست.")
              self.stop_bot()
              return
-             
-        ACTIVE_SYMBOLS = pick_top_pairs(exchange_client.exchange, n=25)
+
+        # --- (جدید V2.1) انتخاب ۲۵ مارکت برتر ---
+        if symbols is None:
+            symbols = OFFLINE_SYMBOLS if exchange_client.is_offline else pick_top_pairs(exchange_client.exchange, n=TOP_PAIRS_COUNT)
+        ACTIVE_SYMBOLS = symbols
         if not ACTIVE_SYMBOLS:
             print("🚫 هیچ مارکتی انتخاب نشد. ربات متوقف می‌شود.")
             self.stop_bot()
@@ -67,10 +104,15 @@ class BotLoop:
         persistence_service.load_state_on_startup(ACTIVE_SYMBOLS)
         
         for symbol in ACTIVE_SYMBOLS:
-            state_manager.add_symbol_to_manager(symbol)
-            self.entry_timestamps[symbol] = [] # (V2.1) - راه‌اندازی ضد اسپم
+            # (V2.3) - وضعیت ایمنی با همان کلید بافرها و پوزیشن‌ها ('BTC/USDT') ثبت می شود
+            state_manager.add_symbol_to_manager(symbol.replace('_', '/').upper())
+        feed_monitor.register([symbol.replace('_', '/').upper() for symbol in ACTIVE_SYMBOLS])
         
         # --- Warm-up: بارگیری داده‌های تاریخی (فقط برای ۵ مارکت اول) ---
+        if warm_up and exchange_client.is_connected:
+            self._warm_up_candles()
+
+    def _warm_up_candles(self):
         print(f"⏳ در حال بارگیری {CANDLE_BUFFER_SIZE} کندل تاریخی برای مارکت‌های اولیه...")
         try:
             for i, symbol in enumerate(ACTIVE_SYMBOLS[:5]): # (فقط ۵ تای اول برای سرعت)
@@ -80,16 +122,7 @@ class BotLoop:
                 symbol_api = symbol.replace('_', '/').upper() 
                 
                 initial_candles = exchange_client.fetch_candles(symbol_api, TIME_FRAME, CANDLE_BUFFER_SIZE)
-                if len(initial_candles) < 50: 
-                     print(f"   ... ⚠️ هشدار: داده کافی برای {symbol} دریافت نشد.")
-                     continue
-                 
-                for candle_data in initial_candles:
-                     kbar_dict = {
-                         't': candle_data[0], 'o': candle_data[1], 'h': candle_data[2],
-                         'l': candle_data[3], 'c': candle_data[4], 'v': candle_data[5]
-                     }
-                     state_manager.add_candle_to_buffer(symbol_api, kbar_dict)
+                self.load_initial_candles(symbol_api, initial_candles)
             
             print(f"✅ Warm-up کامل شد.")
                  
@@ -98,28 +131,18 @@ class BotLoop:
             self.stop_bot()
             return
 
-    # (V2.1) - بررسی قانون ۸ ترید در دقیقه
-    def _check_antispam_cooldown(self, symbol: str) -> bool:
-        """
-        قانون ضد اسپم: چک می‌کند که آیا تعداد ورودها در 60 ثانیه اخیر مجاز است یا خیر.
-        """
-        current_time = int(time.time())
-
-        # اگر برای این symbol تا حالا لیستی نداشتیم، بسازیم
-        if symbol not in self.entry_timestamps:
-            self.entry_timestamps[symbol] = []
-
-        # حذف زمان‌های قدیمی‌تر از 60 ثانیه
-        valid_times = [t for t in self.entry_timestamps[symbol] if current_time - t < 60]
-        self.entry_timestamps[symbol] = valid_times  # به‌روزرسانی لیست
-
-        if len(valid_times) >= MAX_ENTRIES_PER_MINUTE:
-            print(f"🚦 محدودیت فرکانس (Anti-Spam) برای {symbol} فعال شد (بیش از {MAX_ENTRIES_PER_MINUTE} ترید در دقیقه).")
-            # (فعال کردن Cooldown در state_manager)
-            state_manager.activate_cooldown(symbol)
-            return False
-
-        return True
+    def load_initial_candles(self, symbol_api: str, initial_candles: List[list]):
+        """ بارگیری کندل‌های تاریخی ccxt در بافر (مشترک بین حالت همزمان و asyncio). """
+        if len(initial_candles) < 50: 
+             print(f"   ... ⚠️ هشدار: داده کافی برای {symbol_api} دریافت نشد.")
+             return
+         
+        for candle_data in initial_candles:
+             kbar_dict = {
+                 't': candle_data[0], 'o': candle_data[1], 'h': candle_data[2],
+                 'l': candle_data[3], 'c': candle_data[4], 'v': candle_data[5]
+             }
+             state_manager.add_candle_to_buffer(symbol_api, kbar_dict)
 
     def _process_tick(self, symbol: str, price: float, candles: List[list], indicators: dict):
         """ 
@@ -128,6 +151,9 @@ class BotLoop:
         if not self.running:
             return
 
+        # (V2.3) - یک اسنپ‌شات پارامتر برای کل تیک (بارگذاری مجدد وسط تیک اثری ندارد)
+        params = strategy_config.current()
+
         # (قفل باید برای هر نماد جداگانه باشد، اما برای سادگی فعلاً سراسری است)
         with self.tick_lock:
             
@@ -138,90 +164,171 @@ class BotLoop:
                 trading_service.monitor_open_positions(symbol, price)
                 is_position_open = symbol in state_manager.open_positions
 
+            # (V2.3) - اگر سفارشی برای این نماد در جریان است، ورود جدید بررسی نمی شود
+            if order_manager.is_in_flight(symbol):
+                return
+
             # 2. گرفتن سیگنال از استراتژی
             signal_action = get_final_signal(
                 price,
                 indicators,
                 candles,
+                params,
             )
 
             print(f"[DEBUG] Strategy returned signal={signal_action} for {symbol} at {price}")
 
             if signal_action == "BUY":
                 print(f"[DEBUG] >>> BUY signal pipeline started for {symbol} at {price}")
-
-                # ۳. بررسی ایمنی (Safe Mode / Cooldown)
-                if not state_manager.check_entry_allowed(symbol):
+                regime = classify_market_regime(indicators, price, params)
+
+                # (جدید V2.3) - تأیید روند در تایم‌فریم بالاتر (بدون ترافیک اضافه)
+                if HTF_TREND_CONFIRM_TF:
+                    htf_indicators = state_manager.get_htf_indicators(symbol, HTF_TREND_CONFIRM_TF)
+                    if not confirm_higher_timeframe_trend(htf_indicators):
+                        print(f"[DEBUG] BLOCKED by {HTF_TREND_CONFIRM_TF} trend filter for {symbol}")
+                        self._log_decision(symbol, price, regime, 'BLOCKED_HTF')
+                        return
+
+                # ۳. بررسی ایمنی (Safe Mode / Cooldown / ضد اسپم / بودجه)
+                if not state_manager.check_entry_allowed(symbol, params.position_size_usdt):
                     print(f"[DEBUG] BLOCKED by state_manager.check_entry_allowed({symbol})")
-                    # ⚠️ موقت برای تست: فعلاً جلوی ورود را نگیریم
-                    # return  # ورود مجاز نیست
-
-                # ۴. (جدید V2.1) - بررسی ضد اسپم (قانون ۸ ترید)
-                if not self._check_antispam_cooldown(symbol):
-                    print(f"[DEBUG] BLOCKED by anti-spam / cooldown for {symbol}")
+                    self._log_decision(symbol, price, regime, 'BLOCKED_SAFETY')
                     return  # ورود مجاز نیست
 
-                # ۵. اجرای ورود
-                position = trading_service.process_entry_signal(symbol, price)
-                print(f"[DEBUG] process_entry_signal() returned: {position}")
+                # ۴. اجرای ورود (V2.3 - سفارش ناهمزمان؛ تیک منتظر صرافی نمی ماند)
+                accepted = trading_service.process_entry_signal(symbol, price, regime, params)
+                print(f"[DEBUG] process_entry_signal() returned: {accepted}")
 
-                if not position:
-                    print(f"[DEBUG] NO POSITION OBJECT -> order failed / skipped for {symbol}")
+                if not accepted:
+                    print(f"[DEBUG] ENTRY NOT SUBMITTED -> skipped for {symbol}")
+                    self._log_decision(symbol, price, regime, 'NOT_SUBMITTED')
                     return
 
-                # (ثبت زمان ورود برای قانون ضد اسپم)
-                ts = int(time.time())
-                self.entry_timestamps[symbol].append(ts)
-                print(f"[DEBUG] ENTRY TIMESTAMP logged for {symbol} at {ts}")
+                # (ثبت ورود برای قانون ضد اسپم)
+                state_manager.record_entry(symbol)
+                print(f"[DEBUG] ENTRY logged for {symbol} in anti-spam window")
+                self._log_decision(symbol, price, regime, 'SUBMITTED')
+
+    def _log_decision(self, symbol: str, price: float, regime: str, decision: str):
+        """ (V2.3) - ثبت نتیجه هر سیگنال BUY در تاریخچه ستونی تصمیم‌ها. """
+        now = clock.time()
+        persistence_service.add_decision_to_queue({
+            'timestamp': int(now),
+            'symbol': symbol,
+            'price': price,
+            'regime': regime,
+            'decision': decision
+        })
+        if event_bus.wants(SignalEvent):
+            event_bus.publish(SignalEvent(symbol, price, regime, decision, now))
+
+    def _check_exits_only(self, symbol: str, price: float):
+        """ (V2.3) - بررسی SL/TP پوزیشن باز بدون محاسبه اندیکاتور و سیگنال. """
+        if not self.running or symbol not in state_manager.open_positions:
+            return
+        with self.tick_lock:
+            trading_service.monitor_open_positions(symbol, price)
 
     # --- مدیریت WebSocket ---
 
     def _websocket_on_message(self, ws, message):
         """ (V2.1) - مدیریت پیام‌های همزمان ۲۵ مارکت. """
+        if TICK_RECORDER_ENABLED:
+            tick_recorder.record(message)
         try:
-            data = json.loads(message)
+            reply = self.handle_feed_message(message)
+            if reply:
+                ws.send(reply)
+        except Exception as e:
+            print(f"خطای پردازش پیام WebSocket: {e}")
+
+    def handle_feed_message(self, message: str) -> Optional[str]:
+        """
+        (V2.3) - پردازش یک پیام خام فید (مشترک بین websocket-client و runtime asyncio).
+        خروجی: پیامی که باید به سرور برگردانده شود (pong) یا None.
+        """
+        data = json.loads(message)
+        # (V2.3) - مبنای زمان پایش فید و sweep دوره‌ای نمادهای کهنه
+        now = clock.monotonic()
+        feed_monitor.on_message(now)
+        
+        action = data.get('action')
+        if action == 'ping':
+             feed_monitor.on_server_ping(now)
+             pong_msg = json.dumps({'action': 'pong', 'pong': data['ping']})
+             return pong_msg # (পিং نیازی به پردازش بیشتر ندارد)
+        if action == 'pong':
+             feed_monitor.on_pong(data.get('pong'), now) # (V2.3) - پاسخ ping کلاینت → RTT
+             return
+
+        # (V2.1) - شناسایی مارکت از پیام
+        symbol_pair = data.get('pair', '').lower() # 'btc_usdt'
+        if not symbol_pair:
+            return
             
-            if data.get('action') == 'ping':
-                 pong_msg = json.dumps({'action': 'pong', 'pong': data['ping']})
-                 ws.send(pong_msg)
-                 return # (পিং نیازی به پردازش بیشتر ندارد)
-
-            # (V2.1) - شناسایی مارکت از پیام
-            symbol_pair = data.get('pair', '').lower() # 'btc_usdt'
-            if not symbol_pair:
-                return
-                
-            symbol_api = symbol_pair.replace('_', '/').upper() # 'BTC/USDT'
+        symbol_api = symbol_pair.replace('_', '/').upper() # 'BTC/USDT'
+        
+        # (مطمئن شوید این مارکت جزو ۲۵ مارکت ماست)
+        if symbol_pair not in ACTIVE_SYMBOLS:
+            return 
+
+        # (جدید V2.3) - به‌روزرسانی دفتر سفارش
+        if data.get('type') == 'depth':
+            state_manager.update_order_book(symbol_api, data.get('depth', {}))
+            return
+
+        if data.get('type') == 'kbar':
+            kbar_data = data.get('kbar', {})
+            feed_monitor.on_kbar(symbol_api, now, data.get('TS'))
             
-            # (مطمئن شوید این مارکت جزو ۲۵ مارکت ماست)
-            if symbol_pair not in ACTIVE_SYMBOLS:
-                return 
+            # ۱. افزودن/آپدیت کندل در حافظه
+            candle_closed = state_manager.add_candle_to_buffer(symbol_api, kbar_data)
+            
+            candles_buffer = state_manager.candle_buffers[symbol_api]
+            current_price = float(kbar_data.get('c', 0))
 
-            if data.get('type') == 'kbar':
-                kbar_data = data.get('kbar', {})
-                
-                # ۱. افزودن/آپدیت کندل در حافظه
-                state_manager.add_candle_to_buffer(symbol_api, kbar_data)
+            # (V2.3) - رویدادها فقط در صورت وجود مشترک ساخته می شوند
+            if event_bus.wants(KbarEvent):
+                event_bus.publish(KbarEvent(symbol_api, current_price, kbar_data, candle_closed, clock.time()))
+            
+            if current_price > 0 and len(candles_buffer) >= 50:
+
+                # (V2.3) - به‌روزرسانی‌های تکراری فقط SL/TP پوزیشن باز را بررسی می کنند
+                if not self.signal_gate.should_evaluate(symbol_api, current_price, candle_closed):
+                    self._check_exits_only(symbol_api, current_price)
+                    if shadow_runner.variants:
+                        shadow_runner.on_price(symbol_api, current_price)
+                    return
+
+                # (در حالت candle_close اندیکاتورها فقط روی کندل‌های بسته شده محاسبه می شوند)
+                if SIGNAL_EVAL_MODE == EVAL_CANDLE_CLOSE:
+                    candles_buffer = candles_buffer[:-1]
                 
-                candles_buffer = state_manager.candle_buffers[symbol_api]
-                current_price = float(kbar_data.get('c', 0))
+                # ۲. محاسبه اندیکاتورها (EMA, RSI, BB, ATR)
+                all_indicators = calculate_all_indicators(candles_buffer)
+                if not all_indicators:
+                    return 
+
+                # (جدید V2.3) - انتشار آخرین اندیکاتورها در حافظه مشترک
+                if SHARED_MEMORY_ENABLED:
+                    from infra.shared_memory_store import shared_market_store
+                    shared_market_store.write_indicators(symbol_api, all_indicators)
                 
-                if current_price > 0 and len(candles_buffer) >= 50:
-                    
-                    # ۲. محاسبه اندیکاتورها (EMA, RSI, BB, ATR)
-                    all_indicators = calculate_all_indicators(candles_buffer)
-                    if not all_indicators:
-                        return 
-                    
-                    # (لاگ‌ها را محدود می‌کنیم تا ترمینال منفجر نشود)
-                    if symbol_api == "BTC/USDT":
-                         print(f"KBAR (BTC): Price={current_price:.2f}, RSI={all_indicators.get('RSI14', 0):.1f}")
-
-                    # ۳. اجرای منطق معاملات
-                    self._process_tick(symbol_api, current_price, candles_buffer, all_indicators)
-            
-        except Exception as e:
-            print(f"خطای پردازش پیام WebSocket: {e}")
+                # (لاگ‌ها را محدود می‌کنیم تا ترمینال منفجر نشود)
+                if symbol_api == "BTC/USDT":
+                     print(f"KBAR (BTC): Price={current_price:.2f}, RSI={all_indicators.get('RSI14', 0):.1f}")
+
+                # ۳. اجرای منطق معاملات
+                self._process_tick(symbol_api, current_price, candles_buffer, all_indicators)
+
+                # (V2.3) - همان اندیکاتورها برای استراتژی‌های سایه (بدون محاسبه دوباره)
+                if shadow_runner.variants:
+                    shadow_runner.on_indicators(symbol_api, current_price, candles_buffer, all_indicators)
+
+                # (V2.3) - مراحل بعدی (وضعیت، متریک، ضبط) از گذرگاه رویداد روی نخ‌های خودشان
+                if event_bus.wants(IndicatorsEvent):
+                    event_bus.publish(IndicatorsEvent(symbol_api, current_price, all_indicators, clock.time()))
 
     def _websocket_on_error(self, ws, error):
         print(f"خطای WebSocket: {error}")
@@ -238,6 +345,14 @@ class BotLoop:
         """ (V2.1) - اشتراک در ۲۵ مارکت. """
         print(f"✅ WebSocket اتصال یافت. در حال ارسال پیام اشتراک برای {len(ACTIVE_SYMBOLS)} مارکت...")
         
+        for sub_msg in self.subscription_messages():
+            ws.send(sub_msg)
+            
+        print("✅ پیام‌های اشتراک ارسال شدند.")
+            
+    def subscription_messages(self) -> List[str]:
+        """ (V2.3) - پیام‌های اشتراک همه مارکت‌ها (مشترک بین websocket-client و asyncio). """
+        messages = []
         for symbol_pair in ACTIVE_SYMBOLS:
             # pair (btc_usdt) قبلاً در فرمت صحیح است
             sub_kbar = {
@@ -245,15 +360,24 @@ class BotLoop:
                 "kbar": TIME_FRAME.replace('m', 'min'), 
                 "pair": symbol_pair
             }
-            ws.send(json.dumps(sub_kbar))
-            
-        print("✅ پیام‌های اشتراک ارسال شدند.")
-            
+            messages.append(json.dumps(sub_kbar))
+
+            # (جدید V2.3) - اشتراک اختیاری دفتر سفارش
+            if ORDER_BOOK_ENABLED:
+                sub_depth = {
+                    "action": "subscribe", "subscribe": "depth",
+                    "depth": str(ORDER_BOOK_DEPTH),
+                    "pair": symbol_pair
+                }
+                messages.append(json.dumps(sub_depth))
+        return messages
+
     def start_websocket(self):
-        if not exchange_client or not exchange_client.is_connected:
+        if not exchange_client.is_ready():
             print("🚫 WebSocket شروع نشد: اتصال REST اولیه ناموفق بود.")
             self.running = False
             return
+        import websocket
         print(f"⏳ در حال اتصال به WebSocket LBank در {LBANK_WS_URL}...")
         self.ws_app = websocket.WebSocketApp(
             LBANK_WS_URL,
@@ -264,21 +388,44 @@ class BotLoop:
         )
         self.websocket_thread = threading.Thread(
             target=self.ws_app.run_forever,
+            name="ws-feed", # (V2.3) - نام نخ برای پروفایلر
             daemon=True 
         )
         self.websocket_thread.start()
 
     def run_scheduled_tasks(self):
         if self.is_first_run:
-            if exchange_client and exchange_client.is_connected:
+            if exchange_client.is_ready():
                 telegram_reporter.send_system_report(f"🟢 ربات V2.1 راه‌اندازی شد ({len(ACTIVE_SYMBOLS)} مارکت)", 
                                                     f"حالت اجرا: {'Paper Mode' if PAPER_MODE else 'Live Trade'}")
             self.is_first_run = False
         while not GLOBAL_STOP_FLAG.is_set():
-            GLOBAL_STOP_FLAG.wait(60) 
-
-    def start_bot(self):
-        self._initialize_services()
+            # (V2.3) - همگام‌سازی گروهی سفارش‌های Live (در Paper Mode بدون اثر)
+            if not PAPER_MODE:
+                order_tracker.refresh()
+            # (V2.3) - خلاصه روزانه روی ROUTE_DAILY_SUMMARY
+            analytics_service.maybe_send_daily_summary()
+            strategy_config.reload_if_changed()
+            shadow_runner.flush()
+            self._check_feed_health()
+            GLOBAL_STOP_FLAG.wait(ORDER_SYNC_INTERVAL_SECONDS) 
+
+    def _check_feed_health(self):
+        """ (V2.3) - sweep نمادهای کهنه (حتی اگر هیچ پیامی نرسد) و ping کلاینت برای RTT. """
+        now = clock.monotonic()
+        feed_monitor.sweep(now)
+        feed_monitor.send_pending_alerts()
+        if self.ws_app is None:
+            return
+        ping_msg = feed_monitor.heartbeat_message(now)
+        if ping_msg:
+            try:
+                self.ws_app.send(ping_msg)
+            except Exception as e:
+                print(f"⚠️ ارسال ping فید انجام نشد: {e}")
+
+    def start_bot(self, symbols: Optional[List[str]] = None):
+        self._initialize_services(symbols)
         if not self.running: 
             print("🚫 ربات متوقف شد. لطفاً خطاهای Warm-up را بررسی کنید.")
             return
@@ -286,9 +433,25 @@ class BotLoop:
         self.run_scheduled_tasks() 
         
     def stop_bot(self):
+        self.running = False
         GLOBAL_STOP_FLAG.set() 
         if self.ws_app:
             self.ws_app.close() 
+        order_manager.stop()
+        order_tracker.cancel_all() # (V2.3) - لغو گروهی سفارش‌های باز Live
+        if TICK_RECORDER_ENABLED:
+            tick_recorder.stop()
+        if STATUS_HTTP_ENABLED:
+            status_server.stop()
+        event_bus.stop() # (V2.3) - تحویل رویدادهای باقی‌مانده صف مشترکین
+        profiler.stop() # (V2.3) - نوشتن خروجی پروفایل در صورت فعال بودن
+        if shadow_runner.variants:
+            shadow_runner.flush()
+            shadow_runner.print_summary()
+        if SHARED_MEMORY_ENABLED:
+            from infra.shared_memory_store import shared_market_store
+            shared_market_store.close()
+        persistence_service.stop() # (V2.3) - تخلیه نهایی صف لاگ معاملات و تاریخچه
         print("👋 ZetaBot: BotLoop متوقف شد.")
 
 # --- ساخت نمونه ---
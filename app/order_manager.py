@@ -0,0 +1,162 @@
+#
+# ------------------------------------------------------------
+# فایل: app/order_manager.py
+# (جدید V2.3 - مدیر اجرای سفارش غیرمسدودکننده با ردیابی سفارش‌های در جریان)
+# ------------------------------------------------------------
+#
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Any
+
+from config.settings import ASYNC_ORDER_EXECUTION, ORDER_WORKER_THREADS
+from domain.models import OrderIntent, OrderIntentEvent, FillEvent
+from infra.exchange_client import exchange_client
+from utils.event_bus import event_bus
+from utils.clock import clock
+
+# امضای callback ها: (intent, order_info) برای پر شدن، (intent, error) برای شکست
+FillCallback = Callable[[OrderIntent, Dict[str, Any]], None]
+FailureCallback = Callable[[OrderIntent, Optional[Exception]], None]
+
+
+class OrderManager:
+    """
+    سفارش‌ها را به صورت «نیت سفارش» (OrderIntent) می‌پذیرد و آن‌ها را در یک
+    ThreadPool به صرافی ارسال می‌کند تا نخ WebSocket هرگز منتظر REST نماند.
+
+    - برای هر نماد حداکثر یک سفارش در جریان مجاز است (جلوگیری از سفارش تکراری).
+    - نتیجه از طریق callback ها (زیر قفل state_lock) به StateManager اعمال می شود.
+    - در Paper Mode (بدون I/O واقعی) سفارش‌ها به صورت همزمان اجرا می شوند.
+    """
+
+    def __init__(self, async_mode: bool = ASYNC_ORDER_EXECUTION, max_workers: int = ORDER_WORKER_THREADS):
+        self.async_mode = async_mode
+        self.max_workers = max_workers
+        self.in_flight: Dict[str, OrderIntent] = {}
+        self._in_flight_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.state_lock: Optional[threading.RLock] = None
+        self._stopped = False
+        # (V2.3) - backend اختیاری asyncio: (loop, coroutine function ارسال سفارش)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_place: Optional[Callable[[OrderIntent], Any]] = None
+
+    def set_state_lock(self, lock: threading.RLock):
+        """ قفل مشترک با مسیر تیک؛ callback ها زیر این قفل اجرا می شوند. """
+        self.state_lock = lock
+
+    def use_async_backend(self, loop: asyncio.AbstractEventLoop, place_order_coro: Callable[[OrderIntent], Any]):
+        """ (V2.3) - ارسال سفارش‌ها به صورت coroutine روی event loop (بدون ThreadPool). """
+        self._loop = loop
+        self._async_place = place_order_coro
+
+    def is_in_flight(self, symbol: str) -> bool:
+        return symbol in self.in_flight
+
+    def submit(self, intent: OrderIntent, on_fill: FillCallback, on_failure: FailureCallback) -> bool:
+        """
+        ثبت یک نیت سفارش. اگر برای این نماد سفارشی در جریان باشد، False برمی‌گرداند.
+        """
+        with self._in_flight_lock:
+            if self._stopped or intent.symbol in self.in_flight:
+                return False
+            self.in_flight[intent.symbol] = intent
+
+        if event_bus.wants(OrderIntentEvent):
+            event_bus.publish(OrderIntentEvent(intent, clock.time()))
+
+        if self._async_place is not None:
+            asyncio.run_coroutine_threadsafe(self._execute_async(intent, on_fill, on_failure), self._loop)
+            return True
+
+        if not self.async_mode:
+            self._execute(intent, on_fill, on_failure)
+            return True
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="order")
+        try:
+            self._executor.submit(self._execute, intent, on_fill, on_failure)
+        except RuntimeError as e:
+            # (Executor پس از shutdown سفارش جدید نمی پذیرد)
+            self._release(intent)
+            print(f"🚫 سفارش {intent.side} {intent.symbol} پذیرفته نشد: {e}")
+            return False
+        return True
+
+    def _execute(self, intent: OrderIntent, on_fill: FillCallback, on_failure: FailureCallback):
+        order_info = None
+        error: Optional[Exception] = None
+        try:
+            order_info = exchange_client.place_order(
+                symbol=intent.symbol,
+                side=intent.side,
+                order_type=intent.order_type,
+                amount_usdt=intent.amount_usdt,
+                price=intent.price,
+                order_book=intent.order_book
+            )
+        except Exception as e:
+            error = e
+
+        self._finish(intent, order_info, error, on_fill, on_failure)
+
+    async def _execute_async(self, intent: OrderIntent, on_fill: FillCallback, on_failure: FailureCallback):
+        order_info = None
+        error: Optional[Exception] = None
+        try:
+            order_info = await self._async_place(intent)
+        except Exception as e:
+            error = e
+        self._finish(intent, order_info, error, on_fill, on_failure)
+
+    def _finish(self, intent, order_info, error, on_fill, on_failure):
+        if event_bus.wants(FillEvent):
+            self._publish_fill(intent, order_info, error)
+        try:
+            self._run_callback(intent, order_info, error, on_fill, on_failure)
+        finally:
+            self._release(intent)
+
+    def _publish_fill(self, intent: OrderIntent, order_info: Optional[Dict[str, Any]], error: Optional[Exception]):
+        """ (V2.3) - نتیجه سفارش برای مراحل گذرگاه رویداد (قبل از callback و آزادسازی نماد). """
+        if error is None and order_info:
+            status = order_info.get('status') or 'closed'
+            price = order_info.get('average') or intent.price
+            filled = order_info.get('filled') or 0.0
+        else:
+            status, price, filled = 'failed', intent.price, 0.0
+        event_bus.publish(FillEvent(intent.symbol, intent.side, intent.reason, status, price, filled, clock.time()))
+
+    def _run_callback(self, intent, order_info, error, on_fill, on_failure):
+        lock = self.state_lock
+        if lock is not None:
+            lock.acquire()
+        try:
+            if error is None and order_info:
+                on_fill(intent, order_info)
+            else:
+                on_failure(intent, error)
+        except Exception as e:
+            print(f"❌ خطای callback سفارش {intent.side} {intent.symbol}: {e}")
+        finally:
+            if lock is not None:
+                lock.release()
+
+    def _release(self, intent: OrderIntent):
+        with self._in_flight_lock:
+            if self.in_flight.get(intent.symbol) is intent:
+                del self.in_flight[intent.symbol]
+
+    def stop(self, wait: bool = True):
+        """ توقف pool؛ سفارش‌های در جریان تا پایان اجرا می شوند. """
+        with self._in_flight_lock:
+            self._stopped = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+# --- نمونه سازی ---
+order_manager = OrderManager()
@@ -0,0 +1,198 @@
+#
+# ------------------------------------------------------------
+# فایل: app/order_tracker.py
+# (جدید V2.3 - کش وضعیت سفارش‌های Live با پرس‌وجوی گروهی)
+# ------------------------------------------------------------
+#
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Any
+
+from config.settings import PAPER_MODE
+from domain.models import TrackedOrder
+from infra.exchange_client import exchange_client
+
+# callback تغییر وضعیت: (سفارش، آیا سفارش نهایی شده است)
+OrderUpdateCallback = Callable[[TrackedOrder, bool], None]
+
+
+class OrderTracker:
+    """
+    کش وضعیت سفارش‌های Live.
+
+    در هر چرخه فقط یک درخواست open-orders و یک درخواست my-trades برای کل حساب
+    ارسال می شود (مستقل از تعداد مارکت‌ها) و تغییرات به صورت diff روی
+    سفارش‌های تحت پیگیری اعمال می شوند. اگر صرافی پرس‌وجوی بدون نماد را
+    نپذیرد، فقط برای نمادهایی که سفارش باز دارند درخواست جداگانه ارسال می شود.
+    """
+
+    def __init__(self):
+        self.orders: Dict[str, TrackedOrder] = {}       # {order_id: TrackedOrder}
+        self.open_orders: Dict[str, Dict[str, Any]] = {} # آخرین اسنپ‌شات سفارش‌های باز حساب
+        self._callbacks: Dict[str, OrderUpdateCallback] = {}
+        self._lock = threading.Lock()
+        self._bulk_supported = True
+        self._last_trade_ms: Optional[int] = None
+        self._pending_cancel: set = set()  # نمادهایی که در چرخه بعد باید لغو شوند
+        self.state_lock: Optional[threading.RLock] = None
+
+    def set_state_lock(self, lock: threading.RLock):
+        self.state_lock = lock
+
+    def track(self, order_info: Dict[str, Any], symbol: str, role: str,
+              on_update: OrderUpdateCallback, context: Optional[Dict[str, Any]] = None) -> Optional[TrackedOrder]:
+        """ ثبت یک سفارش Live برای پیگیری. """
+        order_id = order_info.get('id')
+        if not order_id:
+            return None
+
+        tracked = TrackedOrder(
+            order_id=str(order_id),
+            symbol=symbol,
+            side=order_info.get('side', ''),
+            role=role,
+            amount=float(order_info.get('amount') or 0.0),
+            context=context or {}  # (filled/cost فقط از روی trade ها جمع می شوند)
+        )
+        with self._lock:
+            self.orders[tracked.order_id] = tracked
+            self._callbacks[tracked.order_id] = on_update
+        return tracked
+
+    def untrack(self, order_id: str):
+        with self._lock:
+            self.orders.pop(order_id, None)
+            self._callbacks.pop(order_id, None)
+
+    def request_cancel(self, symbol: str):
+        """
+        درخواست لغو سفارش‌های یک نماد در چرخه همگام‌سازی بعدی
+        (برای فراخوانی از مسیرهایی که زیر قفل state هستند و نباید منتظر REST بمانند).
+        """
+        with self._lock:
+            self._pending_cancel.add(symbol)
+
+    def orders_for_symbol(self, symbol: str) -> List[TrackedOrder]:
+        with self._lock:
+            return [o for o in self.orders.values() if o.symbol == symbol]
+
+    # --- همگام‌سازی ---
+
+    def refresh(self):
+        """ یک چرخه همگام‌سازی: دریافت گروهی و اعمال تغییرات. """
+        if PAPER_MODE:
+            return
+
+        with self._lock:
+            pending_cancel = self._pending_cancel
+            self._pending_cancel = set()
+            # (فقط سفارش‌هایی که قبل از درخواست ثبت شده‌اند در این چرخه ارزیابی می شوند)
+            snapshot = dict(self.orders)
+        tracked_symbols = {o.symbol for o in snapshot.values()}
+        if pending_cancel:
+            self.cancel_all(pending_cancel)
+
+        open_orders = self._fetch_all(exchange_client.fetch_open_orders, tracked_symbols)
+        if open_orders is None:
+            return
+        trades = self._fetch_all(
+            lambda symbol=None: exchange_client.fetch_my_trades(symbol, self._last_trade_ms),
+            tracked_symbols
+        )
+        if trades is None:
+            # (بدون trade ها سفارش پر شده از لغو شده قابل تشخیص نیست؛ هیچ تغییری اعمال نمی شود)
+            return
+
+        self.open_orders = {str(o.get('id')): o for o in open_orders}
+
+        # اعمال پر شدن‌های جدید (هر trade فقط یک بار با شناسه‌اش شمرده می شود)
+        changed_ids = set()
+        for trade in trades:
+            tracked = snapshot.get(str(trade.get('order') or ''))
+            if tracked is None:
+                continue
+            # (نشانگر زمان فقط با trade های سفارش‌های تحت پیگیری جلو می رود)
+            ts = trade.get('timestamp')
+            if ts and (self._last_trade_ms is None or ts > self._last_trade_ms):
+                self._last_trade_ms = ts
+            trade_id = str(trade.get('id'))
+            seen = tracked.context.setdefault('trade_ids', set())
+            if trade_id in seen:
+                continue
+            seen.add(trade_id)
+            tracked.filled += float(trade.get('amount') or 0.0)
+            tracked.cost += float(trade.get('cost') or 0.0)
+            changed_ids.add(tracked.order_id)
+
+        for tracked in snapshot.values():
+            is_done = tracked.order_id not in self.open_orders
+            if is_done:
+                tracked.is_open = False
+            if is_done or tracked.order_id in changed_ids:
+                self._notify(tracked, is_done)
+            if is_done:
+                self.untrack(tracked.order_id)
+
+    def _fetch_all(self, fetch_fn, symbols: Iterable[str]) -> Optional[List[Dict[str, Any]]]:
+        """ درخواست گروهی؛ در صورت عدم پشتیبانی، فقط برای نمادهای دارای سفارش. """
+        if self._bulk_supported:
+            try:
+                return fetch_fn()
+            except Exception as e:
+                import ccxt # (import تنبل: فقط در مسیر خطا)
+                if not isinstance(e, ccxt.ArgumentsRequired):
+                    raise
+                print("⚠️ صرافی پرس‌وجوی گروهی سفارش‌ها را پشتیبانی نمی‌کند؛ استفاده از پرس‌وجو به تفکیک نماد.")
+                self._bulk_supported = False
+
+        results: List[Dict[str, Any]] = []
+        for symbol in symbols:
+            data = fetch_fn(symbol)
+            if data is None:
+                return None
+            results.extend(data)
+        return results
+
+    def _notify(self, tracked: TrackedOrder, is_done: bool):
+        callback = self._callbacks.get(tracked.order_id)
+        if callback is None:
+            return
+        lock = self.state_lock
+        if lock is not None:
+            lock.acquire()
+        try:
+            callback(tracked, is_done)
+        except Exception as e:
+            print(f"❌ خطای callback همگام‌سازی سفارش {tracked.order_id} ({tracked.symbol}): {e}")
+        finally:
+            if lock is not None:
+                lock.release()
+
+    # --- لغو گروهی ---
+
+    def cancel_all(self, symbols: Optional[Iterable[str]] = None):
+        """
+        لغو گروهی سفارش‌های باز همین ربات (در زمان توقف ربات یا ورود به Safe Mode).
+        فقط سفارش‌های تحت پیگیری (self.orders) لغو می شوند؛ سفارش‌های دستی و سایر
+        ربات‌های همین حساب (که در اسنپ‌شات open_orders هستند) دست نمی خورند.
+        """
+        if PAPER_MODE:
+            return
+
+        wanted = set(symbols) if symbols is not None else None
+        by_symbol: Dict[str, List[str]] = {}
+        with self._lock:
+            for tracked in self.orders.values():
+                by_symbol.setdefault(tracked.symbol, []).append(tracked.order_id)
+
+        for symbol, order_ids in by_symbol.items():
+            if wanted is not None and symbol not in wanted:
+                continue
+            try:
+                exchange_client.cancel_orders(symbol, order_ids)
+                print(f"🧹 {len(order_ids)} سفارش باز {symbol} لغو شد.")
+            except Exception as e:
+                print(f"❌ لغو سفارش‌های {symbol} ناموفق بود: {e}")
+
+# --- نمونه سازی ---
+order_tracker = OrderTracker()
@@ -0,0 +1,171 @@
+#
+# ------------------------------------------------------------
+# فایل: app/portfolio_risk.py
+# (جدید V2.3 - ریسک همبستگی سبد: ماتریس کوواریانس افزایشی و سقف اکسپوژر همبسته)
+# ------------------------------------------------------------
+#
+
+import math
+import threading
+from typing import Dict, List, Optional
+
+from config.settings import (
+    CORRELATION_RISK_ENABLED, CORRELATION_HALFLIFE_CANDLES, CORRELATION_MIN_SAMPLES,
+    MAX_CORRELATED_EXPOSURE_USDT
+)
+
+
+class PortfolioRiskEngine:
+    """
+    ماتریس کوواریانس بازده‌های کندل (EWMA) بین همه نمادهای فعال.
+
+    - با هر بسته شدن کندل، بازده آن نماد در «سطل» همان دقیقه ثبت می شود؛ وقتی کندل
+      دقیقه بعد بسته شود، سطل به صورت یک بردار روی ماتریس اعمال می شود (یک به‌روزرسانی
+      rank-1 با هزینه O(n²)، بدون محاسبه دوباره از تاریخچه).
+    - اکسپوژر همبسته هر نماد (Σ اندازه پوزیشن‌ها × همبستگی مثبت) در یک بردار نگهداری می شود،
+      بنابراین بررسی ورود O(1) است. باز/بسته شدن پوزیشن این بردار را در O(n) اصلاح می کند.
+    (numpy فقط در اولین استفاده وارد می شود.)
+    """
+
+    def __init__(self, halflife_candles: float = CORRELATION_HALFLIFE_CANDLES,
+                 min_samples: int = CORRELATION_MIN_SAMPLES,
+                 max_exposure_usdt: float = MAX_CORRELATED_EXPOSURE_USDT):
+        self.alpha = 1.0 - math.exp(math.log(0.5) / halflife_candles)
+        self.min_samples = min_samples
+        self.max_exposure = max_exposure_usdt
+        self._lock = threading.Lock()
+
+        self.index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._mean = None            # (n,)
+        self._cov = None             # (n, n)
+        self._corr_pos = None        # (n, n) همبستگی‌های مثبت (منفی = 0)
+        self._sizes = None           # (n,) اندازه پوزیشن باز هر نماد (USDT)
+        self._corr_exposure = None   # (n,) = _corr_pos @ _sizes
+        self.samples = 0
+
+        self._last_close: Dict[str, float] = {}
+        self._bucket_ts: Optional[int] = None
+        self._bucket: Dict[str, float] = {}
+
+    # --- نمادها ---
+
+    def _ensure_symbol(self, symbol: str) -> int:
+        idx = self.index.get(symbol)
+        if idx is not None:
+            return idx
+        import numpy as np
+        idx = len(self.symbols)
+        n = idx + 1
+        self.index[symbol] = idx
+        self.symbols.append(symbol)
+
+        def _grow(arr, shape):
+            new = np.zeros(shape)
+            if arr is not None:
+                new[tuple(slice(0, s) for s in arr.shape)] = arr
+            return new
+
+        self._mean = _grow(self._mean, (n,))
+        self._cov = _grow(self._cov, (n, n))
+        self._corr_pos = _grow(self._corr_pos, (n, n))
+        self._corr_pos[idx, idx] = 1.0
+        self._sizes = _grow(self._sizes, (n,))
+        self._corr_exposure = _grow(self._corr_exposure, (n,))
+        return idx
+
+    def register_symbols(self, symbols: List[str]):
+        with self._lock:
+            for symbol in symbols:
+                self._ensure_symbol(symbol)
+
+    # --- به‌روزرسانی ماتریس ---
+
+    def on_candle_close(self, symbol: str, ts_ms: int, close: float):
+        """ فراخوانی از StateManager با هر کندل بسته شده. """
+        if not CORRELATION_RISK_ENABLED or close <= 0:
+            return
+        with self._lock:
+            if self._bucket_ts is not None and ts_ms < self._bucket_ts:
+                # (کندل دیرتر از سطل جاری رسیده؛ نادیده گرفته می شود و _last_close تغییر نمی کند
+                #  تا بازده بعدی این نماد فقط یک کندل را پوشش دهد)
+                return
+            prev = self._last_close.get(symbol)
+            self._last_close[symbol] = close
+            if prev is None:
+                return
+            if self._bucket_ts is None or ts_ms > self._bucket_ts:
+                if self._bucket:
+                    self._apply_bucket()
+                self._bucket_ts = ts_ms
+            self._ensure_symbol(symbol)
+            self._bucket[symbol] = close / prev - 1.0
+
+    def _apply_bucket(self):
+        import numpy as np
+        r = np.zeros(len(self.symbols))
+        for symbol, ret in self._bucket.items():
+            r[self.index[symbol]] = ret
+        self._bucket = {}
+
+        # EWMA: mean += a·d ؛ cov = (1-a)·(cov + a·d·dᵀ)
+        a = self.alpha
+        d = r - self._mean
+        self._mean += a * d
+        self._cov += a * np.outer(d, d)
+        self._cov *= (1.0 - a)
+        self.samples += 1
+
+        std = np.sqrt(np.clip(np.diag(self._cov), 0.0, None))
+        denom = np.outer(std, std)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.where(denom > 0, self._cov / denom, 0.0)
+        np.clip(corr, 0.0, 1.0, out=corr)
+        np.fill_diagonal(corr, 1.0)
+        self._corr_pos = corr
+        self._corr_exposure = corr @ self._sizes
+
+    # --- پوزیشن‌ها ---
+
+    def _adjust_size(self, symbol: str, delta_usdt: float):
+        idx = self._ensure_symbol(symbol)
+        self._sizes[idx] += delta_usdt
+        self._corr_exposure += self._corr_pos[:, idx] * delta_usdt
+
+    def on_position_opened(self, symbol: str, size_usdt: float):
+        if not CORRELATION_RISK_ENABLED:
+            return
+        with self._lock:
+            self._adjust_size(symbol, size_usdt)
+
+    def on_position_closed(self, symbol: str):
+        if not CORRELATION_RISK_ENABLED:
+            return
+        with self._lock:
+            idx = self.index.get(symbol)
+            if idx is not None and self._sizes[idx]:
+                self._adjust_size(symbol, -float(self._sizes[idx]))
+
+    # --- بررسی ورود ---
+
+    def correlated_exposure(self, symbol: str) -> float:
+        """ Σ اندازه پوزیشن‌های باز × همبستگی مثبت با symbol (شامل پوزیشن خود symbol). O(1). """
+        idx = self.index.get(symbol)
+        if idx is None or self._corr_exposure is None:
+            return 0.0
+        return float(self._corr_exposure[idx])
+
+    def allows_entry(self, symbol: str, size_usdt: float) -> bool:
+        if not CORRELATION_RISK_ENABLED or self.samples < self.min_samples:
+            return True  # (تا جمع شدن داده کافی، محدودیتی اعمال نمی شود)
+        return self.correlated_exposure(symbol) + size_usdt <= self.max_exposure
+
+    def correlation(self, symbol_a: str, symbol_b: str) -> Optional[float]:
+        """ همبستگی فعلی (برای گزارش/دیباگ؛ مقادیر منفی صفر شده‌اند). """
+        ia, ib = self.index.get(symbol_a), self.index.get(symbol_b)
+        if ia is None or ib is None:
+            return None
+        return float(self._corr_pos[ia, ib])
+
+# --- نمونه سازی ---
+portfolio_risk = PortfolioRiskEngine()
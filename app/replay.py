@@ -0,0 +1,144 @@
+#
+# ------------------------------------------------------------
+# فایل: app/replay.py
+# (جدید V2.3 - بازپخش قطعی فید ضبط شده با ساعت مجازی)
+# اجرا: python -m app.replay --start 2024-05-01T00:00 --end 2024-05-01T06:00 --speed 0
+# ------------------------------------------------------------
+#
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from config.settings import PAPER_MODE, TICK_RECORDER_DIR, DATA_DIR
+from infra.telegram_bot import telegram_reporter
+from infra.persistence_service import persistence_service
+from infra.tick_recorder import TickReader
+from app.bot_loop import bot_loop
+from app.analytics_service import analytics_service
+from app.shadow_runner import shadow_runner
+from utils.clock import clock, VirtualClock
+
+
+class ReplayDriver:
+    """
+    پیام‌های خام ضبط شده (infra/tick_recorder) را به ترتیب از همان مسیر فید زنده
+    (bot_loop.handle_feed_message) عبور می دهد. ساعت مشترک پیش از هر پیام روی
+    زمان دریافت همان پیام تنظیم می شود، بنابراین Cooldown ها، ضد اسپم و زمان ورودها
+    دقیقاً مانند اجرای اصلی محاسبه می شوند.
+
+    speed=0: بدون توقف (سریع‌ترین و قطعی)؛ speed=N: N برابر سرعت واقعی.
+    """
+
+    def __init__(self, base_dir: str = TICK_RECORDER_DIR, speed: float = 0.0,
+                 output_dir: Optional[str] = None):
+        self.reader = TickReader(base_dir)
+        self.speed = speed
+        # (لاگ معاملات، تاریخچه ستونی و لاگ نسخه‌های سایه هر اجرا جدا از داده‌های اجرای زنده)
+        self.output_dir = output_dir or self._new_output_dir()
+        self.virtual_clock: Optional[VirtualClock] = None
+        self.messages = 0
+        self.errors = 0
+
+    @staticmethod
+    def _new_output_dir() -> str:
+        base = os.path.join(DATA_DIR, "replay", f"run-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+        path, n = base, 1
+        while os.path.exists(path):
+            n += 1
+            path = f"{base}-{n}"
+        return path
+
+    def _recorded_symbols(self, start_ns: Optional[int], end_ns: Optional[int]) -> List[str]:
+        """ مارکت‌های موجود در بازه (یک گذر سبک پیش از بازپخش). """
+        pairs = set()
+        for _, message in self.reader.iter_messages(start_ns, end_ns):
+            if '"pair"' not in message:
+                continue
+            try:
+                pair = json.loads(message).get('pair')
+            except ValueError:
+                continue
+            if pair:
+                pairs.add(pair.lower())
+        return sorted(pairs)
+
+    def run(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None,
+            symbols: Optional[List[str]] = None) -> bool:
+        if not PAPER_MODE:
+            print("🚫 بازپخش فقط در Paper Mode مجاز است.")
+            return False
+
+        if symbols is None:
+            symbols = self._recorded_symbols(start_ns, end_ns)
+        if not symbols:
+            print("🚫 هیچ پیام ضبط شده‌ای در این بازه یافت نشد.")
+            return False
+
+        telegram_reporter.muted = True
+        persistence_service.use_output_dir(self.output_dir)
+        shadow_runner.log_dir = os.path.join(self.output_dir, "shadow")
+        print(f"📁 خروجی بازپخش: {self.output_dir}")
+        self.virtual_clock = VirtualClock()
+        clock.use(self.virtual_clock)
+        try:
+            bot_loop._initialize_services(symbols, warm_up=False, offline=True)
+            if not bot_loop.running:
+                return False
+
+            print(f"⏳ بازپخش {len(symbols)} مارکت (سرعت: {'حداکثر' if not self.speed else f'{self.speed}x'})...")
+            prev_ns: Optional[int] = None
+            wall_start = time.perf_counter()
+            for recv_ns, message in self.reader.iter_messages(start_ns, end_ns):
+                if self.speed and prev_ns is not None and recv_ns > prev_ns:
+                    time.sleep((recv_ns - prev_ns) / 1e9 / self.speed)
+                prev_ns = recv_ns
+                self.virtual_clock.set(recv_ns / 1e9)
+                try:
+                    bot_loop.handle_feed_message(message)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"خطای پردازش پیام بازپخش: {e}")
+                self.messages += 1
+
+            elapsed = time.perf_counter() - wall_start
+            print(f"✅ بازپخش کامل شد: {self.messages} پیام در {elapsed:.1f} ثانیه ({self.errors} خطا).")
+            print(f"📊 نتیجه: {analytics_service.snapshot()['total']}")
+            return True
+        finally:
+            bot_loop.stop_bot()
+            clock.use(None)
+            telegram_reporter.muted = False
+
+
+def _parse_time_ns(value: Optional[str]) -> Optional[int]:
+    """ زمان ISO (UTC) یا عدد ثانیه یونیکس → نانوثانیه. """
+    if not value:
+        return None
+    try:
+        return int(float(value) * 1e9)
+    except ValueError:
+        dt = datetime.fromisoformat(value)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp() * 1e9)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="بازپخش فید ضبط شده ZetaBot")
+    parser.add_argument("--dir", default=TICK_RECORDER_DIR)
+    parser.add_argument("--start", help="شروع بازه (ISO UTC یا ثانیه یونیکس)")
+    parser.add_argument("--end", help="پایان بازه (ISO UTC یا ثانیه یونیکس)")
+    parser.add_argument("--speed", type=float, default=0.0, help="0 = بدون توقف، N = N برابر سرعت واقعی")
+    parser.add_argument("--symbols", nargs="*", help="مثلاً btc_usdt eth_usdt (پیش‌فرض: همه مارکت‌های ضبط شده)")
+    parser.add_argument("--shadow", help="فایل JSON نسخه‌های سایه برای مقایسه روی همین بازپخش")
+    parser.add_argument("--out", help="پوشه خروجی (پیش‌فرض: DATA_DIR/replay/run-<زمان>-<pid>)")
+    args = parser.parse_args()
+
+    if args.shadow:
+        shadow_runner.load(args.shadow)
+
+    ReplayDriver(args.dir, args.speed, args.out).run(_parse_time_ns(args.start), _parse_time_ns(args.end), args.symbols)
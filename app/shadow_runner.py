@@ -0,0 +1,234 @@
+#
+# ------------------------------------------------------------
+# فایل: app/shadow_runner.py
+# (جدید V2.3 - اجرای نسخه‌های سایه استراتژی روی همان جریان اندیکاتورها)
+# ------------------------------------------------------------
+#
+
+import csv
+import json
+import os
+import threading
+from typing import Any, Dict, List
+
+from config.settings import (
+    VIRTUAL_BALANCE_START, MAX_ENTRIES_PER_MINUTE, MAX_GLOBAL_ENTRIES_PER_MINUTE,
+    FAST_COOLDOWN_SECONDS, MAX_CONSECUTIVE_LOSSES,
+    SHADOW_STRATEGIES_FILE, SHADOW_TRADE_LOG_DIR
+)
+from config.strategy_config import StrategyConfig, parse_overrides, build_config
+from domain.models import Position, VirtualBalance
+from domain.entry_policy import get_final_signal, classify_market_regime
+from domain.exit_policy import check_sl_progression, check_for_exit, get_default_exit_plan
+from app.analytics_service import TradeStats
+from utils.rate_limiter import RateLimiter
+from utils.helpers import calculate_pnl
+from utils.clock import clock
+
+SHADOW_TRADE_HEADER = [
+    'timestamp', 'variant', 'symbol', 'entry_price', 'exit_price', 'entry_size_usdt',
+    'pnl_usdt', 'pnl_pct', 'exit_reason', 'regime'
+]
+
+
+class ShadowVariant:
+    """
+    یک نسخه سایه: پارامترهای خودش، بالانس مجازی، پوزیشن‌ها و لاگ معاملات جدا.
+    قوانین ورود/خروج همان توابع domain هستند؛ پر شدن سفارش‌ها در قیمت همان به‌روزرسانی
+    شبیه‌سازی می شود (مانند Paper Mode بدون دفتر سفارش). ضد اسپم، Cooldown پس از خروج و
+    Safe Mode پس از ضررهای متوالی مانند ربات اصلی برای هر نسخه جداگانه اعمال می شوند.
+    """
+
+    def __init__(self, name: str, params: StrategyConfig, start_balance: float = VIRTUAL_BALANCE_START):
+        self.name = name
+        self.params = params
+        self.balance = VirtualBalance(start_balance, start_balance, 0.0)
+        self.open_positions: Dict[str, Position] = {}
+        self.stats = TradeStats()
+        self.limiter = RateLimiter(
+            per_key_limit=MAX_ENTRIES_PER_MINUTE,
+            global_limit=MAX_GLOBAL_ENTRIES_PER_MINUTE,
+            window_seconds=60,
+            clock=clock.monotonic
+        )
+        self.consecutive_losses: Dict[str, int] = {}
+        self.safe_mode: set = set()    # (نمادهای متوقف شده پس از MAX_CONSECUTIVE_LOSSES)
+        self._cooling: set = set()     # (نمادهای در Cooldown پس از خروج)
+        self._pending_trades: List[Dict[str, Any]] = []
+
+    # --- به‌روزرسانی ---
+
+    def check_exit(self, symbol: str, price: float):
+        position = self.open_positions.get(symbol)
+        if position is None:
+            return
+        check_sl_progression(position, price)
+        reason = check_for_exit(position, price)
+        if reason:
+            self._close(position, price, reason)
+
+    def evaluate(self, symbol: str, price: float, candles: List[list], indicators: Dict[str, float]):
+        self.check_exit(symbol, price)
+        if symbol in self.open_positions:
+            return
+        if symbol in self.safe_mode:
+            return
+        if symbol in self._cooling:
+            if self.limiter.in_cooldown(symbol):
+                return
+            # (مانند StateManager.check_entry_allowed: پایان Cooldown شمارنده ضررها را صفر می کند)
+            self._cooling.discard(symbol)
+            self.consecutive_losses[symbol] = 0
+        if self.limiter.check(symbol) is not None:
+            return
+        if get_final_signal(price, indicators, candles, self.params, debug=False) != "BUY":
+            return
+        self._open(symbol, price, classify_market_regime(indicators, price, self.params))
+
+    def _open(self, symbol: str, price: float, regime: str):
+        size = self.params.position_size_usdt
+        if not self.balance.reserve(size):
+            return
+        initial_sl_price = price * (1.0 - self.params.initial_sl_pct)
+        self.open_positions[symbol] = Position(
+            symbol=symbol,
+            entry_timestamp=int(clock.time()),
+            entry_price_actual=price,
+            initial_size_usdt=size,
+            current_sl_price=initial_sl_price,
+            initial_sl_price=initial_sl_price,
+            exit_plan=get_default_exit_plan(self.params),
+            entry_regime=regime
+        )
+        self.limiter.record(symbol)
+
+    def _close(self, position: Position, price: float, reason: str):
+        symbol = position.symbol
+        pnl_pct, pnl_usdt = calculate_pnl(position.entry_price_actual, price, position.initial_size_usdt)
+        self.balance.release(position.initial_size_usdt, pnl_usdt)
+        del self.open_positions[symbol]
+        self.stats.add(pnl_usdt)
+
+        if pnl_usdt < 0:
+            self.consecutive_losses[symbol] = self.consecutive_losses.get(symbol, 0) + 1
+        else:
+            self.consecutive_losses[symbol] = 0
+        if self.consecutive_losses[symbol] >= MAX_CONSECUTIVE_LOSSES:
+            self.safe_mode.add(symbol)
+        else:
+            self.limiter.start_cooldown(symbol, FAST_COOLDOWN_SECONDS)
+            self._cooling.add(symbol)
+
+        self._pending_trades.append({
+            'timestamp': int(clock.time()),
+            'variant': self.name,
+            'symbol': symbol,
+            'entry_price': position.entry_price_actual,
+            'exit_price': price,
+            'entry_size_usdt': position.initial_size_usdt,
+            'pnl_usdt': pnl_usdt,
+            'pnl_pct': pnl_pct,
+            'exit_reason': reason,
+            'regime': position.entry_regime
+        })
+
+    def take_pending_trades(self) -> List[Dict[str, Any]]:
+        trades, self._pending_trades = self._pending_trades, []
+        return trades
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'balance': self.balance.total_balance,
+            'available': self.balance.available_balance,
+            'open_positions': len(self.open_positions),
+            'stats': self.stats.as_dict(),
+        }
+
+
+class ShadowRunner:
+    """
+    پخش اندیکاتورهای محاسبه شده توسط BotLoop به N نسخه سایه.
+    فید، بافر کندل و محاسبه اندیکاتورها فقط یک بار (برای ربات اصلی) انجام می شود؛
+    هزینه هر نسخه اضافه فقط ارزیابی سیاست ورود/خروج آن است.
+    (همه فراخوانی‌ها از نخ فید؛ flush از حلقه زمان‌بندی شده فقط لیست معاملات را جابجا می کند.)
+    """
+
+    def __init__(self, log_dir: str = SHADOW_TRADE_LOG_DIR):
+        self.log_dir = log_dir
+        self.variants: List[ShadowVariant] = []
+        self._flush_lock = threading.Lock()
+
+    def load(self, path: str = SHADOW_STRATEGIES_FILE) -> int:
+        """ خواندن نسخه‌ها از فایل JSON؛ نسخه نامعتبر رد و گزارش می شود. """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            print(f"ℹ️ فایل استراتژی‌های سایه ({path}) یافت نشد.")
+            return 0
+        except (OSError, ValueError) as e:
+            print(f"❌ خطای خواندن {path}: {e}")
+            return 0
+        if not isinstance(raw, dict):
+            print(f"❌ {path} باید یک آبجکت JSON از نام نسخه به پارامترها باشد.")
+            return 0
+
+        for name, overrides_raw in raw.items():
+            overrides, errors = parse_overrides(overrides_raw)
+            params = None
+            if not errors:
+                params, errors = build_config(overrides, source=f"shadow:{name}")
+            if errors:
+                print(f"❌ نسخه سایه {name} رد شد: {'؛ '.join(errors)}")
+                continue
+            self.add_variant(name, params)
+        print(f"✅ {len(self.variants)} استراتژی سایه فعال شد: {', '.join(v.name for v in self.variants)}")
+        return len(self.variants)
+
+    def add_variant(self, name: str, params: StrategyConfig, start_balance: float = VIRTUAL_BALANCE_START):
+        self.variants.append(ShadowVariant(name, params, start_balance))
+
+    # --- مسیر فید ---
+
+    def on_indicators(self, symbol: str, price: float, candles: List[list], indicators: Dict[str, float]):
+        for variant in self.variants:
+            variant.evaluate(symbol, price, candles, indicators)
+
+    def on_price(self, symbol: str, price: float):
+        """ به‌روزرسانی‌هایی که اندیکاتورشان محاسبه نشده (SignalGate): فقط SL/TP. """
+        for variant in self.variants:
+            variant.check_exit(symbol, price)
+
+    # --- خروجی ---
+
+    def flush(self):
+        """ نوشتن معاملات جدید هر نسخه در DATA_DIR/shadow/<نام>.csv (از حلقه زمان‌بندی شده). """
+        if not self.variants:
+            return
+        with self._flush_lock:
+            for variant in self.variants:
+                trades = variant.take_pending_trades()
+                if not trades:
+                    continue
+                path = os.path.join(self.log_dir, f"{variant.name}.csv")
+                try:
+                    os.makedirs(self.log_dir, exist_ok=True)
+                    is_new = not os.path.exists(path)
+                    with open(path, mode='a', newline='') as f:
+                        writer = csv.DictWriter(f, fieldnames=SHADOW_TRADE_HEADER)
+                        if is_new:
+                            writer.writeheader()
+                        writer.writerows(trades)
+                except Exception as e:
+                    print(f"❌ خطای نوشتن لاگ نسخه سایه {variant.name}: {e}")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {variant.name: variant.snapshot() for variant in self.variants}
+
+    def print_summary(self):
+        for variant in self.variants:
+            s = variant.snapshot()
+            print(f"👥 {variant.name}: بالانس {s['balance']:.2f}، {s['open_positions']} پوزیشن باز، {s['stats']}")
+
+# --- نمونه سازی ---
+shadow_runner = ShadowRunner()
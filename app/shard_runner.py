@@ -0,0 +1,216 @@
+#
+# ------------------------------------------------------------
+# فایل: app/shard_runner.py
+# (جدید V2.3 - اجرای چند پروسه‌ای: تقسیم مارکت‌ها بین شاردها با بالانس مرکزی)
+# ------------------------------------------------------------
+#
+
+import multiprocessing as mp
+import os
+import threading
+from multiprocessing.connection import Connection, wait
+from typing import Dict, List, Tuple
+
+from config.settings import (
+    SHARD_PROCESSES, TOP_PAIRS_COUNT, VIRTUAL_BALANCE_START, SHARD_OUTPUT_DIR,
+    MAX_GLOBAL_ENTRIES_PER_MINUTE, PAPER_MODE
+)
+from domain.models import VirtualBalance
+from app.analytics_service import AnalyticsService
+from utils.clock import clock
+from utils.rate_limiter import SlidingWindowCounter
+
+
+# --- سمت شارد (پروسه فرزند) ---
+
+class RemoteBalanceClient:
+    """
+    کلاینت بالانس مرکزی در پروسه شارد.
+    StateManager به جای VirtualBalance محلی از این کلاس استفاده می‌کند.
+    هر درخواست یک رفت و برگشت روی Pipe است (چند ده میکروثانیه).
+    """
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self._lock = threading.Lock() # (نخ تیک و نخ‌های OrderManager از یک Pipe استفاده می‌کنند)
+
+    def _request(self, *msg):
+        with self._lock:
+            self.conn.send(msg)
+            return self.conn.recv()
+
+    def check_funding(self, size_usdt: float) -> bool:
+        return self._request('check', size_usdt)
+
+    def reserve(self, symbol: str, size_usdt: float) -> bool:
+        return self._request('reserve', symbol, size_usdt)
+
+    def release(self, symbol: str, size_usdt: float, net_pnl_usdt: float, regime: str = ""):
+        self._request('release', symbol, size_usdt, net_pnl_usdt, regime)
+
+    def claim_global_entry(self) -> bool:
+        """ رزرو یک جای ورود در پنجره سراسری همه شاردها. """
+        return self._request('entry')
+
+    def snapshot(self) -> Dict[str, float]:
+        return self._request('snapshot')
+
+
+def _watch_stop_event(stop_event, bot_loop):
+    stop_event.wait()
+    bot_loop.stop_bot()
+
+
+def shard_output_dir(shard_id: int) -> str:
+    return os.path.join(SHARD_OUTPUT_DIR, f"shard-{shard_id}")
+
+
+def run_shard_worker(shard_id: int, symbols: List[str], conn: Connection, stop_event):
+    """ نقطه ورود پروسه شارد: فید، بافرها و استراتژی مستقل برای زیرمجموعه مارکت‌ها. """
+    # (import در داخل پروسه فرزند تا singleton ها فقط در همین پروسه ساخته شوند)
+    from app.state_manager import state_manager
+    from app.bot_loop import bot_loop
+    from app.analytics_service import analytics_service
+    from app.shadow_runner import shadow_runner
+    from infra.persistence_service import persistence_service
+    from infra.tick_recorder import tick_recorder
+
+    out = shard_output_dir(shard_id)
+    print(f"🧩 شارد {shard_id}: {len(symbols)} مارکت ({', '.join(symbols[:3])}, ...) → {out}")
+    # (هر شارد نویسنده یکتای فایل‌های خودش است: لاگ معاملات، تاریخچه ستونی، shadow و ضبط فید)
+    persistence_service.use_output_dir(out)
+    shadow_runner.log_dir = os.path.join(out, "shadow")
+    tick_recorder.base_dir = os.path.join(out, "ticks")
+
+    # (بالانس، سقف سراسری ورود، خلاصه روزانه و پیام راه‌اندازی فقط در هماهنگ‌کننده)
+    state_manager.use_balance_coordinator(RemoteBalanceClient(conn))
+    analytics_service.summary_enabled = False
+    bot_loop.is_first_run = False
+
+    threading.Thread(target=_watch_stop_event, args=(stop_event, bot_loop), daemon=True).start()
+    try:
+        bot_loop.start_bot(symbols)
+    except KeyboardInterrupt:
+        bot_loop.stop_bot()
+
+
+# --- سمت هماهنگ‌کننده (پروسه اصلی) ---
+
+class BalanceCoordinator:
+    """
+    مالک VirtualBalance در حالت شارد. همه رزرو/آزادسازی‌ها از اینجا عبور می کنند
+    تا شاردها نتوانند بیش از بالانس موجود وارد معامله شوند.
+    سقف سراسری ورود (MAX_GLOBAL_ENTRIES_PER_MINUTE) و آمار/خلاصه روزانه همه شاردها
+    هم اینجا نگهداری می شوند.
+    (وضعیت ایمنی هر نماد در شارد مالک همان نماد باقی می‌ماند.)
+    """
+
+    def __init__(self, start_balance: float = VIRTUAL_BALANCE_START):
+        self.balance = VirtualBalance(
+            total_balance=start_balance,
+            available_balance=start_balance,
+            in_use_balance=0.0
+        )
+        self.positions_by_symbol: Dict[str, float] = {}
+        self.entry_window = SlidingWindowCounter(MAX_GLOBAL_ENTRIES_PER_MINUTE, 60)
+        self.analytics = AnalyticsService()
+
+    def handle(self, msg: Tuple):
+        action = msg[0]
+        if action == 'check':
+            return self.balance.can_fund(msg[1])
+        if action == 'reserve':
+            _, symbol, size = msg
+            ok = self.balance.reserve(size)
+            if ok:
+                self.positions_by_symbol[symbol] = size
+            return ok
+        if action == 'release':
+            _, symbol, size, net_pnl, regime = msg
+            self.balance.release(size, net_pnl)
+            self.positions_by_symbol.pop(symbol, None)
+            self.analytics.record_trade(symbol, net_pnl, regime)
+            return True
+        if action == 'entry':
+            now = clock.monotonic()
+            if self.entry_window.is_full(now):
+                return False
+            self.entry_window.record(now)
+            return True
+        if action == 'snapshot':
+            return {
+                'total_balance': self.balance.total_balance,
+                'available_balance': self.balance.available_balance,
+                'in_use_balance': self.balance.in_use_balance,
+                'open_positions': len(self.positions_by_symbol),
+            }
+        return None
+
+    def serve(self, conns: List[Connection], stop_event):
+        """ حلقه سرویس‌دهی به همه شاردها با multiprocessing.connection.wait. """
+        live = list(conns)
+        while live and not stop_event.is_set():
+            for conn in wait(live, timeout=1.0):
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):
+                    live.remove(conn)
+                    continue
+                conn.send(self.handle(msg))
+            # (خلاصه روزانه یکجای همه شاردها)
+            self.analytics.maybe_send_daily_summary()
+
+
+def split_symbols(symbols: List[str], n_shards: int) -> List[List[str]]:
+    """ تقسیم round-robin (مارکت‌های پرحجم به طور مساوی بین شاردها پخش می شوند). """
+    shards = [symbols[i::n_shards] for i in range(n_shards)]
+    return [s for s in shards if s]
+
+
+def run_sharded(n_shards: int = SHARD_PROCESSES):
+    """ انتخاب مارکت‌ها، راه‌اندازی شاردها و اجرای هماهنگ‌کننده بالانس. """
+    from infra.exchange_client import exchange_client
+    from utils.market_selector import pick_top_pairs
+
+    if not exchange_client.connect():
+        print("🚫 حالت شارد شروع نشد: اتصال REST اولیه ناموفق بود.")
+        return
+
+    symbols = pick_top_pairs(exchange_client.exchange, n=TOP_PAIRS_COUNT)
+    shards = split_symbols(symbols, max(1, n_shards))
+
+    # (spawn: پروسه‌های فرزند نخ‌ها و سوکت‌های پروسه اصلی را به ارث نمی برند)
+    ctx = mp.get_context('spawn')
+    stop_event = ctx.Event()
+    coordinator = BalanceCoordinator()
+    processes = []
+    parent_conns = []
+
+    for shard_id, shard_symbols in enumerate(shards):
+        parent_conn, child_conn = ctx.Pipe()
+        proc = ctx.Process(
+            target=run_shard_worker,
+            args=(shard_id, shard_symbols, child_conn, stop_event),
+            name=f"zetabot-shard-{shard_id}",
+            daemon=False
+        )
+        proc.start()
+        processes.append(proc)
+        parent_conns.append(parent_conn)
+
+    print(f"--- 🧩 {len(processes)} شارد برای {len(symbols)} مارکت راه‌اندازی شد ---")
+    from infra.telegram_bot import telegram_reporter
+    telegram_reporter.start()
+    telegram_reporter.send_system_report(f"🟢 ربات V2.1 راه‌اندازی شد ({len(symbols)} مارکت، {len(processes)} شارد)",
+                                        f"حالت اجرا: {'Paper Mode' if PAPER_MODE else 'Live Trade'}")
+    try:
+        coordinator.serve(parent_conns, stop_event)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        for proc in processes:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+        print(f"👋 هماهنگ‌کننده شاردها متوقف شد. بالانس نهایی: {coordinator.handle(('snapshot',))}")
@@ -6,41 +6,89 @@
 #
 
 from typing import Dict, Optional, List, Any
-import time
+import threading
 from datetime import datetime 
 
 from config.settings import (
     VIRTUAL_BALANCE_START,
     FAST_COOLDOWN_SECONDS,    
+    MAX_ENTRIES_PER_MINUTE,
+    MAX_GLOBAL_ENTRIES_PER_MINUTE,
     MAX_CONSECUTIVE_LOSSES,
-    INITIAL_POSITION_SIZE_USDT, 
-    CANDLE_BUFFER_SIZE
+    CANDLE_BUFFER_SIZE,
+    TIME_FRAME,
+    HIGHER_TIME_FRAMES,
+    HTF_BUFFER_SIZE,
+    ORDER_BOOK_DEPTH,
+    SHARED_MEMORY_ENABLED
 )
+from config.strategy_config import strategy_config
 from domain.models import (
-    Position, MarketState, VirtualBalance, MarketSafetyMode
+    Position, MarketState, VirtualBalance, MarketSafetyMode, SafetyChangeEvent
 )
 from infra.telegram_bot import telegram_reporter 
+from utils.candle_aggregator import MultiTimeframeAggregator
+from utils.indicators import calculate_all_indicators
+from utils.order_book import OrderBook
+from utils.clock import clock
+from utils.event_bus import event_bus
+from utils.feed_monitor import feed_monitor
+from app.portfolio_risk import portfolio_risk
+from utils.rate_limiter import RateLimiter, REASON_KEY_LIMIT, REASON_GLOBAL_LIMIT
 
 class StateManager:
     
     def __init__(self):
+        # (جدید V2.3) - قفل وضعیت؛ بین نخ تیک و callback های OrderManager مشترک است
+        self.lock = threading.RLock()
         self.open_positions: Dict[str, Position] = {}     
         self.market_states: Dict[str, MarketState] = {}   
         self.candle_buffers: Dict[str, List[list]] = {} 
+        # (جدید V2.3) - کندل‌ها و اندیکاتورهای تایم‌فریم بالاتر (ساخته شده از استریم 1m)
+        self.htf_aggregators: Dict[str, MultiTimeframeAggregator] = {}
+        self.htf_indicators: Dict[str, Dict[str, Dict[str, float]]] = {}
+        # (جدید V2.3) - دفتر سفارش top-N هر نماد (فقط اگر ORDER_BOOK_ENABLED باشد پر می شود)
+        self.order_books: Dict[str, OrderBook] = {}
 
         self.virtual_balance = VirtualBalance(
             total_balance=VIRTUAL_BALANCE_START,
             available_balance=VIRTUAL_BALANCE_START,
             in_use_balance=0.0 
         )
+        # (جدید V2.3) - در حالت چند پروسه‌ای، کلاینت بالانس مرکزی (RemoteBalanceClient)
+        self.balance_coordinator = None
+        # (جدید V2.3) - تنها مرجع ضد اسپم و Cooldown ورود (به تفکیک نماد و سراسری)
+        self.entry_limiter = RateLimiter(
+            per_key_limit=MAX_ENTRIES_PER_MINUTE,
+            global_limit=MAX_GLOBAL_ENTRIES_PER_MINUTE,
+            window_seconds=60,
+            clock=clock.monotonic
+        )
+
+    def use_balance_coordinator(self, client):
+        """
+        (V2.3) - حالت شارد: بالانس و سقف سراسری ورود در پروسه هماهنگ‌کننده.
+        پنجره محلی فقط سقف هر نماد را نگه می دارد (سقف سراسری هر شارد N برابر نمی شود).
+        """
+        self.balance_coordinator = client
+        self.entry_limiter = RateLimiter(
+            per_key_limit=MAX_ENTRIES_PER_MINUTE,
+            global_limit=0,
+            window_seconds=60,
+            clock=clock.monotonic
+        )
 
     def add_symbol_to_manager(self, symbol: str):
         if symbol not in self.market_states:
             self.market_states[symbol] = MarketState(symbol=symbol)
             self.candle_buffers[symbol] = []
 
-    def add_candle_to_buffer(self, symbol: str, kbar_data: dict):
-        """ (V2.2.5) - اصلاح نهایی: مدیریت هیبرید int/str برای زمان """
+    def add_candle_to_buffer(self, symbol: str, kbar_data: dict) -> bool:
+        """
+        (V2.2.5) - اصلاح نهایی: مدیریت هیبرید int/str برای زمان
+        (V2.3) - خروجی: True اگر کندل قبلی با این به‌روزرسانی بسته شد (کندل جدید شروع شد).
+        """
+        candle_closed = False
         try:
             # --- (اصلاحیه V2.2.5) ---
             t_val = kbar_data.get('t')
@@ -82,37 +130,108 @@ class StateManager:
                 
             # اکنون مقایسه (int < int) به درستی کار خواهد کرد
             if not buffer or buffer[-1][0] < candle_list[0]:
+                candle_closed = bool(buffer)
+                if candle_closed:
+                    # (V2.3) - بازده کندل بسته شده برای ماتریس همبستگی سبد
+                    portfolio_risk.on_candle_close(symbol, buffer[-1][0], buffer[-1][4])
                 buffer.append(candle_list)
+                if SHARED_MEMORY_ENABLED:
+                    from infra.shared_memory_store import shared_market_store
+                    shared_market_store.write_candle(symbol, candle_list, replace_last=False)
             elif buffer and buffer[-1][0] == candle_list[0]:
                 buffer[-1] = candle_list
+                if SHARED_MEMORY_ENABLED:
+                    from infra.shared_memory_store import shared_market_store
+                    shared_market_store.write_candle(symbol, candle_list, replace_last=True)
             
             if len(buffer) > CANDLE_BUFFER_SIZE + 20: 
                 self.candle_buffers[symbol] = buffer[-(CANDLE_BUFFER_SIZE + 10):]
+
+            # (جدید V2.3) - تجمیع افزایشی به تایم‌فریم‌های بالاتر
+            self._update_higher_timeframes(symbol, candle_list)
         
         except Exception as e:
             print(f"خطای add_candle_to_buffer برای {symbol}: {e}")
+        return candle_closed
+
+    # --- (جدید V2.3) تایم‌فریم‌های بالاتر ---
+    def _update_higher_timeframes(self, symbol: str, candle_list: list):
+        aggregator = self.htf_aggregators.get(symbol)
+        if aggregator is None:
+            aggregator = MultiTimeframeAggregator(TIME_FRAME, HIGHER_TIME_FRAMES, HTF_BUFFER_SIZE)
+            self.htf_aggregators[symbol] = aggregator
+            self.htf_indicators[symbol] = {}
+
+        # اندیکاتورهای هر تایم‌فریم فقط در زمان بسته شدن کندل آن محاسبه می شوند
+        for tf, _closed_candle in aggregator.update(candle_list):
+            closed_candles = aggregator.candles(tf)[:-1]
+            indicators = calculate_all_indicators(closed_candles)
+            if indicators:
+                self.htf_indicators[symbol][tf] = indicators
+
+    def get_htf_candles(self, symbol: str, timeframe: str) -> List[list]:
+        """ کندل‌های تایم‌فریم بالاتر (آخرین عنصر = کندل در حال شکل‌گیری). """
+        aggregator = self.htf_aggregators.get(symbol)
+        return aggregator.candles(timeframe) if aggregator else []
 
-    # --- منطق Paper Balance (بدون تغییر) ---
+    def get_htf_indicators(self, symbol: str, timeframe: str) -> Dict[str, float]:
+        """ آخرین اندیکاتورهای تایم‌فریم بالاتر (بر اساس کندل‌های بسته‌شده). """
+        return self.htf_indicators.get(symbol, {}).get(timeframe, {})
+
+    # --- (جدید V2.3) دفتر سفارش ---
+    def update_order_book(self, symbol: str, depth_data: dict, ts_ms: int = 0):
+        """
+        اعمال پیام depth روی دفتر سفارش نماد.
+        LBank در کانال depth اسنپ‌شات کامل top-N می‌فرستد؛ اگر پیام به صورت
+        diff علامت‌گذاری شده باشد، سطوح به صورت افزایشی اعمال می شوند.
+        """
+        book = self.order_books.get(symbol)
+        if book is None:
+            book = OrderBook(symbol, max_levels=ORDER_BOOK_DEPTH)
+            self.order_books[symbol] = book
+
+        bids = depth_data.get('bids', [])
+        asks = depth_data.get('asks', [])
+        if depth_data.get('is_diff'):
+            book.apply_diff(bids, asks, ts_ms)
+        else:
+            book.apply_snapshot(bids, asks, ts_ms)
+
+    def get_order_book(self, symbol: str) -> Optional[OrderBook]:
+        book = self.order_books.get(symbol)
+        return book if book is not None and book.is_ready() else None
+
+    # --- منطق Paper Balance (V2.3 - با پشتیبانی از بالانس مرکزی شاردها) ---
     def check_funding(self, size_usdt: float) -> bool:
-        return size_usdt <= self.virtual_balance.available_balance
+        # (V2.3) - در حالت شارد، بالانس در پروسه هماهنگ‌کننده نگهداری می شود
+        if self.balance_coordinator is not None:
+            return self.balance_coordinator.check_funding(size_usdt)
+        return self.virtual_balance.can_fund(size_usdt)
 
-    def execute_entry(self, position: Position):
+    def execute_entry(self, position: Position) -> bool:
         size = position.initial_size_usdt
-        if size > self.virtual_balance.available_balance:
-            print(f"خطای بالانس: {size} مورد نیاز، {self.virtual_balance.available_balance} موجود")
-            return 
+        if self.balance_coordinator is not None:
+            reserved = self.balance_coordinator.reserve(position.symbol, size)
+        else:
+            reserved = self.virtual_balance.reserve(size)
+
+        if not reserved:
+            print(f"خطای بالانس: {size} مورد نیاز برای {position.symbol} موجود نیست")
+            return False
             
-        self.virtual_balance.available_balance -= size
-        self.virtual_balance.in_use_balance += size 
         self.open_positions[position.symbol] = position
+        portfolio_risk.on_position_opened(position.symbol, size)
+        return True
 
     def execute_exit(self, position: Position, pnl_usdt: float, fees_usdt: float):
         entry_size = position.initial_size_usdt
-        net_return = entry_size + pnl_usdt - fees_usdt
-        
-        self.virtual_balance.in_use_balance -= entry_size 
-        self.virtual_balance.total_balance += (pnl_usdt - fees_usdt)
-        self.virtual_balance.available_balance += net_return
+        net_pnl = pnl_usdt - fees_usdt
+
+        if self.balance_coordinator is not None:
+            self.balance_coordinator.release(position.symbol, entry_size, net_pnl, position.entry_regime)
+        else:
+            self.virtual_balance.release(entry_size, net_pnl)
+        portfolio_risk.on_position_closed(position.symbol)
 
         if position.symbol in self.open_positions:
             del self.open_positions[position.symbol]
@@ -127,13 +246,14 @@ class StateManager:
             
             if st.consecutive_losses >= MAX_CONSECUTIVE_LOSSES:
                 st.safety_mode = MarketSafetyMode.SAFE_MODE
-                st.last_safety_event_time = int(time.time())
+                st.last_safety_event_time = int(clock.time())
                 print(f"🔒 حالت ایمنی (Safe Mode) برای {position.symbol} به دلیل {MAX_CONSECUTIVE_LOSSES} ضرر متوالی فعال شد.")
                 telegram_reporter.send_safety_report(position.symbol, 'SAFE_MODE')
+                self._publish_safety_change(st)
             else:
                 self.activate_cooldown(position.symbol)
 
-    def activate_cooldown(self, symbol: str):
+    def activate_cooldown(self, symbol: str, seconds: float = FAST_COOLDOWN_SECONDS):
         if symbol not in self.market_states: return
         state = self.market_states[symbol]
         
@@ -141,28 +261,67 @@ class StateManager:
             return
             
         state.safety_mode = MarketSafetyMode.COOLDOWN
-        state.last_safety_event_time = int(time.time())
+        state.last_safety_event_time = int(clock.time())
+        self.entry_limiter.start_cooldown(symbol, seconds)
+        self._publish_safety_change(state)
+
+    def _publish_safety_change(self, state: MarketState):
+        """ (V2.3) - تغییر وضعیت ایمنی برای مراحل گذرگاه رویداد. """
+        if event_bus.wants(SafetyChangeEvent):
+            event_bus.publish(SafetyChangeEvent(state.symbol, state.safety_mode, state.consecutive_losses, clock.time()))
 
-    def check_entry_allowed(self, symbol: str) -> bool:
+    def record_entry(self, symbol: str):
+        """ (V2.3) - ثبت ورود پذیرفته شده در پنجره ضد اسپم. """
+        self.entry_limiter.record(symbol)
+
+    def check_entry_allowed(self, symbol: str, size_usdt: Optional[float] = None) -> bool:
+        """
+        Safe Mode، فید کهنه، Cooldown، ضد اسپم (نماد و سراسری) و بودجه در یک بررسی.
+        (V2.3) - size_usdt: حجم ورود از اسنپ‌شات پارامترهای همان تیک (پیش‌فرض: نسخه جاری).
+        """
         if symbol not in self.market_states:
             return False 
             
         state = self.market_states[symbol]
-        now = int(time.time())
 
         if state.safety_mode == MarketSafetyMode.SAFE_MODE:
             return False
 
+        # (V2.3) - فید کهنه یا تازه برگشته (بافر کندل ناقص)
+        if feed_monitor.is_blocked(symbol):
+            return False
+
         if state.safety_mode == MarketSafetyMode.COOLDOWN:
-            if now - state.last_safety_event_time < FAST_COOLDOWN_SECONDS:
+            if self.entry_limiter.in_cooldown(symbol):
                 return False 
             
             state.safety_mode = MarketSafetyMode.ACTIVE
             if state.consecutive_losses > 0: 
                 state.consecutive_losses = 0 
+            self._publish_safety_change(state)
+
+        # (V2.1) - قانون ۸ ترید در دقیقه (+ سقف سراسری V2.3)
+        reason = self.entry_limiter.check(symbol)
+        if reason == REASON_KEY_LIMIT:
+            print(f"🚦 محدودیت فرکانس (Anti-Spam) برای {symbol} فعال شد (بیش از {MAX_ENTRIES_PER_MINUTE} ترید در دقیقه).")
+            self.activate_cooldown(symbol)
+            return False
+        if reason == REASON_GLOBAL_LIMIT:
+            return False # (بدون Cooldown نماد؛ با خالی شدن پنجره سراسری آزاد می شود)
+
+        # (V2.3) - سقف اکسپوژر همبسته سبد (O(1))
+        if size_usdt is None:
+            size_usdt = strategy_config.current().position_size_usdt
+        if not portfolio_risk.allows_entry(symbol, size_usdt):
+            print(f"🧮 اکسپوژر همبسته {symbol} ({portfolio_risk.correlated_exposure(symbol):.2f} USDT) به سقف رسیده است.")
+            return False
+
+        if not self.check_funding(size_usdt):
+            print(f"🚫 بودجه کافی برای ورود {symbol} وجود ندارد (نیاز: {size_usdt}).")
+            return False
 
-        if not self.check_funding(INITIAL_POSITION_SIZE_USDT):
-            print(f"🚫 بودجه کافی برای ورود {symbol} وجود ندارد (نیاز: {INITIAL_POSITION_SIZE_USDT}).")
+        # (V2.3) - حالت شارد: سقف سراسری در هماهنگ‌کننده (بررسی و ثبت اتمی؛ آخرین شرط)
+        if self.balance_coordinator is not None and not self.balance_coordinator.claim_global_entry():
             return False
 
         return True 
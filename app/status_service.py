@@ -0,0 +1,209 @@
+#
+# ------------------------------------------------------------
+# فایل: app/status_service.py
+# (جدید V2.3 - اسنپ‌شات‌های تغییرناپذیر وضعیت و endpoint محلی HTTP/JSON)
+# ------------------------------------------------------------
+#
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+from config.settings import (
+    STATUS_HTTP_HOST, STATUS_HTTP_PORT, STATUS_PUBLISH_INTERVAL_SECONDS, PAPER_MODE
+)
+from app.state_manager import state_manager
+from app.analytics_service import analytics_service
+from app.shadow_runner import shadow_runner
+from infra.exchange_client import exchange_client
+from utils.clock import clock
+from utils.profiler import profiler
+from utils.feed_monitor import feed_monitor
+from utils.event_bus import EventBus, POLICY_DROP_OLDEST, event_bus
+from domain.models import IndicatorsEvent
+
+
+class StatusPublisher:
+    """
+    انتشار وضعیت به صورت copy-on-write.
+    (V2.3) - اندیکاتورها از گذرگاه رویداد (IndicatorsEvent) روی نخ مشترک "bus-status" می رسند؛
+    این نخ حداکثر هر STATUS_PUBLISH_INTERVAL_SECONDS یک کپی از وضعیت می سازد
+    و فقط مرجع اسنپ‌شات را جایگزین می کند (انتساب اتمی)؛ خواننده‌ها همیشه یک
+    نسخه کامل و ثابت (JSON آماده) می خوانند و هیچ‌وقت قفل معاملات را نمی گیرند.
+    """
+
+    def __init__(self, interval_seconds: float = STATUS_PUBLISH_INTERVAL_SECONDS):
+        self.interval = interval_seconds
+        self._next_publish = 0.0
+        self._latest_indicators: Dict[str, Dict[str, float]] = {}
+        self._snapshot_json: bytes = b'{}'
+        self.version = 0
+        self._subscription = None
+
+    def attach(self, bus: EventBus):
+        """ (V2.3) - اشتراک در IndicatorsEvent؛ اگر انتشار کند باشد، رویدادهای قدیمی حذف می شوند. """
+        if self._subscription is None:
+            self._subscription = bus.subscribe("status", (IndicatorsEvent,), self._on_indicators,
+                                               queue_size=256, policy=POLICY_DROP_OLDEST)
+
+    def _on_indicators(self, events):
+        for event in events:
+            self.note_indicators(event.symbol, event.indicators)
+        self.maybe_publish()
+
+    def note_indicators(self, symbol: str, indicators: Dict[str, float]):
+        """ ثبت مرجع آخرین اندیکاتورها (بدون کپی؛ دیکشنری هر تیک تازه ساخته می شود). """
+        self._latest_indicators[symbol] = indicators
+
+    def maybe_publish(self):
+        """ پس از هر دسته اندیکاتور؛ در بیشتر فراخوانی‌ها فقط یک مقایسه زمان است. """
+        now = clock.monotonic()
+        if now < self._next_publish:
+            return
+        self._next_publish = now + self.interval
+        self.publish()
+
+    def publish(self):
+        # ۱. کپی کم‌عمق وضعیت زیر قفل (فقط اعداد و رشته‌ها)
+        with state_manager.lock:
+            positions = [
+                {
+                    'symbol': p.symbol,
+                    'entry_timestamp': p.entry_timestamp,
+                    'entry_price': p.entry_price_actual,
+                    'size_usdt': p.initial_size_usdt,
+                    'current_sl_price': p.current_sl_price,
+                    'initial_sl_price': p.initial_sl_price,
+                    'milestone': p.last_milestone_index,
+                    'regime': p.entry_regime,
+                }
+                for p in state_manager.open_positions.values()
+            ]
+            safety = {
+                symbol: {
+                    'mode': st.safety_mode.name,
+                    'consecutive_losses': st.consecutive_losses,
+                    'last_event': st.last_safety_event_time,
+                }
+                for symbol, st in state_manager.market_states.items()
+            }
+            vb = state_manager.virtual_balance
+            balance = {
+                'total_balance': vb.total_balance,
+                'available_balance': vb.available_balance,
+                'in_use_balance': vb.in_use_balance,
+            }
+        indicators = dict(self._latest_indicators)
+
+        # ۲. ساخت JSON خارج از قفل
+        if state_manager.balance_coordinator is not None:
+            balance = state_manager.balance_coordinator.snapshot()
+        snapshot = {
+            'version': self.version + 1,
+            'published_at': int(clock.time()),
+            'mode': 'Paper' if PAPER_MODE else 'Live',
+            'balance': balance,
+            'positions': positions,
+            'safety': safety,
+            'indicators': indicators,
+            'performance': analytics_service.snapshot()['total'],
+            'exchange': exchange_client.call_metrics(),
+            'shadow': shadow_runner.snapshot(),
+            'event_bus': event_bus.snapshot(),
+            'feed': feed_monitor.snapshot(),
+        }
+        self._snapshot_json = json.dumps(snapshot, ensure_ascii=False).encode('utf-8')
+        self.version += 1
+
+    def snapshot_json(self) -> bytes:
+        return self._snapshot_json
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    publisher: StatusPublisher = None  # (در StatusServer.start مقداردهی می شود)
+
+    def _send_json(self, body: bytes, status: int = 200):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _is_local(self) -> bool:
+        return self.client_address[0] in ('127.0.0.1', '::1')
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/admin/profiler' and self._is_local():
+            self._send_json(json.dumps(profiler.status(), ensure_ascii=False).encode('utf-8'))
+            return
+        if path not in ('/', '/status'):
+            self.send_error(404)
+            return
+        self._send_json(self.publisher.snapshot_json())
+
+    def do_POST(self):
+        """
+        (V2.3) - دستورهای مدیریتی محلی (فقط از loopback):
+          POST /admin/profiler/start?seconds=60&memory=1&threads=ws-feed,order
+          POST /admin/profiler/stop
+        """
+        if not self._is_local():
+            self.send_error(403)
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        result: Any
+        if url.path == '/admin/profiler/start':
+            kwargs: Dict[str, Any] = {}
+            if 'seconds' in query:
+                kwargs['seconds'] = float(query['seconds'][0])
+            if 'memory' in query:
+                kwargs['memory'] = query['memory'][0] in ('1', 'true')
+            if 'threads' in query:
+                kwargs['threads'] = query['threads'][0].split(',')
+            result = {'started': profiler.start(**kwargs)}
+        elif url.path == '/admin/profiler/stop':
+            result = profiler.stop() or {'stopped': False}
+        else:
+            self.send_error(404)
+            return
+        self._send_json(json.dumps(result, ensure_ascii=False).encode('utf-8'))
+
+    def log_message(self, format, *args):
+        pass  # (بدون لاگ هر درخواست در ترمینال)
+
+
+class StatusServer:
+    """ سرور HTTP محلی (نخ daemon)؛ فقط اسنپ‌شات منتشر شده را برمی گرداند. """
+
+    def __init__(self, publisher: StatusPublisher):
+        self.publisher = publisher
+        self.httpd: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self, host: str = STATUS_HTTP_HOST, port: int = STATUS_HTTP_PORT):
+        if self.httpd is not None:
+            return
+        handler = type('StatusHandler', (_StatusHandler,), {'publisher': self.publisher})
+        try:
+            self.httpd = ThreadingHTTPServer((host, port), handler)
+        except OSError as e:
+            print(f"❌ سرور وضعیت روی {host}:{port} راه‌اندازی نشد: {e}")
+            return
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="status-http", daemon=True)
+        self.thread.start()
+        print(f"✅ سرور وضعیت: http://{host}:{port}/status")
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+# --- نمونه سازی ---
+status_publisher = StatusPublisher()
+status_server = StatusServer(status_publisher)
@@ -5,15 +5,12 @@
 # ------------------------------------------------------------
 #
 
-import time
 from typing import Optional, Dict, Any
 
-from config.settings import (
-    INITIAL_POSITION_SIZE_USDT, # <--- (مهم: استفاده از 3$ ثابت)
-    INITIAL_SL_PCT, 
-    PAPER_MODE
-)
-from domain.models import Position, VirtualBalance
+from config.settings import PAPER_MODE
+# (V2.3) - حجم، SL اولیه و سقف اسپرد از اسنپ‌شات پارامترهای استراتژی
+from config.strategy_config import StrategyConfig, strategy_config
+from domain.models import Position, VirtualBalance, OrderIntent, TrackedOrder, MarketSafetyMode, ExitEvent
 # --- (جدید V2.0) ---
 from domain.exit_policy import (
     check_sl_progression, check_for_exit, get_default_exit_plan
@@ -23,7 +20,12 @@ from infra.exchange_client import exchange_client
 from infra.telegram_bot import telegram_reporter
 from infra.persistence_service import persistence_service
 from app.state_manager import state_manager
+from app.order_manager import order_manager
+from app.order_tracker import order_tracker
+from app.analytics_service import analytics_service
 from utils.helpers import calculate_pnl, format_duration
+from utils.clock import clock
+from utils.event_bus import event_bus
 
 
 class TradingService:
@@ -31,48 +33,99 @@ class TradingService:
     def __init__(self):
         self.active_sl_orders: Dict[str, str] = {} # {symbol: order_id}
         
-    def process_entry_signal(self, symbol: str, entry_price: float) -> Optional[Position]:
+    def process_entry_signal(self, symbol: str, entry_price: float, regime: str = "",
+                             params: Optional[StrategyConfig] = None) -> bool:
         """
         (V2.0) - دریافت سیگنال و اجرای سفارش ورود (با حجم ثابت 3$).
+        (V2.3) - سفارش به OrderManager سپرده می شود و نتیجه در _on_entry_fill اعمال می شود.
+        (V2.3) - params همان اسنپ‌شات تیک سیگنال است و تا ساخت پوزیشن همراه سفارش می ماند.
+        خروجی: True اگر سفارش ورود پذیرفته شد.
         """
-        
+        params = params or strategy_config.current()
+
         # ۱. (جدید V2.0) - حجم ثابت ۳ دلار
-        target_size_usdt = INITIAL_POSITION_SIZE_USDT
-        amount_coin = target_size_usdt / entry_price
+        target_size_usdt = params.position_size_usdt
+
+        # (جدید V2.3) - قیمت‌گذاری ورود بر اساس اسپرد واقعی دفتر سفارش
+        order_book = state_manager.get_order_book(symbol)
+        if order_book is not None:
+            spread_pct = order_book.spread_pct()
+            if spread_pct is not None and spread_pct > params.max_entry_spread_pct:
+                print(f"هشدار: اسپرد {symbol} ({spread_pct:.3f}%) بیش از حد مجاز است. ورود لغو شد.")
+                return False
+            entry_price = order_book.best_ask() or entry_price
 
-        # ۲. ارسال سفارش (Limit IOC)
-        order_info = exchange_client.place_order(
+        # ۲. ارسال سفارش (Limit IOC) - بدون انتظار برای پاسخ صرافی
+        intent = OrderIntent(
             symbol=symbol,
-            order_type='limit', # (V1.6)
             side='buy',
+            order_type='limit', # (V1.6)
             amount_usdt=target_size_usdt, # (V1.6)
-            price=entry_price
+            price=entry_price,
+            reason='ENTRY',
+            order_book=order_book,
+            context={'regime': regime, 'params': params}
         )
-        
-        if not order_info or order_info.get('status') != 'closed':
+        accepted = order_manager.submit(intent, self._on_entry_fill, self._on_entry_failure)
+        if not accepted:
+            print(f"هشدار: سفارش دیگری برای {symbol} در جریان است. ورود تکراری رد شد.")
+        return accepted
+
+    def _on_entry_fill(self, intent: OrderIntent, order_info: Dict[str, Any]):
+        """ (جدید V2.3) - اعمال نتیجه سفارش ورود (از نخ OrderManager، زیر قفل state). """
+        symbol = intent.symbol
+
+        # (V2.3) - سفارش Live که هنوز باز است به OrderTracker سپرده می شود
+        if order_info.get('status') == 'open' and not PAPER_MODE:
+            order_tracker.track(order_info, symbol, 'ENTRY', self._on_tracked_entry_update, context=dict(intent.context))
+            print(f"⏳ سفارش ورود {symbol} هنوز باز است؛ وضعیت آن در همگام‌سازی بعدی بررسی می شود.")
+            return
+
+        if order_info.get('status') != 'closed':
             print(f"هشدار: سفارش ورود {symbol} پر نشد (IOC).")
-            return None
+            return
         
-        filled_size_usdt = order_info.get('filled', 0.0) * entry_price
+        # (V2.3) - قیمت واقعی پر شدن (با احتساب لغزش)
+        entry_price = order_info.get('average') or intent.price
+        self._open_position(symbol, entry_price, order_info.get('filled', 0.0),
+                            intent.context.get('regime', ''), intent.context.get('params'))
+
+    def _on_tracked_entry_update(self, tracked: TrackedOrder, is_done: bool):
+        """ (جدید V2.3) - نتیجه نهایی سفارش ورود Live پس از همگام‌سازی گروهی. """
+        if not is_done:
+            return
+        if tracked.filled <= 0:
+            print(f"هشدار: سفارش ورود {tracked.symbol} بدون پر شدن بسته شد.")
+            return
+        self._open_position(tracked.symbol, tracked.cost / tracked.filled, tracked.filled,
+                            tracked.context.get('regime', ''), tracked.context.get('params'))
+
+    def _open_position(self, symbol: str, entry_price: float, filled_coin: float, regime: str = "",
+                       params: Optional[StrategyConfig] = None):
+        """ ساخت پوزیشن پس از پر شدن سفارش ورود. """
+        params = params or strategy_config.current()
+        filled_size_usdt = filled_coin * entry_price
         if filled_size_usdt < 1.0: # حداقل ۱ دلار
-            return None
+            return
             
         # ۳. ساخت Position Object (با پلن خروج V2.0)
-        initial_sl_price = entry_price * (1.0 - INITIAL_SL_PCT)
+        initial_sl_price = entry_price * (1.0 - params.initial_sl_pct)
         
         position = Position(
             symbol=symbol,
-            entry_timestamp=int(time.time()),
+            entry_timestamp=int(clock.time()),
             entry_price_actual=entry_price, 
             initial_size_usdt=filled_size_usdt,
             current_sl_price=initial_sl_price,
             initial_sl_price=initial_sl_price,
-            exit_plan=get_default_exit_plan(), # <--- (مهم: استفاده از پلن خروج V2.0)
-            last_milestone_index=-1 # (مورد نیاز برای پلن V2.0)
+            exit_plan=get_default_exit_plan(params), # <--- (مهم: استفاده از پلن خروج V2.0)
+            last_milestone_index=-1, # (مورد نیاز برای پلن V2.0)
+            entry_regime=regime
         )
         
         # ۴. اجرای ورود در State Manager
-        state_manager.execute_entry(position)
+        if not state_manager.execute_entry(position):
+            return
         
         # ۵. ثبت SL اولیه در صرافی
         # (در Paper Mode، فقط در حافظه ثبت می‌شود)
@@ -80,8 +133,9 @@ class TradingService:
         
         # ۶. ارسال گزارش تلگرام
         telegram_reporter.send_entry_report(position)
-        
-        return position
+
+    def _on_entry_failure(self, intent: OrderIntent, error: Optional[Exception]):
+        print(f"هشدار: سفارش ورود {intent.symbol} شکست خورد: {error}")
 
     def monitor_open_positions(self, symbol: str, current_price: float):
         """
@@ -113,25 +167,37 @@ class TradingService:
         """ (V2.0) - اجرای نهایی Market Sell و آپدیت لاگ ها. """
         
         symbol = position.symbol
+
+        # (V2.3) - اگر سفارش خروج قبلاً ارسال شده، منتظر نتیجه آن می مانیم
+        if order_manager.is_in_flight(symbol):
+            return
         
         # ۱. لغو سفارش SL فعال (اگر در صرافی واقعی بود)
         if symbol in self.active_sl_orders:
             # exchange_client.cancel_order(symbol, self.active_sl_orders[symbol])
             del self.active_sl_orders[symbol]
         
-        # ۲. Market Sell (ارسال سفارش خروج)
-        exit_order = exchange_client.place_order(
+        # ۲. Market Sell (ارسال سفارش خروج) - بدون انتظار برای پاسخ صرافی
+        intent = OrderIntent(
             symbol=symbol,
-            order_type='market',
             side='sell',
+            order_type='market',
             amount_usdt=position.initial_size_usdt, # (V1.6)
-            price=exit_price # (قیمت برای محاسبه amount_coin لازم است)
+            price=exit_price, # (قیمت برای محاسبه amount_coin لازم است)
+            reason=reason,
+            order_book=state_manager.get_order_book(symbol),
+            context={'position': position}
         )
-        
-        if not exit_order:
-             print(f"خطای بحرانی: سفارش خروج {symbol} شکست خورد.")
-             # (در اینجا ربات باید وارد حالت اضطراری شود)
-             return
+        order_manager.submit(intent, self._on_exit_fill, self._on_exit_failure)
+
+    def _on_exit_fill(self, intent: OrderIntent, exit_order: Dict[str, Any]):
+        """ (جدید V2.3) - اعمال نتیجه سفارش خروج (از نخ OrderManager، زیر قفل state). """
+        position: Position = intent.context['position']
+        symbol = position.symbol
+        reason = intent.reason
+
+        # (V2.3) - قیمت واقعی خروج (با احتساب لغزش دفتر سفارش)
+        exit_price = exit_order.get('average') or intent.price
 
         # ۳. محاسبه PnL
         pnl_pct, pnl_usdt = calculate_pnl(position.entry_price_actual, exit_price, position.initial_size_usdt)
@@ -139,12 +205,17 @@ class TradingService:
         
         # ۴. آپدیت بالانس دمو و وضعیت ایمنی
         state_manager.execute_exit(position, pnl_usdt, fees_usdt)
+
+        # (V2.3) - در Safe Mode همه سفارش‌های باز این نماد به صورت گروهی لغو می شوند
+        market_state = state_manager.market_states.get(symbol)
+        if market_state and market_state.safety_mode == MarketSafetyMode.SAFE_MODE:
+            order_tracker.request_cancel(symbol)
         
         # ۵. گزارش و ذخیره سازی
         telegram_reporter.send_exit_report(position, exit_price, pnl_usdt, reason)
         
         trade_log_data = {
-            'timestamp': int(time.time()), 
+            'timestamp': int(clock.time()), 
             'symbol': symbol, 
             'entry_price': position.entry_price_actual, 
             'exit_price': exit_price,
@@ -155,9 +226,21 @@ class TradingService:
             'exit_reason': reason,
             'mode': "Paper",
             'ml_prob': 0.0,
-            'is_ml_active': False
+            'is_ml_active': False,
+            'regime': position.entry_regime
         }
         persistence_service.add_trade_to_queue(trade_log_data)
+
+        # (V2.3) - آمار زنده عملکرد (O(1) برای هر معامله)
+        analytics_service.record_trade(symbol, pnl_usdt - fees_usdt, position.entry_regime)
+
+        if event_bus.wants(ExitEvent):
+            event_bus.publish(ExitEvent(symbol, position.entry_price_actual, exit_price, position.initial_size_usdt,
+                                        pnl_usdt, pnl_pct, reason, position.entry_regime, clock.time()))
+
+    def _on_exit_failure(self, intent: OrderIntent, error: Optional[Exception]):
+        print(f"خطای بحرانی: سفارش خروج {intent.symbol} شکست خورد: {error}")
+        # (در اینجا ربات باید وارد حالت اضطراری شود)
         
 # --- نمونه سازی ---
 trading_service = TradingService()
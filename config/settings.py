@@ -34,6 +34,9 @@ TIME_FRAME: str = "1m"
 CANDLE_BUFFER_SIZE: int = 100 
 VIRTUAL_BALANCE_START: float = 200.0 # (بالانس دمو شما)
 LOG_QUEUE_SIZE: int = 1000 # (مورد نیاز persistence_service)
+# (جدید V2.3) - راه‌اندازی Paper بدون هیچ درخواست شبکه‌ای REST (فقط فید WebSocket)
+OFFLINE_MODE: bool = False
+OFFLINE_SYMBOLS: List[str] = ["btc_usdt", "eth_usdt"]
 
 
 # --- 4. تنظیمات ریسک و مالی (استراتژی V2.0 شما) ---
@@ -50,6 +53,146 @@ TP_STEP_1_SL_LOCK_PCT: float = 0.0045   # 0.45% (مقصد قفل سود)
 # --- 6. تنظیمات ضد اسپم (قانون ۸ ترید شما) ---
 MAX_ENTRIES_PER_MINUTE: int = 8 
 FAST_COOLDOWN_SECONDS: int = 15 
+# (جدید V2.3) - سقف ورود سراسری (همه مارکت‌ها) در دقیقه؛ 0 = غیرفعال
+MAX_GLOBAL_ENTRIES_PER_MINUTE: int = 40
 
 # --- 7. تنظیمات ایمنی (جدید V2.1) ---
 MAX_CONSECUTIVE_LOSSES: int = 3 # (۳ ضرر متوالی)
+
+# --- 8. تنظیمات تایم‌فریم‌های بالاتر (جدید V2.3) ---
+# (از استریم TIME_FRAME به صورت افزایشی ساخته می شوند؛ بدون اشتراک اضافه)
+HIGHER_TIME_FRAMES: List[str] = ["5m", "15m", "1h"]
+HTF_BUFFER_SIZE: int = 100 # (طول بافر حلقوی هر تایم‌فریم)
+HTF_TREND_CONFIRM_TF: str = "" # (مثلاً "15m" برای تأیید روند؛ خالی = غیرفعال)
+
+# --- 9. تنظیمات دفتر سفارش (جدید V2.3) ---
+ORDER_BOOK_ENABLED: bool = False # (اشتراک کانال depth برای هر مارکت فعال)
+ORDER_BOOK_DEPTH: int = 50 # (عمق نگهداری شده: LBank از 10، 50 و 100 پشتیبانی می‌کند)
+MAX_ENTRY_SPREAD_PCT: float = 0.15 # (حداکثر اسپرد مجاز برای ورود، به درصد)
+
+# --- 10. تنظیمات اجرای سفارش (جدید V2.3) ---
+# (در حالت Live سفارش‌ها در ThreadPool ارسال می شوند تا تیک‌ها منتظر REST نمانند)
+ASYNC_ORDER_EXECUTION: bool = not PAPER_MODE
+ORDER_WORKER_THREADS: int = 4
+
+# --- 11. همگام‌سازی سفارش‌های Live (جدید V2.3) ---
+ORDER_SYNC_INTERVAL_SECONDS: int = 10 # (هر چرخه: یک درخواست گروهی open-orders + my-trades)
+
+# --- 12. اجرای چند پروسه‌ای (جدید V2.3) ---
+# (1 = یک پروسه؛ بیشتر از 1 = تقسیم ACTIVE_SYMBOLS بین پروسه‌های شارد با بالانس مرکزی)
+SHARD_PROCESSES: int = 1
+TOP_PAIRS_COUNT: int = 25 # (تعداد مارکت‌های انتخابی توسط pick_top_pairs)
+SHARD_OUTPUT_DIR: str = os.path.join(DATA_DIR, "shards") # (خروجی هر شارد در shard-<id>: لاگ معاملات، تاریخچه، shadow، ضبط فید)
+
+# --- 13. حافظه مشترک (جدید V2.3) ---
+# (بافر کندل و آخرین اندیکاتورها در سگمنت‌های shared memory برای پروسه‌های دیگر)
+SHARED_MEMORY_ENABLED: bool = False
+SHARED_MEMORY_PREFIX: str = "zetabot"
+
+# --- 14. runtime asyncio (جدید V2.3) ---
+# (یک event loop برای WebSocket، REST ccxt و تلگرام؛ بدون نخ جداگانه برای هر I/O)
+ASYNC_RUNTIME: bool = False
+ASYNC_REST_CONCURRENCY: int = 10 # (حداکثر درخواست‌های همزمان REST در warm-up)
+
+# --- 15. آمار عملکرد و خلاصه روزانه (جدید V2.3) ---
+# (ارسال روی ROUTE_DAILY_SUMMARY، یک بار در روز پس از این ساعت UTC)
+DAILY_SUMMARY_ENABLED: bool = True
+DAILY_SUMMARY_HOUR_UTC: int = 0
+
+# --- 16. تاریخچه ستونی معاملات و تصمیم‌ها (جدید V2.3) ---
+# (علاوه بر trades.csv؛ پارتیشن روزانه، یک فایل خام برای هر ستون)
+HISTORY_EXPORT_ENABLED: bool = True
+HISTORY_DIR: str = os.path.join(DATA_DIR, "history")
+
+# --- 17. ضبط فید خام WebSocket (جدید V2.3) ---
+# (پیام‌های خام + زمان دریافت در سگمنت‌های فشرده با ایندکس زمانی؛ برای بازپخش)
+TICK_RECORDER_ENABLED: bool = False
+TICK_RECORDER_DIR: str = os.path.join(DATA_DIR, "ticks")
+TICK_RECORDER_QUEUE_SIZE: int = 200000 # (حداکثر پیام‌های در انتظار نوشتن؛ بیشتر = دور ریخته می شود)
+TICK_SEGMENT_MAX_MB: int = 64          # (اندازه هر سگمنت قبل از چرخش)
+TICK_BLOCK_MAX_MESSAGES: int = 2000    # (پیام‌های هر بلوک فشرده = دقت ایندکس زمانی)
+
+# --- 18. سرور وضعیت محلی (جدید V2.3) ---
+# (اسنپ‌شات JSON پوزیشن‌ها، بالانس، حالت‌های ایمنی و اندیکاتورها؛ فقط روی localhost)
+STATUS_HTTP_ENABLED: bool = False
+STATUS_HTTP_HOST: str = "127.0.0.1"
+STATUS_HTTP_PORT: int = 8765
+STATUS_PUBLISH_INTERVAL_SECONDS: float = 1.0 # (حداکثر نرخ ساخت اسنپ‌شات)
+
+# --- 19. فیلتر ارزیابی سیگنال (جدید V2.3) ---
+# ("every_update" | "candle_close" | "price_change" | "max_rate")
+# (بررسی SL/TP پوزیشن‌های باز همیشه روی هر به‌روزرسانی قیمت انجام می شود)
+SIGNAL_EVAL_MODE: str = "price_change"
+SIGNAL_EVAL_MIN_CHANGE_PCT: float = 0.02   # (برای price_change؛ درصد تغییر نسبت به آخرین ارزیابی)
+SIGNAL_EVAL_MIN_INTERVAL_SECONDS: float = 1.0 # (برای max_rate؛ فاصله حداقل بین دو ارزیابی یک نماد)
+
+# --- 20. ریسک همبستگی سبد (جدید V2.3) ---
+# (ماتریس همبستگی بازده کندل‌ها؛ سقف مجموع اکسپوژر همبسته برای ورود جدید)
+CORRELATION_RISK_ENABLED: bool = True
+CORRELATION_HALFLIFE_CANDLES: int = 60     # (نیمه‌عمر وزن‌دهی EWMA بر حسب کندل)
+CORRELATION_MIN_SAMPLES: int = 30          # (تا این تعداد کندل محدودیتی اعمال نمی شود)
+MAX_CORRELATED_EXPOSURE_USDT: float = 12.0 # (Σ حجم پوزیشن‌ها × همبستگی، شامل ورود جدید)
+
+# --- 21. اسکنر مارکت‌ها (جدید V2.3) ---
+# (امتیازدهی همه مارکت‌های USDT با نوسان اخیر، اسپرد و قدرت روند کندل‌ها)
+MARKET_SCANNER_ENABLED: bool = True
+SCANNER_TIMEFRAME: str = "5m"
+SCANNER_CANDLES: int = 48               # (۴ ساعت اخیر در تایم‌فریم 5m)
+SCANNER_CONCURRENCY: int = 8            # (حداکثر درخواست‌های همزمان OHLCV)
+SCANNER_MIN_REQUEST_INTERVAL: float = 0.06 # (فاصله حداقل بین درخواست‌ها؛ ~16 درخواست در ثانیه)
+SCANNER_CACHE_TTL_SECONDS: int = 300    # (کندل‌های کش شده تا این مدت دوباره دریافت نمی شوند)
+
+# --- 22. پارامترهای قابل بارگذاری مجدد استراتژی (جدید V2.3) ---
+# (فایل JSON با کلیدهای config/strategy_config.StrategyConfig؛ فقط کلیدهای موجود در فایل
+#  جایگزین پیش‌فرض‌ها می شوند. تغییر فایل در حلقه زمان‌بندی شده تشخیص داده شده و بدون ری‌استارت اعمال می شود)
+STRATEGY_PARAMS_FILE: str = os.path.join(DATA_DIR, "strategy_params.json")
+
+# --- 23. بودجه تأخیر و Circuit Breaker درخواست‌های خواندنی REST (جدید V2.3) ---
+# (fetch_price / fetch_candles: بعد از بودجه، فراخوان منتظر نمی ماند؛ پس از چند خطای متوالی
+#  مدار باز شده و درخواست‌ها تا پایان CIRCUIT_RESET_SECONDS بلافاصله رد می شوند)
+FETCH_PRICE_BUDGET_SECONDS: float = 1.5
+FETCH_CANDLES_BUDGET_SECONDS: float = 4.0
+HEDGED_READS_ENABLED: bool = True           # (درخواست تکراری برای خواندن‌های idempotent)
+FETCH_PRICE_HEDGE_AFTER_SECONDS: float = 0.5   # (اگر پاسخ اول تا این زمان نرسد، درخواست دوم ارسال می شود)
+FETCH_CANDLES_HEDGE_AFTER_SECONDS: float = 1.5
+CIRCUIT_FAILURE_THRESHOLD: int = 5          # (خطا/تایم‌اوت متوالی تا باز شدن مدار)
+CIRCUIT_RESET_SECONDS: float = 30.0         # (پس از این مدت یک درخواست آزمایشی ارسال می شود)
+EXCHANGE_CALL_WORKERS: int = 8              # (نخ‌های اجرای درخواست‌های محافظت‌شده)
+
+# --- 24. کش متادیتای مارکت‌ها (جدید V2.3) ---
+# (خروجی load_markets روی دیسک؛ تا پایان TTL راه‌اندازی بدون load_markets انجام می شود.
+#  دقت، حداقل مقدار/ارزش و گام هر مارکت برای گرد کردن و اعتبارسنجی سفارش‌ها)
+MARKET_CACHE_FILE: str = os.path.join(DATA_DIR, "markets_cache.json")
+MARKET_CACHE_TTL_SECONDS: int = 6 * 3600
+
+# --- 25. پروفایلر نمونه‌برداری (جدید V2.3) ---
+# (روشن/خاموش با سیگنال SIGUSR1 یا دستور محلی POST /admin/profiler/start|stop روی سرور وضعیت)
+PROFILER_SIGNAL_ENABLED: bool = True
+PROFILER_INTERVAL_MS: float = 10.0       # (فاصله نمونه‌برداری پشته‌ها)
+PROFILER_MAX_SECONDS: int = 300          # (توقف خودکار در صورت فراموش شدن)
+PROFILER_MAX_DEPTH: int = 64             # (حداکثر عمق هر پشته)
+PROFILER_TRACEMALLOC: bool = False       # (پیش‌فرض اسنپ‌شات حافظه؛ سربار قابل توجه دارد)
+PROFILER_OUTPUT_DIR: str = os.path.join(DATA_DIR, "profiles")
+
+# --- 26. استراتژی‌های سایه (جدید V2.3) ---
+# (نسخه‌های آزمایشی استراتژی روی همان فید و اندیکاتورها، با بالانس، پوزیشن‌ها و لاگ معاملات جدا؛ بدون سفارش واقعی)
+# (فایل JSON: {"نام نسخه": {کلیدهای StrategyConfig}, ...})
+SHADOW_STRATEGIES_ENABLED: bool = False
+SHADOW_STRATEGIES_FILE: str = os.path.join(DATA_DIR, "shadow_strategies.json")
+SHADOW_TRADE_LOG_DIR: str = os.path.join(DATA_DIR, "shadow")
+
+# --- 27. گذرگاه رویداد داخلی (جدید V2.3) ---
+# (رویدادهای تایپ‌شده kbar/اندیکاتور/سیگنال/سفارش/پر شدن/خروج/ایمنی بین مراحل خط لوله؛
+#  هر مشترک صف محدود و نخ تحویل خودش را دارد تا مصرف‌کننده کند تولیدکننده را متوقف نکند)
+EVENT_BUS_QUEUE_SIZE: int = 2048            # (ظرفیت پیش‌فرض صف هر مشترک)
+EVENT_BUS_BATCH_SIZE: int = 64              # (حداکثر رویداد در هر تحویل به handler)
+EVENT_BUS_BLOCK_TIMEOUT_SECONDS: float = 0.05 # (سیاست block: حداکثر انتظار تولیدکننده، سپس رد رویداد)
+
+# --- 28. پایش تازگی فید و تأخیر صرافی (جدید V2.3) ---
+# (زمان آخرین kbar هر نماد، هیستوگرام تأخیر TS صرافی تا دریافت محلی و RTT ضربان ping/pong؛
+#  نمادی که بیش از FEED_STALE_SECONDS kbar دریافت نکند تا FEED_RECOVERY_SECONDS پس از بازگشت فید ورود جدید نمی گیرد)
+FEED_STALE_SECONDS: float = 90.0           # (۱.۵ کندل 1m بدون هیچ به‌روزرسانی)
+FEED_SWEEP_INTERVAL_SECONDS: float = 1.0   # (فاصله بررسی یکجای همه نمادها)
+FEED_RECOVERY_SECONDS: float = 60.0        # (بافر پس از وقفه ناقص است؛ حداقل یک کندل کامل تازه)
+FEED_HEARTBEAT_INTERVAL_SECONDS: float = 15.0 # (ارسال ping کلاینت برای اندازه‌گیری RTT)
+FEED_TS_UTC_OFFSET_HOURS: float = 0.0      # (اختلاف برچسب TS پیام‌های صرافی با UTC)
@@ -0,0 +1,179 @@
+#
+# ------------------------------------------------------------
+# فایل: config/strategy_config.py
+# (جدید V2.3 - اسنپ‌شات‌های تغییرناپذیر پارامترهای استراتژی/ریسک با بارگذاری مجدد اتمی)
+# ------------------------------------------------------------
+#
+
+import json
+import os
+import threading
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import (
+    INITIAL_POSITION_SIZE_USDT, INITIAL_SL_PCT, FRICTION_COST_PCT,
+    FINAL_TP_PCT, RISK_FREE_TRIGGER_PCT, TP_STEP_1_TRIGGER_PCT, TP_STEP_1_SL_LOCK_PCT,
+    MAX_ENTRY_SPREAD_PCT, STRATEGY_PARAMS_FILE
+)
+
+
+@dataclass(frozen=True)
+class StrategyConfig:
+    """
+    پارامترهای قابل تنظیم استراتژی و ریسک (یک نسخه ثابت).
+    هر تیک یک بار current() را می خواند و همان نسخه را به همه توابع دامنه می دهد،
+    بنابراین یک تیک هیچ‌وقت ترکیبی از مقادیر قدیم و جدید نمی بیند.
+    """
+
+    # --- ورود: تشخیص رژیم (از domain/entry_policy منتقل شد) ---
+    trend_ema_distance_pct: float = 0.5   # اختلاف EMA به درصد، برای تشخیص Range/Trend
+    range_max_atr_pct: float = 2.0        # زیر این، بازار می‌تونه Range باشد
+    trend_min_atr_pct: float = 0.5        # بالاتر از این، بیشتر شبیه Trend است
+    min_atr_pct: float = 0.2              # فیلتر اولیه ATR
+    max_atr_pct: float = 5.0
+
+    # --- ورود: فیلتر RSI و باند بولینگر ---
+    rsi_trend_min: float = 45.0
+    rsi_trend_max: float = 68.0
+    rsi_range_min: float = 30.0
+    range_bb_tolerance_pct: float = 0.3   # حداکثر فاصله قیمت از باند پایین در Range (درصد)
+
+    # --- ریسک و خروج (پیش‌فرض از config/settings) ---
+    position_size_usdt: float = INITIAL_POSITION_SIZE_USDT
+    initial_sl_pct: float = INITIAL_SL_PCT
+    friction_cost_pct: float = FRICTION_COST_PCT
+    final_tp_pct: float = FINAL_TP_PCT
+    risk_free_trigger_pct: float = RISK_FREE_TRIGGER_PCT
+    tp_step_1_trigger_pct: float = TP_STEP_1_TRIGGER_PCT
+    tp_step_1_sl_lock_pct: float = TP_STEP_1_SL_LOCK_PCT
+    max_entry_spread_pct: float = MAX_ENTRY_SPREAD_PCT
+
+    # --- متادیتا (از فایل خوانده نمی شود) ---
+    version: int = 0
+    source: str = "defaults"
+
+    def validate(self) -> List[str]:
+        """ لیست خطاها (خالی = معتبر). """
+        errors = []
+        for f in fields(self):
+            if f.name in _META_FIELDS:
+                continue
+            if getattr(self, f.name) < 0:
+                errors.append(f"{f.name} نباید منفی باشد")
+        if not 0 <= self.rsi_range_min <= 100 or not 0 <= self.rsi_trend_min < self.rsi_trend_max <= 100:
+            errors.append("محدوده RSI نامعتبر است (0 <= rsi_trend_min < rsi_trend_max <= 100)")
+        if self.min_atr_pct >= self.max_atr_pct:
+            errors.append("min_atr_pct باید کمتر از max_atr_pct باشد")
+        if self.position_size_usdt < 1.0:
+            errors.append("position_size_usdt باید حداقل 1 USDT باشد")
+        if not 0 < self.initial_sl_pct < 1:
+            errors.append("initial_sl_pct باید بین 0 و 1 باشد")
+        if not self.risk_free_trigger_pct < self.tp_step_1_trigger_pct < self.final_tp_pct:
+            errors.append("ترتیب ماشه‌ها نامعتبر است (risk_free < tp_step_1 < final_tp)")
+        if self.tp_step_1_sl_lock_pct >= self.tp_step_1_trigger_pct:
+            errors.append("tp_step_1_sl_lock_pct باید کمتر از tp_step_1_trigger_pct باشد")
+        if self.friction_cost_pct >= self.risk_free_trigger_pct:
+            errors.append("friction_cost_pct باید کمتر از risk_free_trigger_pct باشد")
+        return errors
+
+
+_META_FIELDS = ("version", "source")
+_TUNABLE_FIELDS = {f.name: f.type for f in fields(StrategyConfig) if f.name not in _META_FIELDS}
+
+
+def parse_overrides(raw: Any) -> Tuple[Dict[str, float], List[str]]:
+    """ بررسی ساختار فایل: فقط کلیدهای شناخته شده با مقدار عددی. """
+    if not isinstance(raw, dict):
+        return {}, ["فایل پارامترها باید یک آبجکت JSON باشد"]
+    overrides, errors = {}, []
+    for key, value in raw.items():
+        if key not in _TUNABLE_FIELDS:
+            errors.append(f"کلید ناشناخته: {key}")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            errors.append(f"{key} باید عدد باشد")
+        else:
+            overrides[key] = float(value)
+    return overrides, errors
+
+
+def build_config(overrides: Dict[str, float], version: int = 0,
+                 source: str = "defaults") -> Tuple[Optional[StrategyConfig], List[str]]:
+    """ پیش‌فرض‌ها + overrides و اعتبارسنجی. خروجی: (نسخه، []) یا (None، خطاها). """
+    try:
+        candidate = replace(StrategyConfig(), version=version, source=source, **overrides)
+    except TypeError as e:
+        return None, [str(e)]
+    errors = candidate.validate()
+    return (None, errors) if errors else (candidate, [])
+
+
+class StrategyConfigStore:
+    """
+    نگهدارنده اسنپ‌شات جاری. جایگزینی فقط یک انتساب مرجع است (اتمی در CPython)؛
+    خواننده‌ها قفلی نمی گیرند. فایل نامعتبر هیچ اثری ندارد و نسخه قبلی فعال می ماند.
+    """
+
+    def __init__(self, path: str = STRATEGY_PARAMS_FILE):
+        self.path = path
+        self._current = StrategyConfig()
+        self._reload_lock = threading.Lock()  # (فقط بین بارگذاری‌ها؛ نه برای خواننده‌ها)
+        self._file_stamp: Optional[Tuple[int, int]] = None  # (mtime_ns، اندازه) آخرین فایل بررسی شده
+        self.last_error: Optional[str] = None
+
+    def current(self) -> StrategyConfig:
+        return self._current
+
+    def load_overrides(self, overrides: Dict[str, float], source: str) -> bool:
+        """ ساخت نسخه جدید از پیش‌فرض‌ها + overrides، اعتبارسنجی و جایگزینی اتمی. """
+        with self._reload_lock:
+            old = self._current
+            candidate, errors = build_config(overrides, old.version + 1, source)
+            if errors:
+                self.last_error = "؛ ".join(errors)
+                print(f"❌ پارامترهای استراتژی ({source}) رد شد و نسخه {old.version} فعال ماند: {self.last_error}")
+                return False
+
+            changed = [
+                f"{name}: {getattr(old, name)} → {getattr(candidate, name)}"
+                for name in _TUNABLE_FIELDS if getattr(old, name) != getattr(candidate, name)
+            ]
+            self._current = candidate
+            self.last_error = None
+        print(f"✅ پارامترهای استراتژی نسخه {candidate.version} فعال شد"
+              + (f" ({', '.join(changed)})" if changed else " (بدون تغییر)"))
+        return True
+
+    def reload(self) -> bool:
+        """ خواندن دوباره فایل پارامترها (در صورت نبود فایل، پیش‌فرض‌ها حفظ می شوند). """
+        try:
+            stat = os.stat(self.path)
+            self._file_stamp = (stat.st_mtime_ns, stat.st_size)
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            self.last_error = str(e)
+            print(f"❌ خطای خواندن {self.path}: {e}")
+            return False
+
+        overrides, errors = parse_overrides(raw)
+        if errors:
+            self.last_error = "؛ ".join(errors)
+            print(f"❌ پارامترهای استراتژی ({self.path}) رد شد: {self.last_error}")
+            return False
+        return self.load_overrides(overrides, self.path)
+
+    def reload_if_changed(self) -> bool:
+        """ از حلقه زمان‌بندی شده؛ در حالت عادی فقط یک stat است. """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        if (stat.st_mtime_ns, stat.st_size) == self._file_stamp:
+            return False
+        return self.reload()
+
+# --- نمونه سازی ---
+strategy_config = StrategyConfigStore()
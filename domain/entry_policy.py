@@ -10,28 +10,16 @@ from typing import Optional, List, Dict
 # from domain.models import MarketState, Position
 # from config.settings import INITIAL_POSITION_SIZE_USDT
 
-# --- مقادیر ثابت استراتژی ---
-
-# اختلاف EMA به درصد، برای تشخیص Range/Trend
-TREND_EMA_DISTANCE_PCT = 0.5   # قبلاً 0.10 بود، خیلی ریز بود
-
-# فیلتر RSI در حالت Trend
-RSI_TREND_MIN = 45.0
-RSI_TREND_MAX = 68.0
-
-# حد پایین RSI برای Range
-RSI_RANGE_MIN = 30.0
-
-# فیلتر ATR برای تشخیص Range/Trend (به درصد)
-RANGE_MAX_ATR_PCT = 2.0        # زیر این، بازار می‌تونه Range باشد
-TREND_MIN_ATR_PCT = 0.5        # بالاتر از این، بیشتر شبیه Trend است
+# (V2.3) - مقادیر ثابت استراتژی به config/strategy_config.StrategyConfig منتقل شدند
+# و هر تیک یک نسخه ثابت از آن‌ها (params) به توابع این فایل داده می شود.
+from config.strategy_config import StrategyConfig, strategy_config
 
 
 class MarketMode:
     TREND = 1
     RANGE = 2
 
-def _check_market_regime(atr_pct: float, indicators: dict, current_price: float) -> MarketMode:
+def _check_market_regime(atr_pct: float, indicators: dict, current_price: float, params: StrategyConfig) -> MarketMode:
     """
     تعیین رژیم بازار (Trend یا Range) با ترکیب EMA و ATR.
     """
@@ -46,16 +34,24 @@ def _check_market_regime(atr_pct: float, indicators: dict, current_price: float)
     ema_distance_pct = abs(ema8 - ema21) / ema21 * 100.0
 
     # ۱) اگر ATR کم و فاصله EMA هم کم باشد → Range
-    if atr_pct < RANGE_MAX_ATR_PCT and ema_distance_pct < TREND_EMA_DISTANCE_PCT:
+    if atr_pct < params.range_max_atr_pct and ema_distance_pct < params.trend_ema_distance_pct:
         return MarketMode.RANGE
 
     # ۲) اگر ATR و فاصله EMA هر دو بالاتر از حداقل ترند باشند → Trend
-    if atr_pct >= TREND_MIN_ATR_PCT and ema_distance_pct >= TREND_EMA_DISTANCE_PCT:
+    if atr_pct >= params.trend_min_atr_pct and ema_distance_pct >= params.trend_ema_distance_pct:
         return MarketMode.TREND
 
     # ۳) بقیه حالت‌ها: محافظه‌کارانه Trend
     return MarketMode.TREND
-def _evaluate_trend_entry(current_price: float, indicators: dict) -> bool:
+
+def classify_market_regime(indicators: Dict[str, float], current_price: float,
+                           params: Optional[StrategyConfig] = None) -> str:
+    """ (V2.3) - نام رژیم بازار ('TREND' / 'RANGE') برای آمار عملکرد. """
+    params = params or strategy_config.current()
+    regime = _check_market_regime(indicators.get("ATR_PCT", 0.0), indicators, current_price, params)
+    return "RANGE" if regime == MarketMode.RANGE else "TREND"
+
+def _evaluate_trend_entry(current_price: float, indicators: dict, params: StrategyConfig) -> bool:
     """ 
     (V2.0) منطق ورود در حالت روند (Trend).
     """
@@ -68,7 +64,7 @@ def _evaluate_trend_entry(current_price: float, indicators: dict) -> bool:
         return False
         
     # 2. فیلتر RSI: در محدوده مناسب باشد (نه اشباع)
-    if rsi14 < RSI_TREND_MIN or rsi14 > RSI_TREND_MAX:
+    if rsi14 < params.rsi_trend_min or rsi14 > params.rsi_trend_max:
         return False
         
     # 3. ماشه لحظه‌ای (Trigger): قیمت لحظه‌ای باید بالای EMA8 باشد
@@ -77,7 +73,7 @@ def _evaluate_trend_entry(current_price: float, indicators: dict) -> bool:
     
     return True
 
-def _evaluate_range_entry(current_price: float, indicators: dict) -> bool:
+def _evaluate_range_entry(current_price: float, indicators: dict, params: StrategyConfig) -> bool:
     """
     منطق ورود در حالت رنج (Range).
     """
@@ -88,12 +84,12 @@ def _evaluate_range_entry(current_price: float, indicators: dict) -> bool:
         return False  # اندیکاتور آماده نیست
 
     # ۱. قیمت باید نزدیک باند پایین باشد (نه فقط 0.05%)
-    # 0.3% بالاتر از باند پایین را قبول می‌کنیم
-    if current_price > bb_lower * 1.003:
+    # تا range_bb_tolerance_pct (پیش‌فرض 0.3%) بالاتر از باند پایین را قبول می‌کنیم
+    if current_price > bb_lower * (1.0 + params.range_bb_tolerance_pct / 100.0):
         return False
 
     # ۲. RSI باید واقعا ناحیه اشباع فروش باشد
-    if rsi14 >= RSI_RANGE_MIN:
+    if rsi14 >= params.rsi_range_min:
         return False
 
     return True
@@ -103,39 +99,65 @@ def get_final_signal(
     current_price: float,
     indicators: Dict[str, float],
     candles: Optional[List[dict]] = None,
+    params: Optional[StrategyConfig] = None,
+    debug: bool = True,
 ) -> Optional[str]:
-    
+    """
+    (V2.3) - params: اسنپ‌شات پارامترهای همین تیک (پیش‌فرض: نسخه جاری).
+    (V2.3) - debug=False برای ارزیابی‌های پرتعداد (استراتژی‌های سایه) بدون چاپ لاگ.
+    """
+    params = params or strategy_config.current()
+
     # --- Debug: وضعیت فعلی اندیکاتورها ---
     atr_pct = indicators.get("ATR_PCT", 0.0)
-    print(f"[DEBUG] Price={current_price:.2f}, "
-          f"ATR_PCT={atr_pct:.2f}, "
-          f"RSI={indicators.get('RSI14')}, "
-          f"EMA8={indicators.get('EMA8')}, "
-          f"EMA21={indicators.get('EMA21')}")
+    if debug:
+        print(f"[DEBUG] Price={current_price:.2f}, "
+              f"ATR_PCT={atr_pct:.2f}, "
+              f"RSI={indicators.get('RSI14')}, "
+              f"EMA8={indicators.get('EMA8')}, "
+              f"EMA21={indicators.get('EMA21')}")
     
     # --- فیلتر اولیه ATR ---
-    MIN_ATR_PCT = 0.2
-    MAX_ATR_PCT = 5.0
-    if atr_pct < MIN_ATR_PCT or atr_pct > MAX_ATR_PCT:
-        print("[DEBUG] ATR filter blocked entry")
+    if atr_pct < params.min_atr_pct or atr_pct > params.max_atr_pct:
+        if debug:
+            print("[DEBUG] ATR filter blocked entry")
         return None
 
     # --- تشخیص Trend / Range ---
-    regime = _check_market_regime(atr_pct, indicators, current_price)
-    print(f"[DEBUG] MarketRegime={regime}")
+    regime = _check_market_regime(atr_pct, indicators, current_price, params)
+    if debug:
+        print(f"[DEBUG] MarketRegime={regime}")
 
     # --- منطق ورود بر اساس رژیم ---
     if regime == MarketMode.TREND:
-        entry_ok = _evaluate_trend_entry(current_price, indicators)
-        print(f"[DEBUG] TrendEntryOK={entry_ok}")
+        entry_ok = _evaluate_trend_entry(current_price, indicators, params)
+        if debug:
+            print(f"[DEBUG] TrendEntryOK={entry_ok}")
     else:
-        entry_ok = _evaluate_range_entry(current_price, indicators)
-        print(f"[DEBUG] RangeEntryOK={entry_ok}")
+        entry_ok = _evaluate_range_entry(current_price, indicators, params)
+        if debug:
+            print(f"[DEBUG] RangeEntryOK={entry_ok}")
 
     if not entry_ok:
-        print("[DEBUG] Entry rejected by regime rules")
+        if debug:
+            print("[DEBUG] Entry rejected by regime rules")
         return None
 
     # --- سیگنال نهایی ---
-    print("[DEBUG] FINAL_SIGNAL = BUY")
+    if debug:
+        print("[DEBUG] FINAL_SIGNAL = BUY")
     return "BUY"
+
+
+def confirm_higher_timeframe_trend(htf_indicators: Dict[str, float]) -> bool:
+    """
+    (جدید V2.3) تأیید روند صعودی در تایم‌فریم بالاتر (EMA8 > EMA21).
+    تا زمانی که داده کافی برای تایم‌فریم بالا جمع نشده، ورود مسدود نمی‌شود.
+    """
+    ema8 = htf_indicators.get("EMA8", 0.0)
+    ema21 = htf_indicators.get("EMA21", 0.0)
+
+    if ema8 == 0.0 or ema21 == 0.0:
+        return True
+
+    return ema8 > ema21
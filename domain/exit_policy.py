@@ -4,57 +4,70 @@
 # (V2.0.1 - اصلاح خطای تایپی NameError 'ProgresssiveSLStep')
 # ------------------------------------------------------------
 #
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Tuple, Optional, List
-from config.settings import (
-    INITIAL_SL_PCT, # 1.0%
-    RISK_FREE_TRIGGER_PCT, # 0.45%
-    TP_STEP_1_TRIGGER_PCT, # 0.90%
-    TP_STEP_1_SL_LOCK_PCT, # 0.45%
-    FINAL_TP_PCT, # 1.5%
-    FRICTION_COST_PCT # هزینه کارمزد برای Breakeven
-)
+# (V2.3) - درصدهای خروج از اسنپ‌شات پارامترهای استراتژی خوانده می شوند
+# (پیش‌فرض‌ها همان مقادیر config/settings هستند)
+from config.strategy_config import StrategyConfig, strategy_config
 from domain.models import Position
 
 # --- (این کلاس‌ها برای تعریف پلن خروج مورد نیاز است) ---
+# (V2.3) - پلن‌ها تغییرناپذیر (frozen + slots) هستند و یک نمونه بین همه پوزیشن‌هایی که
+# با پارامترهای یکسان باز شده‌اند مشترک است؛ وضعیت هر پوزیشن فقط در Position نگهداری می شود.
+
+@dataclass(frozen=True, slots=True)
 class ProgressiveSLStep:
     """ تعریف یک مرحله در پلن «قفل سود پله‌ای» """
-    def __init__(self, trigger_at_pct: float, move_sl_to_pct: float, is_breakeven: bool = False):
-        self.trigger_at_pct = trigger_at_pct
-        self.move_sl_to_pct = move_sl_to_pct
-        self.is_breakeven = is_breakeven
+    trigger_at_pct: float
+    move_sl_to_pct: float
+    is_breakeven: bool = False
 
+@dataclass(frozen=True, slots=True)
 class ExitPlan:
     """ پلن کامل خروج """
     # --- (اصلاحیه V2.0.1) ---
     # خطای تایپی در 'ProgresssiveSLStep' اصلاح شد
-    def __init__(self, final_tp_pct: float, progressive_sl_plan: List[ProgressiveSLStep]):
-        self.final_tp_pct = final_tp_pct
-        self.progressive_sl_plan = progressive_sl_plan
+    final_tp_pct: float
+    progressive_sl_plan: Tuple[ProgressiveSLStep, ...]
+    friction_cost_pct: float = 0.0 # (V2.3) هزینه کارمزد برای Breakeven همین پلن
     # --- (پایان اصلاحیه) ---
 
 # --- (تابع ساخت پلن خروج پیش‌فرض شما) ---
-def get_default_exit_plan() -> ExitPlan:
+def get_default_exit_plan(params: Optional[StrategyConfig] = None) -> ExitPlan:
     """
     ایجاد پلن خروج ثابت (1:1.5) شما.
+    (V2.3) - پلن در لحظه ورود از params ساخته می شود؛ تغییر بعدی پارامترها
+    پوزیشن‌های باز را تغییر نمی دهد. برای پارامترهای یکسان همان نمونه برگردانده می شود.
     """
+    params = params or strategy_config.current()
+    return _build_exit_plan(
+        params.final_tp_pct, params.risk_free_trigger_pct, params.tp_step_1_trigger_pct,
+        params.tp_step_1_sl_lock_pct, params.friction_cost_pct
+    )
+
+@lru_cache(maxsize=64)
+def _build_exit_plan(final_tp_pct: float, risk_free_trigger_pct: float, tp_step_1_trigger_pct: float,
+                     tp_step_1_sl_lock_pct: float, friction_cost_pct: float) -> ExitPlan:
     
     # Trigger 1: ریسک-فری (ماشه در 0.45%)
     risk_free_step = ProgressiveSLStep(
-        trigger_at_pct=RISK_FREE_TRIGGER_PCT, # 0.45%
+        trigger_at_pct=risk_free_trigger_pct, # 0.45%
         move_sl_to_pct=0.0, 
         is_breakeven=True # SL به نقطه ورود + هزینه ها (Breakeven) می رود
     )
     
     # Trigger 2: قفل سود (ماشه در 0.90%)
     milestone_1_lock = ProgressiveSLStep(
-        trigger_at_pct=TP_STEP_1_TRIGGER_PCT, # 0.90%
-        move_sl_to_pct=TP_STEP_1_SL_LOCK_PCT, # SL به 0.45% منتقل می شود
+        trigger_at_pct=tp_step_1_trigger_pct, # 0.90%
+        move_sl_to_pct=tp_step_1_sl_lock_pct, # SL به 0.45% منتقل می شود
         is_breakeven=False
     )
     
     return ExitPlan(
-        final_tp_pct=FINAL_TP_PCT, # 1.5%
-        progressive_sl_plan=[risk_free_step, milestone_1_lock]
+        final_tp_pct=final_tp_pct, # 1.5%
+        progressive_sl_plan=(risk_free_step, milestone_1_lock),
+        friction_cost_pct=friction_cost_pct
     )
 
 # --- (توابع کمکی محاسبه قیمت) ---
@@ -63,9 +76,9 @@ def _calculate_price_from_pct(entry_price: float, target_pct: float) -> float:
     """ قیمت SL یا TP را بر اساس درصد محاسبه می کند. """
     return entry_price * (1.0 + target_pct)
 
-def _get_risk_free_price(entry_price: float) -> float:
+def _get_risk_free_price(entry_price: float, friction_cost_pct: float) -> float:
     """ قیمت دقیق ریسک-فری (Breakeven + Friction) را محاسبه می کند. """
-    return entry_price * (1.0 + FRICTION_COST_PCT)
+    return entry_price * (1.0 + friction_cost_pct)
 
 # --- (منطق اصلی مانیتورینگ خروج) ---
 
@@ -86,7 +99,7 @@ def check_sl_progression(position: Position, current_price: float) -> Optional[f
         if current_price >= trigger_price:
             
             if step.is_breakeven:
-                new_sl_price = _get_risk_free_price(position.entry_price_actual)
+                new_sl_price = _get_risk_free_price(position.entry_price_actual, plan.friction_cost_pct)
             else:
                 new_sl_price = _calculate_price_from_pct(position.entry_price_actual, step.move_sl_to_pct)
 
@@ -7,7 +7,7 @@
 
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import List
+from typing import List, Optional, Any, Dict
 
 # --- ۱. برچسب‌های وضعیت ---
 
@@ -17,18 +17,39 @@ class MarketSafetyMode(Enum):
     SAFE_MODE = auto()      # متوقف شده (مثلاً ۳ ضرر متوالی)
     COOLDOWN = auto()       # استراحت کوتاه (مثلاً ۱۵ ثانیه ضد اسپم)
 
+# (V2.3) - مدل‌های پرتعداد با slots=True: بدون __dict__ برای هر نمونه
+# (حافظه کمتر برای هزاران پوزیشن شبیه‌سازی شده؛ افزودن فیلد ناشناخته خطا می دهد)
+
 # --- ۲. دفتر حساب مجازی ---
 
-@dataclass
+@dataclass(slots=True)
 class VirtualBalance:
     """ مدیریت بالانس ۲۰۰ دلاری مجازی برای Paper Trading """
     total_balance: float      # موجودی کل (با احتساب سود/ضرر)
     available_balance: float  # موجودی در دسترس برای معاملات جدید
     in_use_balance: float     # مجموع پول درگیر در معاملات باز
 
+    # (جدید V2.3) - عملیات بالانس (مشترک بین StateManager و هماهنگ‌کننده شاردها)
+    def can_fund(self, size_usdt: float) -> bool:
+        return size_usdt <= self.available_balance
+
+    def reserve(self, size_usdt: float) -> bool:
+        """ رزرو بودجه برای ورود؛ اگر بودجه کافی نباشد False. """
+        if size_usdt > self.available_balance:
+            return False
+        self.available_balance -= size_usdt
+        self.in_use_balance += size_usdt
+        return True
+
+    def release(self, size_usdt: float, net_pnl_usdt: float):
+        """ آزادسازی بودجه پس از خروج به همراه سود/زیان خالص. """
+        self.in_use_balance -= size_usdt
+        self.total_balance += net_pnl_usdt
+        self.available_balance += size_usdt + net_pnl_usdt
+
 # --- ۳. فرم معامله باز ---
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     """ نگهدارنده وضعیت کامل یک پوزیشن باز و فعال """
     symbol: str
@@ -38,14 +59,16 @@ class Position:
     
     # بخش حیاتی مدیریت خروج (قفل سود پله‌ای)
     current_sl_price: float     # قیمت SL فعلی (که متحرک است)
-    final_tp_price: float       # قیمت حد سود نهایی (مثلاً +۱.۵٪)
+    initial_sl_price: float     # قیمت SL اولیه (در لحظه ورود)
+    exit_plan: Any              # پلن خروج (domain.exit_policy.ExitPlan تغییرناپذیر؛ بین پوزیشن‌ها مشترک است)
     
     # متادیتای مدیریت (برای جلوگیری از تکرار اقدامات)
     last_milestone_index: int = -1 # آخرین پله‌ای که SL به آنجا جابجا شده است
+    entry_regime: str = ""         # (V2.3) رژیم بازار در لحظه ورود (برای آمار عملکرد)
 
 # --- ۴. وضعیت مارکت ---
 
-@dataclass
+@dataclass(slots=True)
 class MarketState:
     """
     نگهدارنده وضعیت کلی هر نماد در ربات
@@ -54,5 +77,102 @@ class MarketState:
     safety_mode: MarketSafetyMode = MarketSafetyMode.ACTIVE
     consecutive_losses: int = 0         # برای محاسبه ۳ ضرر متوالی
     
-    # لیست زمان ورودها (برای قانون ضد اسپم ۸ ترید در دقیقه)
-    entry_timestamps: List[int] = field(default_factory=list)
+    # زمان آخرین رویداد ایمنی (Safe Mode / Cooldown) برای گزارش‌ها
+    # (V2.3 - زمان ورودها برای قانون ضد اسپم در state_manager.entry_limiter نگهداری می شود)
+    last_safety_event_time: int = 0
+
+# --- ۵. نیت سفارش (جدید V2.3) ---
+
+@dataclass
+class OrderIntent:
+    """ درخواست ارسال سفارش که توسط OrderManager به صورت ناهمزمان اجرا می شود """
+    symbol: str
+    side: str                   # 'buy' یا 'sell'
+    order_type: str             # 'limit' یا 'market'
+    amount_usdt: float
+    price: float
+    reason: str = ""            # دلیل سفارش (مثلاً 'ENTRY' یا 'SL Hit')
+    order_book: Optional[Any] = None  # دفتر سفارش برای شبیه‌سازی لغزش در Paper Mode
+    context: Dict[str, Any] = field(default_factory=dict)  # داده‌های مورد نیاز callback
+
+# --- ۶. سفارش Live تحت پیگیری (جدید V2.3) ---
+
+@dataclass
+class TrackedOrder:
+    """ وضعیت ذخیره‌شده یک سفارش Live که با پرس‌وجوی گروهی همگام می شود """
+    order_id: str
+    symbol: str
+    side: str
+    role: str                   # 'ENTRY', 'EXIT' یا 'SL'
+    amount: float               # حجم کل سفارش (کوین)
+    filled: float = 0.0         # حجم پر شده تا آخرین همگام‌سازی
+    cost: float = 0.0           # ارزش دلاری پر شده تا آخرین همگام‌سازی
+    is_open: bool = True
+    context: Dict[str, Any] = field(default_factory=dict)
+
+# --- ۷. رویدادهای گذرگاه داخلی (جدید V2.3) ---
+# (تغییرناپذیر؛ یک نمونه بین همه مشترکین utils.event_bus مشترک است. ts = clock.time() هنگام انتشار)
+
+@dataclass(frozen=True, slots=True)
+class KbarEvent:
+    """ به‌روزرسانی kbar اعمال شده در بافر """
+    symbol: str
+    price: float
+    kbar: Dict[str, Any]        # (پیام خام kbar فید؛ نباید تغییر داده شود)
+    candle_closed: bool
+    ts: float
+
+@dataclass(frozen=True, slots=True)
+class IndicatorsEvent:
+    """ اندیکاتورهای محاسبه شده برای یک ارزیابی سیگنال """
+    symbol: str
+    price: float
+    indicators: Dict[str, float]
+    ts: float
+
+@dataclass(frozen=True, slots=True)
+class SignalEvent:
+    """ سیگنال BUY و تصمیم نهایی آن ('SUBMITTED'، 'BLOCKED_SAFETY'، ...) """
+    symbol: str
+    price: float
+    regime: str
+    decision: str
+    ts: float
+
+@dataclass(frozen=True, slots=True)
+class OrderIntentEvent:
+    """ نیت سفارش پذیرفته شده توسط OrderManager """
+    intent: OrderIntent
+    ts: float
+
+@dataclass(frozen=True, slots=True)
+class FillEvent:
+    """ نتیجه اجرای سفارش (status: 'closed'، 'open'، 'canceled' یا 'failed') """
+    symbol: str
+    side: str
+    reason: str
+    status: str
+    price: float
+    filled: float
+    ts: float
+
+@dataclass(frozen=True, slots=True)
+class ExitEvent:
+    """ پوزیشن بسته شده و نتیجه آن """
+    symbol: str
+    entry_price: float
+    exit_price: float
+    size_usdt: float
+    pnl_usdt: float
+    pnl_pct: float
+    reason: str
+    regime: str
+    ts: float
+
+@dataclass(frozen=True, slots=True)
+class SafetyChangeEvent:
+    """ تغییر وضعیت ایمنی یک نماد """
+    symbol: str
+    mode: MarketSafetyMode
+    consecutive_losses: int
+    ts: float
@@ -0,0 +1,166 @@
+#
+# ------------------------------------------------------------
+# فایل: fault_check.py
+# بررسی بودجه تأخیر، hedge و Circuit Breaker خواندن‌های REST با یک سرور جایگزین محلی کند/خراب (V2.3)
+# اجرا: python fault_check.py
+# ------------------------------------------------------------
+#
+
+import json
+import random
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from config.settings import (
+    FETCH_PRICE_BUDGET_SECONDS, FETCH_PRICE_HEDGE_AFTER_SECONDS, CIRCUIT_FAILURE_THRESHOLD
+)
+from infra.exchange_client import ExchangeClient
+from utils.call_guard import CIRCUIT_OPEN, CIRCUIT_CLOSED
+
+RESET_SECONDS = 2.0  # (کوتاه‌تر از CIRCUIT_RESET_SECONDS تا بررسی سریع باشد)
+
+
+class FaultProfile:
+    """ رفتار فعلی سرور جایگزین (از نخ بررسی تغییر می کند). """
+
+    def __init__(self):
+        self.base_delay = 0.01
+        self.tail_probability = 0.0   # (احتمال پاسخ کند)
+        self.tail_delay = 0.0
+        self.error_probability = 0.0  # (احتمال HTTP 500)
+
+    def set(self, **kwargs):
+        self.__init__()
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    profile: FaultProfile = None
+
+    def do_GET(self):
+        p = self.profile
+        delay = p.tail_delay if random.random() < p.tail_probability else p.base_delay
+        time.sleep(delay)
+        if random.random() < p.error_probability:
+            self.send_error(500)
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/ticker':
+            body = {'symbol': query['symbol'][0], 'last': 100.0, 'close': 100.0}
+        elif url.path == '/ohlcv':
+            now_ms = int(time.time() * 1000)
+            limit = int(query.get('limit', ['100'])[0])
+            body = [[now_ms - i * 60000, 100.0, 101.0, 99.0, 100.0, 1.0] for i in range(limit)][::-1]
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInExchange:
+    """ جایگزین حداقلی ccxt (فقط fetch_ticker / fetch_ohlcv) روی سرور محلی. """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def _get(self, path: str):
+        with urllib.request.urlopen(self.base_url + path, timeout=10) as resp:
+            return json.loads(resp.read())
+
+    def fetch_ticker(self, symbol):
+        return self._get(f"/ticker?symbol={symbol}")
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', limit=100):
+        return self._get(f"/ohlcv?symbol={symbol}&timeframe={timeframe}&limit={limit}")
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main() -> int:
+    profile = FaultProfile()
+    handler = type('StandInHandler', (_StandInHandler,), {'profile': profile})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = ExchangeClient()
+    client.exchange = StandInExchange(f"http://127.0.0.1:{server.server_address[1]}")
+    client.is_connected = True
+    client.price_endpoint.breaker.reset_seconds = RESET_SECONDS
+    endpoint = client.price_endpoint
+
+    failures = []
+
+    def check(name: str, ok: bool, detail: str):
+        print(f"  {'✅' if ok else '❌'} {name}: {detail}")
+        if not ok:
+            failures.append(name)
+
+    print(f"⏳ سرور جایگزین روی پورت {server.server_address[1]} "
+          f"(بودجه {FETCH_PRICE_BUDGET_SECONDS}s، hedge پس از {FETCH_PRICE_HEDGE_AFTER_SECONDS}s)")
+
+    # ۱. سالم
+    profile.set(base_delay=0.01)
+    prices = [client.fetch_price('btc_usdt') for _ in range(30)]
+    candles = client.fetch_candles('btc_usdt', '1m', 50)
+    check("سالم", all(p == 100.0 for p in prices) and len(candles) == 50,
+          f"p95={endpoint.snapshot()['p95_ms']:.0f}ms")
+
+    # ۲. دنباله کند: ۲۰٪ پاسخ‌ها کندتر از ماشه hedge (ولی در بودجه)
+    profile.set(base_delay=0.01, tail_probability=0.2, tail_delay=FETCH_PRICE_BUDGET_SECONDS * 0.8)
+    hedges_before = endpoint.metrics.hedges
+    worst = max(_timed(client.fetch_price, 'btc_usdt')[1] for _ in range(40))
+    hedged = endpoint.metrics.hedges - hedges_before
+    check("دنباله کند + hedge", hedged > 0 and worst < FETCH_PRICE_BUDGET_SECONDS,
+          f"{hedged} hedge، {endpoint.metrics.hedge_wins} برد hedge، بدترین {worst * 1000:.0f}ms")
+
+    # ۳. قطعی کامل (بدون پاسخ): تایم‌اوت در بودجه و سپس باز شدن مدار
+    profile.set(base_delay=FETCH_PRICE_BUDGET_SECONDS * 2)
+    slowest = max(_timed(client.fetch_price, 'btc_usdt')[1] for _ in range(CIRCUIT_FAILURE_THRESHOLD))
+    check("تایم‌اوت در بودجه", slowest < FETCH_PRICE_BUDGET_SECONDS + 0.2, f"کندترین {slowest * 1000:.0f}ms")
+    result, fast = _timed(client.fetch_price, 'btc_usdt')
+    check("مدار باز (fail fast)", endpoint.breaker.state == CIRCUIT_OPEN and result is None and fast < 0.01,
+          f"{fast * 1000:.2f}ms، رد شده: {endpoint.metrics.rejected}")
+
+    # ۴. بازیابی: پس از RESET_SECONDS یک درخواست آزمایشی مدار را می بندد
+    profile.set(base_delay=0.01)
+    time.sleep(RESET_SECONDS + 0.1)
+    result = client.fetch_price('btc_usdt')
+    check("بازیابی", result == 100.0 and endpoint.breaker.state == CIRCUIT_CLOSED, endpoint.breaker.state)
+
+    # ۵. خطای HTTP 500 → مدار باز
+    profile.set(base_delay=0.01, error_probability=1.0)
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        client.fetch_price('btc_usdt')
+    check("خطاهای 500", endpoint.breaker.state == CIRCUIT_OPEN, f"خطاها: {endpoint.metrics.errors}")
+
+    print(json.dumps(client.call_metrics(), ensure_ascii=False, indent=2))
+    server.shutdown()
+
+    if failures:
+        print(f"🚫 {len(failures)} بررسی ناموفق.")
+        return 1
+    print("✅ همه بررسی‌ها موفق بودند.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#
+# ------------------------------------------------------------
+# فایل: infra/async_exchange_client.py
+# (جدید V2.3 - کلاینت REST ناهمزمان LBank با ccxt.async_support)
+# ------------------------------------------------------------
+#
+
+from typing import Dict, Any, Optional, List
+
+import ccxt.async_support as ccxt_async
+
+from config.settings import (
+    EXCHANGE_ID, API_KEY, API_SECRET, API_PASSWORD, PAPER_MODE
+)
+from domain.models import OrderIntent
+from infra.exchange_client import exchange_client
+from infra.market_metadata import market_metadata
+
+
+class AsyncExchangeClient:
+    """
+    نسخه asyncio از ExchangeClient برای runtime تک event loop.
+    در Paper Mode سفارش‌ها (بدون I/O) به همان منطق ExchangeClient سپرده می شوند.
+    """
+
+    def __init__(self):
+        self.exchange = getattr(ccxt_async, EXCHANGE_ID)({
+            'apiKey': API_KEY,
+            'secret': API_SECRET,
+            'password': API_PASSWORD,
+            'enableRateLimit': True,
+            'options': {'defaultType': 'spot'}
+        })
+        # (V2.3) - مارکت‌ها از کش دیسک (ذخیره شده توسط ExchangeClient.connect)؛ بدون load_markets دوباره
+        markets = market_metadata.load_cached(allow_stale=True)
+        if markets:
+            self.exchange.set_markets(markets)
+
+    async def fetch_candles(self, symbol: str, timeframe: str, limit: int = 100) -> List[list]:
+        try:
+            data = await self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+            return data or []
+        except Exception as e:
+            print(f"خطای fetch_candles (async) برای {symbol}: {e}")
+            return []
+
+    async def place_order(self, intent: OrderIntent) -> Optional[Dict[str, Any]]:
+        """ ارسال سفارش یک OrderIntent (مورد استفاده OrderManager در حالت asyncio). """
+        if PAPER_MODE:
+            return exchange_client.place_order(
+                symbol=intent.symbol,
+                side=intent.side,
+                order_type=intent.order_type,
+                amount_usdt=intent.amount_usdt,
+                price=intent.price,
+                order_book=intent.order_book
+            )
+
+        # (V2.3) - گرد کردن و اعتبارسنجی با قوانین کش شده مارکت
+        normalized = exchange_client.normalize_order(intent.symbol, intent.amount_usdt, intent.price, intent.side)
+        if normalized is None:
+            return None
+        amount_coin, price = normalized
+        try:
+            return await self.exchange.create_order(
+                symbol=intent.symbol,
+                type=intent.order_type,
+                side=intent.side,
+                amount=amount_coin,
+                price=price,
+                params={'timeInForce': 'IOC'}
+            )
+        except Exception as e:
+            print(f"ERROR: خطای place_order (async) برای {intent.symbol}: {e}")
+            raise e
+
+    async def close(self):
+        await self.exchange.close()
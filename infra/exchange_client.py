@@ -5,31 +5,73 @@
 # ------------------------------------------------------------
 #
 
-import ccxt
-import time
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 # وارد کردن تنظیمات
 from config.settings import (
-    EXCHANGE_ID, API_KEY, API_SECRET, API_PASSWORD, PAPER_MODE
+    EXCHANGE_ID, API_KEY, API_SECRET, API_PASSWORD, PAPER_MODE,
+    FETCH_PRICE_BUDGET_SECONDS, FETCH_CANDLES_BUDGET_SECONDS, HEDGED_READS_ENABLED,
+    FETCH_PRICE_HEDGE_AFTER_SECONDS, FETCH_CANDLES_HEDGE_AFTER_SECONDS,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, EXCHANGE_CALL_WORKERS
 )
+from utils.clock import clock
+from utils.call_guard import GuardedEndpoint, CircuitOpenError
+from infra.market_metadata import market_metadata
 
 class ExchangeClient:
     """
     مسئول ارتباط با LBank (ارسال سفارش، دریافت وضعیت).
+    (V2.3) - ساخت نمونه هیچ I/O ندارد؛ اتصال فقط با connect() در زمان راه‌اندازی ربات برقرار می شود.
     """
 
     def __init__(self):
-        self.exchange: Optional[ccxt.Exchange] = None
+        self.exchange: Optional[Any] = None # (ccxt.Exchange - ccxt فقط در connect() وارد می شود)
         self.is_connected: bool = False
+        self.is_offline: bool = False # (V2.3) - Paper Mode بدون اتصال REST
+        # (V2.3) - بودجه تأخیر / Circuit Breaker / hedge برای خواندن‌های idempotent
+        self.price_endpoint = GuardedEndpoint(
+            "fetch_price", FETCH_PRICE_BUDGET_SECONDS,
+            FETCH_PRICE_HEDGE_AFTER_SECONDS if HEDGED_READS_ENABLED else 0.0,
+            CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, EXCHANGE_CALL_WORKERS
+        )
+        self.candles_endpoint = GuardedEndpoint(
+            "fetch_candles", FETCH_CANDLES_BUDGET_SECONDS,
+            FETCH_CANDLES_HEDGE_AFTER_SECONDS if HEDGED_READS_ENABLED else 0.0,
+            CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, EXCHANGE_CALL_WORKERS
+        )
+
+    def connect(self, offline: bool = False) -> bool:
+        """
+        (V2.3) - راه‌اندازی صریح. offline=True فقط در Paper Mode مجاز است
+        و بدون هیچ درخواست شبکه‌ای سفارش‌های مجازی را می‌پذیرد.
+        """
+        if self.is_connected or self.is_offline:
+            return True
+
+        if offline:
+            if not PAPER_MODE:
+                print("🚫 حالت آفلاین فقط در Paper Mode مجاز است.")
+                return False
+            print("ℹ️ ExchangeClient در حالت آفلاین (Paper Mode بدون REST) راه‌اندازی شد.")
+            self.is_offline = True
+            # (V2.3) - قوانین گرد کردن از کش دیسک (در صورت وجود؛ بدون شبکه)
+            market_metadata.load_cached(allow_stale=True)
+            return True
+
         try:
             self._connect_rest()
         except Exception as e:
             print(f"🚫 خطای کشنده در زمان اتصال REST: {e}")
             self.is_connected = False # اطمینان از False بودن در صورت خطا
+        return self.is_connected
+
+    def is_ready(self) -> bool:
+        """ آماده ارسال سفارش (اتصال REST یا Paper آفلاین). """
+        return self.is_connected or self.is_offline
 
     def _connect_rest(self):
         """ اتصال و احراز هویت به REST API صرافی LBank. """
+        import ccxt
         
         if not API_KEY or not API_SECRET:
             print("🚫 API Key یا Secret Key در فایل .env یافت نشد.")
@@ -53,6 +95,9 @@ class ExchangeClient:
             
             print(f"✅ اتصال REST و احراز هویت به {EXCHANGE_ID} برقرار شد.")
             self.is_connected = True
+
+            # (V2.3) - مارکت‌ها از کش دیسک (یا یک بار load_markets)؛ خطا در اینجا کشنده نیست
+            market_metadata.attach(self.exchange)
             
         except ccxt.AuthenticationError as e:
             print(f"🚫 خطای احراز هویت: API Key/Secret اشتباه است یا مجوز Trade/Read فعال نیست.")
@@ -70,9 +115,11 @@ class ExchangeClient:
     def fetch_price(self, symbol: str) -> Optional[float]:
         if not self.is_connected: return None
         try:
-            ticker = self.exchange.fetch_ticker(symbol)
+            ticker = self.price_endpoint.call(self.exchange.fetch_ticker, symbol)
             price = ticker.get("last") or ticker.get("close")
             return float(price) if price is not None else None
+        except CircuitOpenError:
+            return None # (مدار باز؛ بدون انتظار و بدون لاگ تکراری)
         except Exception as e:
             print(f"خطای fetch_price برای {symbol}: {e}")
             return None
@@ -80,26 +127,68 @@ class ExchangeClient:
     def fetch_candles(self, symbol: str, timeframe: str, limit: int = 100) -> List[list]:
         if not self.is_connected: return []
         try:
-            data = self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+            data = self.candles_endpoint.call(self.exchange.fetch_ohlcv, symbol, timeframe=timeframe, limit=limit)
             return data or []
-        except Exception:
+        except CircuitOpenError:
+            return []
+        except Exception as e:
+            print(f"خطای fetch_candles برای {symbol}: {e}")
             return []
 
+    def call_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """ (V2.3) - آمار تأخیر، خطا، hedge و وضعیت مدار هر endpoint (برای سرور وضعیت). """
+        return {
+            self.price_endpoint.name: self.price_endpoint.snapshot(),
+            self.candles_endpoint.name: self.candles_endpoint.snapshot(),
+        }
+
+    def normalize_order(self, symbol: str, amount_usdt: float, price: float,
+                        side: str = 'buy') -> Optional[Tuple[float, float]]:
+        """
+        (V2.3) - تبدیل حجم دلاری به مقدار، گرد کردن به دقت مارکت و بررسی حداقل‌ها.
+        خروجی: (مقدار، قیمت) یا None اگر سفارش توسط صرافی رد می شد (بدون ارسال درخواست).
+        حداقل مقدار/ارزش فقط برای ورود (buy) بررسی می شود: خروج (SL/TP) یک پوزیشن ضررده
+        زیر min_cost نباید محلی رد شود، وگرنه پوزیشن هرگز بسته نمی شود.
+        """
+        if price is None or price == 0:
+            print(f"ERROR: قیمت نامعتبر {price} برای {symbol}")
+            return None
+        rules = market_metadata.rules(symbol)
+        if rules is None:
+            return amount_usdt / price, price # (بدون متادیتا: رفتار قبلی)
+
+        price = rules.round_price(price)
+        amount_coin = rules.round_amount(amount_usdt / price)
+        if side == 'sell':
+            if amount_coin <= 0:
+                print(f"🚫 سفارش فروش {symbol} ارسال نشد: مقدار پس از گرد کردن صفر است")
+                return None
+            return amount_coin, price
+        reason = rules.validate(amount_coin, price)
+        if reason:
+            print(f"🚫 سفارش {symbol} ارسال نشد: {reason}")
+            return None
+        return amount_coin, price
+
     # --- (اصلاحیه نهایی V1.6) ---
-    def place_order(self, symbol: str, side: str, order_type: str, amount_usdt: float, price: float) -> Optional[Dict[str, Any]]:
+    def place_order(self, symbol: str, side: str, order_type: str, amount_usdt: float, price: float,
+                    order_book=None) -> Optional[Dict[str, Any]]:
         """ 
         ارسال سفارش (اکنون order_type را به عنوان آرگومان می‌پذیرد).
+        (V2.3) - در Paper Mode، اگر order_book داده شود، پر شدن با لغزش واقعی دفتر سفارش شبیه‌سازی می شود.
         """
-        if not self.is_connected: return None
+        if not self.is_ready(): return None
         
-        if price is None or price == 0:
-            print(f"ERROR: قیمت نامعتبر {price} برای {symbol}")
+        normalized = self.normalize_order(symbol, amount_usdt, price, side)
+        if normalized is None:
             return None
-        amount_coin = amount_usdt / price
+        amount_coin, price = normalized
         
         if PAPER_MODE:
             print(f"PAPER_MODE: ارسال سفارش {side} {amount_coin:.6f} {symbol} در قیمت {price} (Type: {order_type})")
-            return {'id': f'virtual_{symbol}_{int(time.time())}', 'status': 'closed', 'filled': amount_coin, 'price': price}
+            if order_book is not None:
+                return self._paper_fill_from_book(symbol, side, order_type, amount_usdt, price, order_book)
+            return {'id': f'virtual_{symbol}_{int(clock.time())}', 'status': 'closed', 'filled': amount_coin, 'price': price, 'average': price}
             
         try:
             # (اصلاحیه: 'type' هاردکد شده با 'order_type' داینامیک جایگزین شد)
@@ -116,6 +205,65 @@ class ExchangeClient:
             print(f"ERROR: خطای place_order برای {symbol}: {e}")
             raise e 
 
+    def _paper_fill_from_book(self, symbol: str, side: str, order_type: str, amount_usdt: float,
+                              price: float, order_book) -> Dict[str, Any]:
+        """ (جدید V2.3) - شبیه‌سازی پر شدن سفارش روی دفتر سفارش (بدون درخواست REST). """
+        # سفارش limit IOC فقط تا قیمت محدود پر می شود؛ market کل عمق را مصرف می کند
+        limit_price = price if order_type == 'limit' else None
+        filled, avg_price = order_book.estimate_fill(side, amount_usdt, limit_price)
+        if filled <= 0:
+            return {'id': f'virtual_{symbol}_{int(clock.time())}', 'status': 'canceled', 'filled': 0.0, 'price': price, 'average': None}
+
+        print(f"PAPER_MODE: پر شدن {filled:.6f} {symbol} با میانگین {avg_price} (لغزش از {price})")
+        return {'id': f'virtual_{symbol}_{int(clock.time())}', 'status': 'closed', 'filled': filled, 'price': price, 'average': avg_price}
+
+    # --- (جدید V2.3) پرس‌وجوی گروهی سفارش‌ها ---
+
+    def fetch_open_orders(self, symbol: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """ همه سفارش‌های باز حساب (symbol=None یعنی همه مارکت‌ها با یک درخواست). """
+        if not self.is_connected: return None
+        if PAPER_MODE:
+            return []
+        import ccxt
+        try:
+            return self.exchange.fetch_open_orders(symbol)
+        except ccxt.ArgumentsRequired:
+            raise
+        except Exception as e:
+            print(f"خطای fetch_open_orders ({symbol or 'ALL'}): {e}")
+            return None
+
+    def fetch_my_trades(self, symbol: Optional[str] = None, since: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """ معاملات اخیر حساب از زمان since (میلی‌ثانیه). """
+        if not self.is_connected: return None
+        if PAPER_MODE:
+            return []
+        import ccxt
+        try:
+            return self.exchange.fetch_my_trades(symbol, since)
+        except ccxt.ArgumentsRequired:
+            raise
+        except Exception as e:
+            print(f"خطای fetch_my_trades ({symbol or 'ALL'}): {e}")
+            return None
+
+    def cancel_orders(self, symbol: str, order_ids: List[str]):
+        """
+        لغو سفارش‌های مشخص یک مارکت (در صورت پشتیبانی صرافی با یک درخواست).
+        از cancel_all_orders استفاده نمی شود: سفارش‌های دیگر همین حساب را هم لغو می کند.
+        """
+        if not self.is_connected or not order_ids: return None
+        if PAPER_MODE:
+            return [{'id': oid, 'status': 'canceled'} for oid in order_ids]
+
+        try:
+            if self.exchange.has.get('cancelOrders'):
+                return self.exchange.cancel_orders(order_ids, symbol)
+            return [self.exchange.cancel_order(oid, symbol) for oid in order_ids]
+        except Exception as e:
+            print(f"ERROR: خطای cancel_orders برای {symbol}: {e}")
+            raise e
+
     def cancel_order(self, symbol: str, order_id: str):
         """ لغو یک سفارش فعال (برای جابجایی SL). """
         if not self.is_connected: return None
@@ -129,9 +277,5 @@ class ExchangeClient:
             raise e
 
 # --- نمونه سازی ---
-# (این بخش باید در try/except باشد تا ربات در صورت خطای اتصال متوقف شود)
-try:
-    exchange_client = ExchangeClient()
-except Exception:
-    exchange_client = None 
-    print("🚫 نمونه exchange_client ساخته نشد. ربات متوقف خواهد شد.")
+# (V2.3 - بدون اتصال؛ اتصال در BotLoop._initialize_services با connect() برقرار می شود)
+exchange_client = ExchangeClient()
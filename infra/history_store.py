@@ -0,0 +1,254 @@
+#
+# ------------------------------------------------------------
+# فایل: infra/history_store.py
+# (جدید V2.3 - تاریخچه ستونی معاملات و تصمیم‌ها، پارتیشن روزانه)
+# ------------------------------------------------------------
+#
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import HISTORY_DIR
+
+# --- چیدمان روی دیسک ---
+# HISTORY_DIR/<table>/day=YYYY-MM-DD/<column>.<dtype>   (آرایه خام، قابل append و memmap)
+# HISTORY_DIR/<table>/day=YYYY-MM-DD/_meta.json         (تعداد ردیف‌های قطعی + دیکشنری ستون‌های متنی)
+#
+# ستون‌های متنی (نماد، دلیل خروج، ...) به صورت کد int32 روی دیکشنری پارتیشن ذخیره می شوند،
+# بنابراین فیلتر روی آن‌ها یک مقایسه عددی روی آرایه است.
+
+CATEGORY = "cat"
+
+TABLE_SCHEMAS: Dict[str, List[Tuple[str, str]]] = {
+    'trades': [
+        ('timestamp', 'i8'),
+        ('symbol', CATEGORY),
+        ('entry_price', 'f8'),
+        ('exit_price', 'f8'),
+        ('entry_size_usdt', 'f8'),
+        ('pnl_usdt', 'f8'),
+        ('pnl_pct', 'f8'),
+        ('fees_usdt', 'f8'),
+        ('exit_reason', CATEGORY),
+        ('mode', CATEGORY),
+        ('regime', CATEGORY),
+    ],
+    'decisions': [
+        ('timestamp', 'i8'),
+        ('symbol', CATEGORY),
+        ('price', 'f8'),
+        ('regime', CATEGORY),
+        ('decision', CATEGORY),
+    ],
+}
+
+
+def _storage_dtype(kind: str) -> str:
+    return '<i4' if kind == CATEGORY else f'<{kind}'
+
+
+def _day_of(ts_seconds: int) -> str:
+    return datetime.fromtimestamp(ts_seconds, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def _partition_dir(table: str, day: str, base_dir: str = HISTORY_DIR) -> str:
+    return os.path.join(base_dir, table, f"day={day}")
+
+
+def _read_meta(part_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(part_dir, '_meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'rows': 0, 'dicts': {}}
+
+
+def _write_meta(part_dir: str, meta: Dict[str, Any]):
+    path = os.path.join(part_dir, '_meta.json')
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, path)  # (جایگزینی اتمی: خواننده هیچ‌وقت meta نیمه‌کاره نمی بیند)
+
+
+class HistoryWriter:
+    """
+    نویسنده ستونی (فقط از نخ پس‌زمینه PersistenceService).
+    هر دسته رکورد به انتهای فایل‌های ستونی پارتیشن روز اضافه می شود و
+    سپس تعداد ردیف‌های قطعی در _meta.json ثبت می شود؛ ردیف‌های بعد از آن
+    (مثلاً پس از قطع ناگهانی) توسط خواننده نادیده گرفته می شوند.
+    """
+
+    def __init__(self, base_dir: str = HISTORY_DIR):
+        self.base_dir = base_dir  # (بازپخش: پوشه جدا برای هر اجرا)
+
+    def append(self, table: str, records: Iterable[Dict[str, Any]]):
+        schema = TABLE_SCHEMAS[table]
+        by_day: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_day.setdefault(_day_of(int(record.get('timestamp') or 0)), []).append(record)
+
+        for day, rows in by_day.items():
+            self._append_partition(table, day, schema, rows)
+
+    def _append_partition(self, table: str, day: str, schema, rows: List[Dict[str, Any]]):
+        part_dir = _partition_dir(table, day, self.base_dir)
+        os.makedirs(part_dir, exist_ok=True)
+        meta = _read_meta(part_dir)
+        committed = int(meta.get('rows', 0))
+        dicts: Dict[str, List[str]] = meta.setdefault('dicts', {})
+
+        for col, kind in schema:
+            dtype = _storage_dtype(kind)
+            if kind == CATEGORY:
+                values = dicts.setdefault(col, [])
+                index = {v: i for i, v in enumerate(values)}
+                codes = []
+                for row in rows:
+                    v = str(row.get(col) or '')
+                    code = index.get(v)
+                    if code is None:
+                        code = len(values)
+                        values.append(v)
+                        index[v] = code
+                    codes.append(code)
+                arr = np.asarray(codes, dtype=dtype)
+            else:
+                arr = np.asarray([row.get(col) or 0 for row in rows], dtype=dtype)
+
+            path = os.path.join(part_dir, f"{col}.{kind}")
+            # (حذف ردیف‌های نیمه‌کاره یک append قبلی که قطعی نشده بودند)
+            item_size = np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) != committed * item_size:
+                with open(path, 'r+b') as f:
+                    f.truncate(committed * item_size)
+            with open(path, 'ab') as f:
+                arr.tofile(f)
+
+        meta['rows'] = committed + len(rows)
+        _write_meta(part_dir, meta)
+
+
+class HistoryQuery:
+    """
+    پرس‌وجوی ستونی: هرس پارتیشن‌ها با بازه زمانی و memmap فقط ستون‌های لازم
+    (ستون‌های فیلتر + ستون‌های خروجی).
+    """
+
+    def __init__(self, base_dir: str = HISTORY_DIR):
+        self.base_dir = base_dir
+
+    def _days(self, table: str, start_ts: Optional[int], end_ts: Optional[int]) -> List[str]:
+        table_dir = os.path.join(self.base_dir, table)
+        if not os.path.isdir(table_dir):
+            return []
+        first = _day_of(start_ts) if start_ts is not None else None
+        last = _day_of(end_ts) if end_ts is not None else None
+        days = []
+        for name in sorted(os.listdir(table_dir)):
+            if not name.startswith('day='):
+                continue
+            day = name[4:]
+            if (first is None or day >= first) and (last is None or day <= last):
+                days.append(day)
+        return days
+
+    @staticmethod
+    def _column(part_dir: str, col: str, kind: str, rows: int, empty_code: int = 0) -> np.ndarray:
+        """
+        آرایه ستون با طول دقیق rows. اگر فایل ستون وجود نداشته باشد (ستونی که بعد از نوشتن
+        این پارتیشن به schema اضافه شده)، آرایه پر شده برگردانده می شود: NaN برای اعشاری،
+        کد '' برای متنی (empty_code) و 0 برای صحیح.
+        """
+        dtype = _storage_dtype(kind)
+        if rows == 0:
+            return np.zeros(0, dtype=dtype)
+        path = os.path.join(part_dir, f"{col}.{kind}")
+        if not os.path.exists(path):
+            if kind == CATEGORY:
+                return np.full(rows, empty_code, dtype=dtype)
+            fill = np.nan if np.dtype(dtype).kind == 'f' else 0
+            return np.full(rows, fill, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+
+    @staticmethod
+    def _category_values(dicts: Dict[str, List[str]], col: str) -> Tuple[List[str], int]:
+        """ مقادیر دیکشنری ستون متنی (همیشه شامل '') و کد ''. """
+        values = list(dicts.get(col, []))
+        if '' not in values:
+            values.append('')
+        return values, values.index('')
+
+    def query(self, table: str = 'trades', columns: Optional[Sequence[str]] = None,
+              symbol: Optional[str] = None, start_ts: Optional[int] = None,
+              end_ts: Optional[int] = None, exit_reason: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        خروجی: {ستون: آرایه numpy}. ستون‌های متنی به صورت آرایه object (مقادیر اصلی) برگردانده می شوند.
+        start_ts/end_ts بر حسب ثانیه (بازه بسته).
+        """
+        schema = dict(TABLE_SCHEMAS[table])
+        wanted = list(columns) if columns else list(schema.keys())
+        equals = {}
+        if symbol is not None:
+            equals['symbol'] = symbol
+        if exit_reason is not None:
+            equals['exit_reason'] = exit_reason
+
+        parts: Dict[str, List[np.ndarray]] = {c: [] for c in wanted}
+        for day in self._days(table, start_ts, end_ts):
+            part_dir = os.path.join(self.base_dir, table, f"day={day}")
+            meta = _read_meta(part_dir)
+            rows = int(meta.get('rows', 0))
+            if rows == 0:
+                continue
+            dicts = meta.get('dicts', {})
+
+            mask = None
+            skip = False
+            for col, value in equals.items():
+                values, empty_code = self._category_values(dicts, col)
+                if value not in values:
+                    skip = True  # (مقدار در این روز وجود ندارد؛ ستون خوانده نمی شود)
+                    break
+                m = self._column(part_dir, col, schema[col], rows, empty_code) == values.index(value)
+                mask = m if mask is None else (mask & m)
+            if skip:
+                continue
+
+            if start_ts is not None or end_ts is not None:
+                ts = self._column(part_dir, 'timestamp', schema['timestamp'], rows)
+                m = np.ones(rows, dtype=bool)
+                if start_ts is not None:
+                    m &= ts >= start_ts
+                if end_ts is not None:
+                    m &= ts <= end_ts
+                mask = m if mask is None else (mask & m)
+
+            for col in wanted:
+                kind = schema[col]
+                if kind == CATEGORY:
+                    values, empty_code = self._category_values(dicts, col)
+                    data = self._column(part_dir, col, kind, rows, empty_code)
+                else:
+                    data = self._column(part_dir, col, kind, rows)
+                data = np.asarray(data[mask] if mask is not None else data)
+                if kind == CATEGORY:
+                    data = np.asarray(values, dtype=object)[data]
+                parts[col].append(data)
+
+        result: Dict[str, np.ndarray] = {}
+        for col in wanted:
+            kind = schema[col]
+            if parts[col]:
+                result[col] = np.concatenate(parts[col])
+            else:
+                result[col] = np.zeros(0, dtype=object if kind == CATEGORY else _storage_dtype(kind))
+        return result
+
+# --- نمونه سازی ---
+history_writer = HistoryWriter()
+history_query = HistoryQuery()
@@ -0,0 +1,190 @@
+#
+# ------------------------------------------------------------
+# فایل: infra/market_metadata.py
+# (جدید V2.3 - کش دیسکی متادیتای مارکت‌ها و قوانین گرد کردن/اعتبارسنجی سفارش)
+# ------------------------------------------------------------
+#
+
+import json
+import math
+import os
+import time
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from config.settings import MARKET_CACHE_FILE, MARKET_CACHE_TTL_SECONDS
+
+# (مقادیر ccxt.base.decimal_to_precision؛ بدون import کردن ccxt)
+PRECISION_DECIMAL_PLACES = 2
+PRECISION_TICK_SIZE = 4
+
+
+def _step_from_precision(value: Optional[float], precision_mode: int) -> Optional[float]:
+    """ precision ccxt (تعداد اعشار یا اندازه گام) → اندازه گام. """
+    if value is None:
+        return None
+    if precision_mode == PRECISION_TICK_SIZE:
+        return float(value) if value > 0 else None
+    return 10.0 ** -int(value)
+
+
+def _decimals(step: float) -> int:
+    """ تعداد اعشار لازم برای نمایش دقیق یک گام (برای حذف خطای ممیز شناور). """
+    return max(0, -Decimal(repr(step)).normalize().as_tuple().exponent)
+
+
+class MarketRules:
+    """ قوانین پیش‌محاسبه شده یک مارکت؛ همه متدها O(1) و بدون I/O هستند. """
+
+    __slots__ = ("symbol", "amount_step", "price_step", "min_amount", "min_cost",
+                 "_amount_decimals", "_price_decimals")
+
+    def __init__(self, symbol: str, amount_step: Optional[float], price_step: Optional[float],
+                 min_amount: Optional[float], min_cost: Optional[float]):
+        self.symbol = symbol
+        self.amount_step = amount_step
+        self.price_step = price_step
+        self.min_amount = min_amount or 0.0
+        self.min_cost = min_cost or 0.0
+        self._amount_decimals = _decimals(amount_step) if amount_step else None
+        self._price_decimals = _decimals(price_step) if price_step else None
+
+    def round_amount(self, amount: float) -> float:
+        """ گرد کردن مقدار به پایین (روی گام مجاز)؛ هیچ‌وقت بیشتر از بودجه سفارش نمی شود. """
+        if not self.amount_step:
+            return amount
+        steps = math.floor(amount / self.amount_step + 1e-9)
+        return round(steps * self.amount_step, self._amount_decimals)
+
+    def round_price(self, price: float) -> float:
+        """ گرد کردن قیمت به نزدیک‌ترین tick. """
+        if not self.price_step:
+            return price
+        return round(round(price / self.price_step) * self.price_step, self._price_decimals)
+
+    def validate(self, amount: float, price: float) -> Optional[str]:
+        """ None اگر سفارش (پس از گرد کردن) مجاز باشد؛ در غیر این صورت دلیل رد. """
+        if amount <= 0:
+            return "مقدار پس از گرد کردن صفر است"
+        if amount < self.min_amount:
+            return f"مقدار {amount} کمتر از حداقل {self.min_amount}"
+        if amount * price < self.min_cost:
+            return f"ارزش {amount * price:.4f} کمتر از حداقل {self.min_cost}"
+        return None
+
+    @classmethod
+    def from_market(cls, symbol: str, market: Dict[str, Any], precision_mode: int) -> "MarketRules":
+        precision = market.get('precision') or {}
+        limits = market.get('limits') or {}
+        return cls(
+            symbol,
+            _step_from_precision(precision.get('amount'), precision_mode),
+            _step_from_precision(precision.get('price'), precision_mode),
+            (limits.get('amount') or {}).get('min'),
+            (limits.get('cost') or {}).get('min'),
+        )
+
+
+class MarketMetadataCache:
+    """
+    کش متادیتای مارکت‌ها روی دیسک با TTL.
+    - اگر فایل تازه باشد، مارکت‌ها با set_markets به ccxt داده می شوند و load_markets اجرا نمی شود.
+    - در غیر این صورت load_markets یک بار اجرا و نتیجه به صورت اتمی ذخیره می شود.
+    قوانین هر مارکت (MarketRules) یک بار در زمان بارگذاری ساخته می شوند.
+    """
+
+    def __init__(self, path: str = MARKET_CACHE_FILE, ttl_seconds: int = MARKET_CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.rules_by_symbol: Dict[str, MarketRules] = {}
+        self.fetched_at: float = 0.0
+        self.source = ""
+
+    # --- فایل ---
+
+    def _read_file(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ فایل کش مارکت‌ها قابل خواندن نیست ({e}).")
+            return None
+        if not isinstance(data.get('markets'), dict):
+            return None
+        return data
+
+    def _write_file(self, markets: Dict[str, Any], precision_mode: int, fetched_at: float):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fetched_at': fetched_at, 'precision_mode': precision_mode, 'markets': markets},
+                          f, default=str)
+            os.replace(tmp_path, self.path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ ذخیره کش مارکت‌ها انجام نشد: {e}")
+
+    def _build_rules(self, markets: Dict[str, Any], precision_mode: int):
+        self.rules_by_symbol = {
+            symbol: MarketRules.from_market(symbol, market, precision_mode)
+            for symbol, market in markets.items()
+        }
+
+    # --- بارگذاری ---
+
+    def load_cached(self, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """ بارگذاری از فایل (بدون شبکه). خروجی: مارکت‌ها یا None اگر فایل نبود/منقضی بود. """
+        data = self._read_file()
+        if data is None:
+            return None
+        fetched_at = float(data.get('fetched_at', 0.0))
+        if not allow_stale and time.time() - fetched_at > self.ttl:
+            return None
+        self._build_rules(data['markets'], int(data.get('precision_mode', PRECISION_DECIMAL_PLACES)))
+        self.fetched_at = fetched_at
+        self.source = "cache"
+        return data['markets']
+
+    def attach(self, exchange) -> bool:
+        """
+        مارکت‌های exchange (ccxt) را از کش یا load_markets مقداردهی می کند.
+        خروجی: True اگر قوانین مارکت‌ها در دسترس باشند.
+        """
+        started = time.perf_counter()
+        markets = self.load_cached()
+        if markets is not None:
+            exchange.set_markets(markets)
+            age_min = (time.time() - self.fetched_at) / 60.0
+            print(f"✅ {len(markets)} مارکت از کش دیسک بارگذاری شد (عمر {age_min:.0f} دقیقه، "
+                  f"{(time.perf_counter() - started) * 1000:.0f}ms).")
+            return True
+
+        try:
+            markets = exchange.load_markets()
+        except Exception as e:
+            print(f"خطای load_markets: {e}")
+            # (کش منقضی بهتر از نداشتن قوانین گرد کردن است)
+            markets = self.load_cached(allow_stale=True)
+            if markets is None:
+                return False
+            exchange.set_markets(markets)
+            print("⚠️ از کش منقضی مارکت‌ها استفاده شد.")
+            return True
+
+        precision_mode = int(getattr(exchange, 'precisionMode', PRECISION_DECIMAL_PLACES))
+        self.fetched_at = time.time()
+        self.source = "exchange"
+        self._build_rules(markets, precision_mode)
+        self._write_file(markets, precision_mode, self.fetched_at)
+        print(f"✅ {len(markets)} مارکت با load_markets دریافت و در کش ذخیره شد "
+              f"({(time.perf_counter() - started) * 1000:.0f}ms).")
+        return True
+
+    def rules(self, symbol: str) -> Optional[MarketRules]:
+        """ قوانین مارکت ('BTC/USDT')؛ None اگر متادیتا در دسترس نباشد. """
+        return self.rules_by_symbol.get(symbol)
+
+# --- نمونه سازی ---
+market_metadata = MarketMetadataCache()
@@ -13,7 +13,7 @@ import os
 import json 
 
 # (V2.2 - اکنون DATA_DIR را به درستی وارد می کنیم)
-from config.settings import CANDLE_BUFFER_SIZE, LOG_QUEUE_SIZE, DATA_DIR
+from config.settings import CANDLE_BUFFER_SIZE, LOG_QUEUE_SIZE, DATA_DIR, HISTORY_EXPORT_ENABLED
 from app.state_manager import state_manager
 from domain.models import Position, VirtualBalance
 
@@ -34,19 +34,29 @@ class PersistenceService:
     
     def __init__(self):
         self.trade_queue: List[Dict[str, Any]] = [] 
+        # (جدید V2.3) - تصمیم‌های ورود (فقط برای تاریخچه ستونی)
+        self.decision_queue: List[Dict[str, Any]] = []
         self.queue_lock = threading.Lock()
         self._stop_event = threading.Event()
+        # (V2.3) - مسیر لاگ معاملات (بازپخش با use_output_dir پوشه جدا می گیرد)
+        self.trade_log_path = TRADE_LOG_PATH
         
-        self.writer_thread = threading.Thread(target=self._background_writer_loop, daemon=True)
+        self.writer_thread = threading.Thread(target=self._background_writer_loop, name="persistence-writer", daemon=True)
         
+    def use_output_dir(self, base_dir: str):
+        """ (V2.3) - لاگ معاملات و تاریخچه ستونی در base_dir (قبل از start؛ برای بازپخش). """
+        self.trade_log_path = os.path.join(base_dir, 'trade_logs', 'trades.csv')
+        from infra.history_store import history_writer # (import تنبل: numpy)
+        history_writer.base_dir = os.path.join(base_dir, 'history')
+
     def start(self):
         """ شروع حلقه نویسنده پس زمینه. """
         try:
             # (ایجاد پوشه ./data/trade_logs)
-            os.makedirs(os.path.dirname(TRADE_LOG_PATH), exist_ok=True)
+            os.makedirs(os.path.dirname(self.trade_log_path), exist_ok=True)
             
-            if not os.path.exists(TRADE_LOG_PATH):
-                with open(TRADE_LOG_PATH, mode='w', newline='') as f:
+            if not os.path.exists(self.trade_log_path):
+                with open(self.trade_log_path, mode='w', newline='') as f:
                     writer = csv.writer(f)
                     writer.writerow(TRADE_HEADER)
                     
@@ -56,34 +66,59 @@ class PersistenceService:
             print(f"🚫 خطای راه‌اندازی PersistenceService: {e}")
 
     def stop(self):
-        """ توقف حلقه نویسنده. """
+        """ توقف حلقه نویسنده و نوشتن رکوردهای باقی‌مانده صف (V2.3). """
         self._stop_event.set()
         if self.writer_thread.is_alive():
-            self.writer_thread.join(timeout=2)
+            self.writer_thread.join(timeout=5)
+        else:
+            self._flush_queues() # (نخ شروع نشده بود)
 
     def _background_writer_loop(self):
         """ 
         نخ جداگانه برای نوشتن داده ها روی دیسک.
         """
         while not self._stop_event.is_set():
-            records_to_write = None
+            self._flush_queues()
+            self._stop_event.wait(1.0) 
+        # (V2.3) - تخلیه نهایی: معاملات ثانیه آخر قبل از خروج پروسه از دست نمی روند
+        self._flush_queues()
+
+    def _flush_queues(self):
+        records_to_write = None
+        decisions_to_write = None
+        if not (self.trade_queue or self.decision_queue):
+            return
+        with self.queue_lock:
             if self.trade_queue:
-                with self.queue_lock:
-                    if self.trade_queue:
-                        records_to_write = self.trade_queue.copy()
-                        self.trade_queue.clear()
-                    
-                if records_to_write:
-                    try:
-                        with open(TRADE_LOG_PATH, mode='a', newline='') as f:
-                            writer = csv.DictWriter(f, fieldnames=TRADE_HEADER)
-                            for record in records_to_write:
-                                filtered_record = {k: record.get(k) for k in TRADE_HEADER}
-                                writer.writerow(filtered_record)
-                    except Exception as e:
-                        print(f"❌ خطای نوشتن در CSV: {e}")
+                records_to_write = self.trade_queue.copy()
+                self.trade_queue.clear()
+            if self.decision_queue:
+                decisions_to_write = self.decision_queue.copy()
+                self.decision_queue.clear()
             
-            self._stop_event.wait(1.0) 
+        if records_to_write:
+            try:
+                with open(self.trade_log_path, mode='a', newline='') as f:
+                    writer = csv.DictWriter(f, fieldnames=TRADE_HEADER)
+                    for record in records_to_write:
+                        filtered_record = {k: record.get(k) for k in TRADE_HEADER}
+                        writer.writerow(filtered_record)
+            except Exception as e:
+                print(f"❌ خطای نوشتن در CSV: {e}")
+
+        # (V2.3) - همان دسته در تاریخچه ستونی
+        if HISTORY_EXPORT_ENABLED:
+            self._write_history('trades', records_to_write)
+            self._write_history('decisions', decisions_to_write)
+
+    def _write_history(self, table: str, records: Optional[List[Dict[str, Any]]]):
+        if not records:
+            return
+        try:
+            from infra.history_store import history_writer # (import تنبل: numpy فقط در نخ نویسنده)
+            history_writer.append(table, records)
+        except Exception as e:
+            print(f"❌ خطای نوشتن تاریخچه ستونی ({table}): {e}")
             
     def add_trade_to_queue(self, trade_data: Dict[str, Any]):
         """ 
@@ -95,6 +130,14 @@ class PersistenceService:
             else:
                 print("⚠️ صف ذخیره‌سازی CSV پر است. داده‌ها ممکن است از دست بروند.")
             
+    def add_decision_to_queue(self, decision_data: Dict[str, Any]):
+        """ (جدید V2.3) - ثبت تصمیم ورود (ورود / رد شده و دلیل آن). """
+        if not HISTORY_EXPORT_ENABLED:
+            return
+        with self.queue_lock:
+            if len(self.decision_queue) < LOG_QUEUE_SIZE:
+                self.decision_queue.append(decision_data)
+
     def load_state_on_startup(self, symbols: List[str]):
         """
         بازیابی پوزیشن ها و وضعیت ایمنی از آخرین بکاپ.
@@ -0,0 +1,220 @@
+#
+# ------------------------------------------------------------
+# فایل: infra/shared_memory_store.py
+# (جدید V2.3 - بافر کندل و اندیکاتورها در حافظه مشترک با هدر seqlock)
+# ------------------------------------------------------------
+#
+
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import CANDLE_BUFFER_SIZE, SHARED_MEMORY_PREFIX
+
+# --- چیدمان سگمنت ---
+# [هدر: 8 x uint64][کندل‌ها: capacity x 6 x float64][اندیکاتورها: N x float64]
+SEGMENT_MAGIC = 0x5A455441424F5431  # 'ZETABOT1'
+LAYOUT_VERSION = 1
+HEADER_SLOTS = 8
+H_MAGIC, H_VERSION, H_CAPACITY, H_N_IND, H_SEQ, H_COUNT, H_HEAD, H_UPDATED_MS = range(HEADER_SLOTS)
+CANDLE_FIELDS = 6  # ts, o, h, l, c, v
+
+# ترتیب ثابت اندیکاتورها در سگمنت (مطابق خروجی calculate_all_indicators)
+INDICATOR_KEYS: Tuple[str, ...] = ('EMA8', 'EMA21', 'ATR14', 'RSI14', 'BB_UPPER', 'BB_LOWER', 'ATR_PCT')
+
+
+def segment_name(symbol: str) -> str:
+    """ نام سگمنت حافظه مشترک برای یک نماد (مثلاً 'zetabot_btc_usdt'). """
+    return f"{SHARED_MEMORY_PREFIX}_{symbol.replace('/', '_').lower()}"
+
+
+def _segment_size(capacity: int, n_indicators: int) -> int:
+    return 8 * (HEADER_SLOTS + capacity * CANDLE_FIELDS + n_indicators)
+
+
+class _SegmentViews:
+    """ نماهای numpy (بدون کپی) روی بافر یک سگمنت. """
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, n_indicators: int):
+        buf = shm.buf
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.uint64, buffer=buf, offset=0)
+        self.candles = np.ndarray((capacity, CANDLE_FIELDS), dtype=np.float64, buffer=buf, offset=8 * HEADER_SLOTS)
+        self.indicators = np.ndarray(
+            (n_indicators,), dtype=np.float64, buffer=buf,
+            offset=8 * (HEADER_SLOTS + capacity * CANDLE_FIELDS)
+        )
+
+
+class SharedCandleWriter:
+    """
+    نویسنده یک سگمنت (فقط پروسه فید). هر تغییر بین دو افزایش شمارنده seq انجام می شود:
+    seq فرد = در حال نوشتن، seq زوج = پایدار.
+    """
+
+    def __init__(self, symbol: str, capacity: int = CANDLE_BUFFER_SIZE):
+        self.symbol = symbol
+        self.capacity = capacity
+        name = segment_name(symbol)
+        size = _segment_size(capacity, len(INDICATOR_KEYS))
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # (باقیمانده از اجرای قبلی که درست بسته نشده)
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.views = _SegmentViews(self.shm, capacity, len(INDICATOR_KEYS))
+        h = self.views.header
+        h[:] = 0
+        h[H_CAPACITY] = capacity
+        h[H_N_IND] = len(INDICATOR_KEYS)
+        h[H_VERSION] = LAYOUT_VERSION
+        self.views.indicators[:] = np.nan
+        h[H_MAGIC] = SEGMENT_MAGIC  # (آخر از همه: سگمنت آماده است)
+
+    def _begin(self):
+        self.views.header[H_SEQ] += 1
+
+    def _end(self):
+        h = self.views.header
+        h[H_UPDATED_MS] = int(time.time() * 1000)
+        h[H_SEQ] += 1
+
+    def write_candle(self, candle: list, replace_last: bool):
+        """ افزودن کندل جدید یا بازنویسی آخرین کندل (مطابق منطق بافر StateManager). """
+        h = self.views.header
+        count = int(h[H_COUNT])
+        head = int(h[H_HEAD])
+        self._begin()
+        try:
+            if replace_last and count > 0:
+                self.views.candles[(head - 1) % self.capacity] = candle
+            else:
+                self.views.candles[head] = candle
+                h[H_HEAD] = (head + 1) % self.capacity
+                h[H_COUNT] = min(count + 1, self.capacity)
+        finally:
+            self._end()
+
+    def write_indicators(self, indicators: Dict[str, float]):
+        values = [float(indicators.get(k, np.nan)) for k in INDICATOR_KEYS]
+        self._begin()
+        try:
+            self.views.indicators[:] = values
+        finally:
+            self._end()
+
+    def close(self):
+        self.views = None  # (نماهای numpy باید قبل از بستن سگمنت آزاد شوند)
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """ اتصال به سگمنت موجود بدون ثبت در resource_tracker (خواننده نباید سگمنت را پاک کند). """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return shm
+
+
+class SharedCandleReader:
+    """
+    خواننده سگمنت در هر پروسه دیگر (آنالیز، استراتژی دوم، سرور وضعیت).
+    بدون قفل: اگر seq در طول خواندن تغییر کند یا فرد باشد، خواندن تکرار می شود.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.shm = _attach(segment_name(symbol))
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.uint64, buffer=self.shm.buf, offset=0)
+        if int(header[H_MAGIC]) != SEGMENT_MAGIC or int(header[H_VERSION]) != LAYOUT_VERSION:
+            self.shm.close()
+            raise ValueError(f"سگمنت حافظه مشترک {symbol} نامعتبر یا ناسازگار است.")
+        self.capacity = int(header[H_CAPACITY])
+        self.views = _SegmentViews(self.shm, self.capacity, int(header[H_N_IND]))
+
+    def _read(self, fn, max_spins: int = 1000):
+        h = self.views.header
+        for _ in range(max_spins):
+            seq1 = int(h[H_SEQ])
+            if seq1 & 1:
+                continue
+            result = fn()
+            if int(h[H_SEQ]) == seq1:
+                return result
+        raise TimeoutError(f"خواندن پایدار سگمنت {self.symbol} ممکن نشد.")
+
+    def candles(self) -> np.ndarray:
+        """ کپی پایدار کندل‌ها به ترتیب زمانی (قدیمی → جدید)، آرایه (n, 6). """
+        def _copy():
+            h = self.views.header
+            count, head = int(h[H_COUNT]), int(h[H_HEAD])
+            if count < self.capacity:
+                return self.views.candles[:count].copy()
+            return np.concatenate((self.views.candles[head:], self.views.candles[:head]))
+        return self._read(_copy)
+
+    def latest_candle(self) -> Optional[np.ndarray]:
+        def _copy():
+            h = self.views.header
+            if int(h[H_COUNT]) == 0:
+                return None
+            return self.views.candles[(int(h[H_HEAD]) - 1) % self.capacity].copy()
+        return self._read(_copy)
+
+    def indicators(self) -> Dict[str, float]:
+        values = self._read(lambda: self.views.indicators.copy())
+        return {k: float(v) for k, v in zip(INDICATOR_KEYS, values) if not np.isnan(v)}
+
+    def raw_views(self) -> _SegmentViews:
+        """ نماهای خام بدون کپی (فقط برای خواننده‌هایی که خودشان seq را بررسی می کنند). """
+        return self.views
+
+    def close(self):
+        self.views = None
+        self.shm.close()
+
+
+class SharedMarketStore:
+    """ مجموعه نویسنده‌ها برای همه نمادهای پروسه فید. """
+
+    def __init__(self):
+        self.writers: Dict[str, SharedCandleWriter] = {}
+
+    def _writer(self, symbol: str) -> SharedCandleWriter:
+        writer = self.writers.get(symbol)
+        if writer is None:
+            writer = SharedCandleWriter(symbol)
+            self.writers[symbol] = writer
+        return writer
+
+    def write_candle(self, symbol: str, candle: list, replace_last: bool):
+        self._writer(symbol).write_candle(candle, replace_last)
+
+    def write_indicators(self, symbol: str, indicators: Dict[str, float]):
+        self._writer(symbol).write_indicators(indicators)
+
+    def symbols(self) -> List[str]:
+        return list(self.writers.keys())
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers.clear()
+
+# --- نمونه سازی ---
+shared_market_store = SharedMarketStore()
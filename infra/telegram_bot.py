@@ -5,7 +5,7 @@
 # ------------------------------------------------------------
 #
 
-import requests 
+import asyncio
 from typing import List, Optional
 
 # وارد کردن تنظیمات
@@ -17,15 +17,49 @@ from config.settings import (
 class TelegramReporter:
     
     def __init__(self):
+        # (V2.3) - در runtime asyncio، پیام‌ها با aiohttp روی event loop ارسال می شوند
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session = None
+        self.muted = False # (V2.3) - در بازپخش فید ضبط شده هیچ پیامی ارسال نمی شود
+
         if not TELEGRAM_BOT_TOKEN:
-            print("TOKEN تلگرام یافت نشد. سرویس تلگرام غیرفعال است.")
             self.bot_token = None
             self.base_url = ""
             return
 
         self.bot_token = TELEGRAM_BOT_TOKEN
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-        print("✅ سرویس تلگرام (Requests - V1.5) فعال شد.")
+
+    def start(self):
+        """ (V2.3) - گزارش وضعیت سرویس در زمان راه‌اندازی ربات (نه در زمان import). """
+        if not self.bot_token:
+            print("TOKEN تلگرام یافت نشد. سرویس تلگرام غیرفعال است.")
+        else:
+            print("✅ سرویس تلگرام (Requests - V1.5) فعال شد.")
+
+    def use_async_session(self, loop: asyncio.AbstractEventLoop, session):
+        """ (V2.3) - ارسال ناهمزمان با یک aiohttp.ClientSession مشترک. """
+        self._loop = loop
+        self._session = session
+
+    async def _post_async(self, chat_ids: List[str], message_text: str, parse_mode: Optional[str]):
+        for chat_id in chat_ids:
+            if not chat_id: continue
+            payload = {
+                'chat_id': chat_id,
+                'text': message_text,
+                'parse_mode': parse_mode,
+                'disable_web_page_preview': 'true'
+            }
+            try:
+                async with self._session.post(self.base_url, data=payload) as response:
+                    body = await response.json(content_type=None)
+                    if not body.get('ok', False):
+                        print(f"❌ خطای API تلگرام: {body}")
+            except asyncio.TimeoutError:
+                print(f"❌ خطای ارسال پیام تلگرام (Timeout) به {chat_id}")
+            except Exception as e:
+                print(f"❌ خطای ارسال پیام تلگرام (aiohttp) به {chat_id}: {e}")
 
     
     def send_message_to_chat_ids(
@@ -37,9 +71,16 @@ class TelegramReporter:
         """ 
         پیام را با استفاده از requests (همزمان و بدون خطا) ارسال می کند.
         """
-        if not self.bot_token:
+        if not self.bot_token or self.muted:
             return 
 
+        # (V2.3) - در runtime asyncio ارسال بدون انتظار روی event loop زمان‌بندی می شود
+        if self._loop is not None and self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._post_async(chat_ids, message_text, parse_mode), self._loop)
+            return
+
+        import requests # (V2.3 - import تنبل)
+
         for chat_id in chat_ids:
             if not chat_id: continue
             
@@ -112,5 +153,10 @@ class TelegramReporter:
         
         self.send_message_to_chat_ids(ROUTE_URGENT_TRADE, msg, "HTML")
 
+    def send_daily_summary(self, day: str, summary: str):
+        """ (جدید V2.3) - خلاصه روزانه عملکرد """
+        msg = f"📊 <b>خلاصه روزانه ZetaBot</b> ({day})\n\n{summary}"
+        self.send_message_to_chat_ids(ROUTE_DAILY_SUMMARY, msg, "HTML")
+
 # --- نمونه سازی ---
 telegram_reporter = TelegramReporter()
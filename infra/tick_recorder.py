@@ -0,0 +1,187 @@
+#
+# ------------------------------------------------------------
+# فایل: infra/tick_recorder.py
+# (جدید V2.3 - ضبط پیام‌های خام WebSocket در سگمنت‌های فشرده با ایندکس زمانی)
+# ------------------------------------------------------------
+#
+
+import bisect
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Deque, Iterator, List, Optional, Tuple
+
+from config.settings import (
+    TICK_RECORDER_DIR, TICK_RECORDER_QUEUE_SIZE, TICK_SEGMENT_MAX_MB,
+    TICK_BLOCK_MAX_MESSAGES
+)
+
+# --- قالب فایل‌ها ---
+# ticks-<first_recv_ms>.seg : دنباله‌ای از بلوک‌های zlib مستقل؛ هر بلوک = خطوط "<recv_ns>\t<پیام خام>\n"
+# ticks-<first_recv_ms>.idx : یک رکورد ثابت برای هر بلوک (ایندکس زمانی پراکنده)
+INDEX_RECORD = struct.Struct('<qqQII')  # first_ns, last_ns, offset, compressed_len, count
+FLUSH_INTERVAL_SECONDS = 1.0
+COMPRESSION_LEVEL = 3
+
+
+class TickRecorder:
+    """
+    ضبط‌کننده فید خام.
+    نخ دریافت فقط (زمان، پیام) را به یک deque محدود اضافه می کند (بدون I/O و بدون قفل)؛
+    فشرده‌سازی و نوشتن در نخ جداگانه انجام می شود. اگر نویسنده عقب بماند،
+    پیام‌های جدید دور ریخته و شمرده می شوند (حافظه محدود، فید هیچ‌وقت منتظر دیسک نمی ماند).
+    """
+
+    def __init__(self, base_dir: str = TICK_RECORDER_DIR, max_pending: int = TICK_RECORDER_QUEUE_SIZE):
+        self.base_dir = base_dir
+        self.max_pending = max_pending
+        self._pending: Deque[Tuple[int, str]] = deque()
+        self.dropped = 0
+        self.recorded = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._seg_file = None
+        self._idx_file = None
+        self._seg_size = 0
+
+    # --- نخ دریافت ---
+
+    def record(self, message: str):
+        """ فراخوانی از نخ فید برای هر پیام خام (O(1)). """
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        if '\n' in message:
+            # (قاب‌بندی خطوط با '\n'؛ در JSON خط جدید خام فقط فاصله بین توکن‌هاست و با فاصله جایگزین می شود)
+            message = message.replace('\n', ' ')
+        self._pending.append((time.time_ns(), message))
+
+    # --- چرخه حیات ---
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._writer_loop, name="tick-recorder", daemon=True)
+        self._thread.start()
+        print(f"✅ ضبط فید خام فعال شد ({self.base_dir}).")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._close_segment()
+        if self.dropped:
+            print(f"⚠️ ضبط فید: {self.dropped} پیام به دلیل پر بودن صف ذخیره نشد.")
+
+    # --- نخ نویسنده ---
+
+    def _writer_loop(self):
+        while not self._stop_event.is_set():
+            self._drain()
+            self._stop_event.wait(FLUSH_INTERVAL_SECONDS)
+        self._drain()
+
+    def _drain(self):
+        pending = self._pending
+        while pending:
+            batch: List[Tuple[int, str]] = []
+            while pending and len(batch) < TICK_BLOCK_MAX_MESSAGES:
+                batch.append(pending.popleft())
+            try:
+                self._write_block(batch)
+            except Exception as e:
+                print(f"❌ خطای نوشتن ضبط فید: {e}")
+
+    def _open_segment(self, first_ns: int):
+        name = f"ticks-{first_ns // 1_000_000}"
+        self._seg_file = open(os.path.join(self.base_dir, name + '.seg'), 'ab')
+        self._idx_file = open(os.path.join(self.base_dir, name + '.idx'), 'ab')
+        self._seg_size = self._seg_file.tell()
+
+    def _close_segment(self):
+        for f in (self._seg_file, self._idx_file):
+            if f is not None:
+                f.close()
+        self._seg_file = None
+        self._idx_file = None
+        self._seg_size = 0
+
+    def _write_block(self, batch: List[Tuple[int, str]]):
+        if not batch:
+            return
+        if self._seg_file is None or self._seg_size >= TICK_SEGMENT_MAX_MB * 1024 * 1024:
+            self._close_segment()
+            self._open_segment(batch[0][0])
+
+        raw = ''.join(f"{ts}\t{msg}\n" for ts, msg in batch).encode('utf-8')
+        block = zlib.compress(raw, COMPRESSION_LEVEL)
+        offset = self._seg_size
+        self._seg_file.write(block)
+        self._seg_file.flush()
+        self._seg_size += len(block)
+        # (ایندکس بعد از داده نوشته می شود: ورودی ایندکس همیشه به یک بلوک کامل اشاره می کند)
+        self._idx_file.write(INDEX_RECORD.pack(batch[0][0], batch[-1][0], offset, len(block), len(batch)))
+        self._idx_file.flush()
+        self.recorded += len(batch)
+
+
+class TickReader:
+    """ خواندن پیام‌های ضبط شده در یک بازه زمانی (فقط بلوک‌های هم‌پوشان از حافظه باز می شوند). """
+
+    def __init__(self, base_dir: str = TICK_RECORDER_DIR):
+        self.base_dir = base_dir
+
+    def _segments(self) -> List[str]:
+        if not os.path.isdir(self.base_dir):
+            return []
+        names = [n[:-4] for n in os.listdir(self.base_dir) if n.startswith('ticks-') and n.endswith('.idx')]
+        return sorted(names, key=lambda n: int(n.split('-')[1]))
+
+    def _index(self, name: str) -> List[Tuple[int, int, int, int, int]]:
+        with open(os.path.join(self.base_dir, name + '.idx'), 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_RECORD.size
+        return [INDEX_RECORD.unpack_from(data, pos) for pos in range(0, usable, INDEX_RECORD.size)]
+
+    def iter_messages(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """ خروجی: (زمان دریافت بر حسب نانوثانیه، پیام خام) به ترتیب زمان. """
+        for name in self._segments():
+            index = self._index(name)
+            if not index:
+                continue
+            if end_ns is not None and index[0][0] > end_ns:
+                break
+            first = 0
+            if start_ns is not None:
+                # (اولین بلوکی که ممکن است پیام >= start داشته باشد)
+                first = bisect.bisect_left([rec[1] for rec in index], start_ns)
+
+            with open(os.path.join(self.base_dir, name + '.seg'), 'rb') as seg:
+                for first_ns, last_ns, offset, length, _count in index[first:]:
+                    if end_ns is not None and first_ns > end_ns:
+                        return
+                    seg.seek(offset)
+                    raw = zlib.decompress(seg.read(length)).decode('utf-8')
+                    # (فقط '\n' جداکننده است؛ splitlines روی U+2028 و ... داخل رشته‌های JSON هم می شکند)
+                    for line in raw.split('\n'):
+                        if not line:
+                            continue
+                        ts_str, _, message = line.partition('\t')
+                        try:
+                            ts = int(ts_str)
+                        except ValueError:
+                            continue  # (خط خراب؛ بقیه بلوک قابل استفاده است)
+                        if start_ns is not None and ts < start_ns:
+                            continue
+                        if end_ns is not None and ts > end_ns:
+                            return
+                        yield ts, message
+
+# --- نمونه سازی ---
+tick_recorder = TickRecorder()
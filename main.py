@@ -23,14 +23,29 @@ sys.path.append(os.path.join(current_dir, 'config'))
 # (ما دیگر به Application تلگرام نیازی نداریم)
 from infra.telegram_bot import telegram_reporter 
 from app.bot_loop import bot_loop # (این فایل را در قدم بعدی می سازیم)
+from app.shard_runner import run_sharded
+from config.settings import SHARD_PROCESSES, ASYNC_RUNTIME, PROFILER_SIGNAL_ENABLED
+from utils.profiler import profiler, install_signal_handler
 
 if __name__ == "__main__":
     print("🚀 ZetaBot V1.0: شروع اجرای ربات (روش همزمان)...")
+
+    # (جدید V2.3) - kill -USR1 <pid> پروفایلر نمونه‌برداری را روشن/خاموش می کند
+    if PROFILER_SIGNAL_ENABLED and install_signal_handler(profiler):
+        print(f"🔬 پروفایلر: kill -USR1 {os.getpid()} برای شروع/توقف")
     
     try:
-        # اجرای BotLoop به صورت مستقیم در نخ اصلی
-        # (دقیقا مانند ربات قبلی شما)
-        bot_loop.start_bot()
+        if SHARD_PROCESSES > 1:
+            # (جدید V2.3) - تقسیم مارکت‌ها بین چند پروسه با بالانس مرکزی
+            run_sharded(SHARD_PROCESSES)
+        elif ASYNC_RUNTIME:
+            # (جدید V2.3) - runtime تک event loop (aiohttp + ccxt async)
+            from app.async_runtime import run_async_bot
+            run_async_bot()
+        else:
+            # اجرای BotLoop به صورت مستقیم در نخ اصلی
+            # (دقیقا مانند ربات قبلی شما)
+            bot_loop.start_bot()
         
     except KeyboardInterrupt:
         bot_loop.stop_bot() # توقف ایمن ربات
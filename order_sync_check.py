@@ -0,0 +1,87 @@
+#
+# ------------------------------------------------------------
+# فایل: order_sync_check.py
+# بررسی همگام‌سازی گروهی سفارش‌های Live (OrderTracker.refresh) با یک صرافی جایگزین (V2.3)
+# اجرا: python order_sync_check.py
+# ------------------------------------------------------------
+#
+
+import sys
+
+import app.order_tracker as order_tracker_module
+from app.order_tracker import OrderTracker
+from infra.exchange_client import exchange_client
+
+
+class StandInAccount:
+    """ پاسخ‌های open-orders / my-trades؛ None = خطای درخواست (مانند ExchangeClient). """
+
+    def __init__(self):
+        self.open_orders = []
+        self.trades = []
+        self.trades_fail = False
+        self.canceled = []
+
+    def fetch_open_orders(self, symbol=None):
+        return list(self.open_orders)
+
+    def fetch_my_trades(self, symbol=None, since=None):
+        if self.trades_fail:
+            return None
+        return [t for t in self.trades if since is None or t['timestamp'] >= since]
+
+    def cancel_orders(self, symbol, order_ids):
+        self.canceled.extend(order_ids)
+        return [{'id': oid, 'status': 'canceled'} for oid in order_ids]
+
+
+def main() -> int:
+    order_tracker_module.PAPER_MODE = False  # (refresh در Paper Mode کاری انجام نمی دهد)
+    account = StandInAccount()
+    exchange_client.fetch_open_orders = account.fetch_open_orders
+    exchange_client.fetch_my_trades = account.fetch_my_trades
+    exchange_client.cancel_orders = account.cancel_orders
+
+    failures = []
+
+    def check(name: str, ok: bool, detail: str):
+        print(f"  {'✅' if ok else '❌'} {name}: {detail}")
+        if not ok:
+            failures.append(name)
+
+    updates = []
+    tracker = OrderTracker()
+    tracker.track({'id': 'E1', 'side': 'buy', 'amount': 0.5}, 'BTC/USDT', 'ENTRY',
+                  lambda tracked, done: updates.append((tracked.order_id, tracked.filled, done)))
+
+    # ۱. سفارش از لیست باز خارج شده ولی درخواست trade ها شکست خورده: نباید «بدون پر شدن» نهایی شود
+    account.trades = [{'id': 'X1', 'order': 'OTHER', 'timestamp': 5000, 'amount': 1.0, 'cost': 1.0}]
+    account.trades_fail = True
+    tracker.refresh()
+    check("خطای my-trades", not updates and 'E1' in tracker.orders,
+          f"به‌روزرسانی‌ها: {updates}، هنوز تحت پیگیری: {'E1' in tracker.orders}")
+
+    # ۲. چرخه بعد: trade سفارش دیگر نشانگر زمان را جلو نمی برد و پر شدن واقعی ثبت می شود
+    account.trades_fail = False
+    account.trades.append({'id': 'T1', 'order': 'E1', 'timestamp': 1000, 'amount': 0.5, 'cost': 50.0})
+    tracker.refresh()
+    check("بازیابی", updates == [('E1', 0.5, True)] and 'E1' not in tracker.orders,
+          f"به‌روزرسانی‌ها: {updates}")
+    check("نشانگر زمان trade", tracker._last_trade_ms == 1000, f"_last_trade_ms={tracker._last_trade_ms}")
+
+    # ۳. لغو گروهی در توقف: سفارش دستی/ربات دیگر همین حساب (در open_orders) لغو نمی شود
+    tracker.track({'id': 'S1', 'side': 'sell', 'amount': 0.5}, 'BTC/USDT', 'EXIT', lambda tracked, done: None)
+    account.open_orders = [{'id': 'S1', 'symbol': 'BTC/USDT'}, {'id': 'MANUAL', 'symbol': 'BTC/USDT'}]
+    tracker.refresh()
+    tracker.cancel_all()
+    check("لغو فقط سفارش‌های ربات", account.canceled == ['S1'], f"لغو شده: {account.canceled}")
+
+    if failures:
+        print(f"🚫 {len(failures)} بررسی ناموفق.")
+        return 1
+    print("✅ همه بررسی‌ها موفق بودند.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
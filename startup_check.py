@@ -0,0 +1,73 @@
+#
+# ------------------------------------------------------------
+# فایل: startup_check.py
+# بررسی بودجه زمان import ماژول‌ها و عدم دسترسی شبکه در زمان import (V2.3)
+# اجرا: python startup_check.py
+# ------------------------------------------------------------
+#
+
+import os
+import subprocess
+import sys
+
+# --- بودجه زمان import هر ماژول (میلی‌ثانیه، شامل وابستگی‌ها) ---
+IMPORT_BUDGETS_MS = {
+    "config.settings": 50,
+    "domain.models": 50,
+    "utils.indicators": 50,
+    "infra.exchange_client": 100,
+    "infra.telegram_bot": 100,
+    "app.state_manager": 150,
+    "app.trading_service": 200,
+    "app.bot_loop": 200,
+}
+
+# (هر اتصال شبکه‌ای در زمان import یک خطا است)
+_PROBE = """
+import socket, sys, time
+def _blocked(*args, **kwargs):
+    raise RuntimeError("network access during import")
+socket.socket.connect = _blocked
+socket.create_connection = _blocked
+t0 = time.perf_counter()
+import {module}
+print("%.1f" % ((time.perf_counter() - t0) * 1000))
+"""
+
+
+def measure(module: str):
+    """ زمان import یک ماژول در یک پروسه تازه (بدون کش ماژول‌های پروسه فعلی). """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, env=env
+    )
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1] if proc.stderr else "unknown error"
+    return float(proc.stdout.strip().splitlines()[-1]), None
+
+
+def main() -> int:
+    failures = 0
+    print(f"⏳ بررسی زمان import ({len(IMPORT_BUDGETS_MS)} ماژول)...")
+    for module, budget_ms in IMPORT_BUDGETS_MS.items():
+        elapsed_ms, error = measure(module)
+        if error:
+            failures += 1
+            print(f"  ❌ {module}: {error}")
+        elif elapsed_ms > budget_ms:
+            failures += 1
+            print(f"  ❌ {module}: {elapsed_ms:.1f}ms > بودجه {budget_ms}ms")
+        else:
+            print(f"  ✅ {module}: {elapsed_ms:.1f}ms (بودجه {budget_ms}ms)")
+
+    if failures:
+        print(f"🚫 {failures} ماژول خارج از بودجه یا با خطا.")
+        return 1
+    print("✅ همه ماژول‌ها در بودجه هستند.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+#
+# ------------------------------------------------------------
+# فایل: utils/call_guard.py
+# (جدید V2.3 - بودجه تأخیر، Circuit Breaker و درخواست‌های تکراری (hedged) برای فراخوانی‌های REST)
+# ------------------------------------------------------------
+#
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Optional
+
+# --- وضعیت‌های مدار ---
+CIRCUIT_CLOSED = "closed"        # عادی
+CIRCUIT_OPEN = "open"            # همه درخواست‌ها بلافاصله رد می شوند
+CIRCUIT_HALF_OPEN = "half_open"  # یک درخواست آزمایشی در جریان است
+
+
+class CircuitOpenError(Exception):
+    """ مدار باز است؛ درخواست ارسال نشد. """
+
+
+class CallTimeoutError(Exception):
+    """ پاسخ در بودجه تأخیر نرسید (درخواست در پس‌زمینه ادامه می یابد و نتیجه‌اش دور ریخته می شود). """
+
+
+class CircuitBreaker:
+    """
+    پس از failure_threshold خطای متوالی باز می شود. پس از reset_seconds فقط یک درخواست
+    آزمایشی عبور می کند: موفقیت → بسته، خطا → دوباره باز.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float,
+                 monotonic: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._monotonic = monotonic
+        self._lock = threading.Lock()
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CIRCUIT_CLOSED:
+                return True
+            if self.state == CIRCUIT_OPEN and self._monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = CIRCUIT_HALF_OPEN
+                return True  # (درخواست آزمایشی)
+            return False
+
+    def record_success(self):
+        with self._lock:
+            recovered = self.state != CIRCUIT_CLOSED
+            self.state = CIRCUIT_CLOSED
+            self.consecutive_failures = 0
+        if recovered:
+            print(f"✅ مدار {self.name} دوباره بسته شد (درخواست آزمایشی موفق).")
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == CIRCUIT_HALF_OPEN or (
+                    self.state == CIRCUIT_CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self.state = CIRCUIT_OPEN
+                self.opened_at = self._monotonic()
+                self.times_opened += 1
+                opened = True
+            else:
+                opened = False
+        if opened:
+            print(f"⛔ مدار {self.name} باز شد ({self.consecutive_failures} خطای متوالی؛ "
+                  f"{self.reset_seconds:.0f} ثانیه درخواست‌ها بلافاصله رد می شوند).")
+
+
+class EndpointMetrics:
+    """ شمارنده‌ها و تأخیرهای اخیر (برای صدک‌ها) یک endpoint. """
+
+    __slots__ = ("calls", "successes", "errors", "timeouts", "rejected", "hedges", "hedge_wins", "_latencies")
+
+    def __init__(self, window: int = 512):
+        self.calls = 0
+        self.successes = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0      # (رد شده توسط مدار باز)
+        self.hedges = 0        # (درخواست‌های تکراری ارسال شده)
+        self.hedge_wins = 0    # (دفعاتی که درخواست تکراری زودتر پاسخ داد)
+        self._latencies = deque(maxlen=window)  # (ثانیه؛ فقط پاسخ‌های موفق)
+
+    def observe(self, latency: float):
+        self._latencies.append(latency)
+
+    def _percentile(self, ordered, q: float) -> Optional[float]:
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self._latencies)
+        return {
+            'calls': self.calls,
+            'successes': self.successes,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'p50_ms': self._percentile(ordered, 0.50),
+            'p95_ms': self._percentile(ordered, 0.95),
+            'p99_ms': self._percentile(ordered, 0.99),
+        }
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """ استخر نخ مشترک همه endpoint ها (در اولین فراخوانی ساخته می شود). """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="guarded-call")
+    return _executor
+
+
+class GuardedEndpoint:
+    """
+    اجرای یک فراخوانی مسدودکننده با:
+      - بودجه تأخیر: فراخوان حداکثر budget_seconds منتظر می ماند (CallTimeoutError)
+      - hedge: اگر تا hedge_after_seconds پاسخی نرسد، همان درخواست یک بار دیگر ارسال
+        و اولین پاسخ موفق استفاده می شود (فقط برای خواندن‌های idempotent)
+      - Circuit Breaker: در زمان خرابی endpoint، CircuitOpenError بدون هیچ انتظاری
+    """
+
+    def __init__(self, name: str, budget_seconds: float, hedge_after_seconds: float = 0.0,
+                 failure_threshold: int = 5, reset_seconds: float = 30.0, max_workers: int = 8):
+        self.name = name
+        self.budget = budget_seconds
+        self.hedge_after = hedge_after_seconds if 0 < hedge_after_seconds < budget_seconds else 0.0
+        self.max_workers = max_workers
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_seconds)
+        self.metrics = EndpointMetrics()
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if not self.breaker.allow():
+            self.metrics.rejected += 1
+            raise CircuitOpenError(f"مدار {self.name} باز است")
+
+        self.metrics.calls += 1
+        executor = _get_executor(self.max_workers)
+        started = time.monotonic()
+        deadline = started + self.budget
+        hedge_at = started + self.hedge_after if self.hedge_after else None
+
+        primary = executor.submit(fn, *args, **kwargs)
+        pending = {primary}
+        last_error: Optional[BaseException] = None
+
+        while True:
+            now = time.monotonic()
+            wake_at = hedge_at if hedge_at is not None else deadline
+            done, pending = wait(pending, timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    self.metrics.successes += 1
+                    self.metrics.observe(time.monotonic() - started)
+                    if future is not primary:
+                        self.metrics.hedge_wins += 1
+                    self.breaker.record_success()
+                    return future.result()
+                last_error = error
+
+            if not pending:
+                # (همه درخواست‌ها با خطا تمام شدند؛ خطای واقعی به فراخوان برمی گردد)
+                self.metrics.errors += 1
+                self.breaker.record_failure()
+                raise last_error
+
+            now = time.monotonic()
+            if now >= deadline:
+                self.metrics.timeouts += 1
+                self.breaker.record_failure()
+                raise CallTimeoutError(f"{self.name}: بدون پاسخ پس از {self.budget:.1f} ثانیه")
+
+            if hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                self.metrics.hedges += 1
+                pending.add(executor.submit(fn, *args, **kwargs))
+
+    def snapshot(self) -> Dict[str, Any]:
+        data = self.metrics.as_dict()
+        data['circuit'] = self.breaker.state
+        data['circuit_opened'] = self.breaker.times_opened
+        return data
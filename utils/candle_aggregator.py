@@ -0,0 +1,122 @@
+#
+# ------------------------------------------------------------
+# فایل: utils/candle_aggregator.py
+# (جدید V2.3 - ساخت کندل‌های تایم‌فریم بالاتر از استریم 1m به صورت افزایشی)
+# ------------------------------------------------------------
+#
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from utils.helpers import timeframe_to_ms
+
+
+class TimeframeAggregator:
+    """
+    تجمیع افزایشی کندل‌های تایم‌فریم پایه (مثلاً 1m) به یک تایم‌فریم بالاتر (مثلاً 15m).
+
+    LBank برای یک دقیقه باز چندین آپدیت kbar می‌فرستد؛ به همین دلیل کندل‌های
+    بسته‌شده‌ی پایه داخل باکت جداگانه نگه داشته می‌شوند و فقط کندل پایه‌ی جاری
+    در هر آپدیت جایگزین می‌شود. هر آپدیت O(1) است.
+
+    بافر خروجی هم‌شکل بافر 1m است: [[ts, o, h, l, c, v], ...]
+    و آخرین عنصر آن کندل در حال شکل‌گیری است.
+    """
+
+    def __init__(self, timeframe: str, maxlen: int):
+        self.timeframe = timeframe
+        self.period_ms = timeframe_to_ms(timeframe)
+        self.candles: Deque[list] = deque(maxlen=maxlen)
+
+        # وضعیت باکت جاری
+        self._bucket_ts: Optional[int] = None
+        self._closed_h = 0.0      # سقف کندل‌های پایه‌ی بسته‌شده در این باکت
+        self._closed_l = 0.0      # کف کندل‌های پایه‌ی بسته‌شده در این باکت
+        self._closed_v = 0.0      # حجم کندل‌های پایه‌ی بسته‌شده در این باکت
+        self._has_closed = False
+        self._open: Optional[float] = None
+        self._current_base: Optional[list] = None  # کندل پایه‌ی جاری (قابل بازنویسی)
+
+    def update(self, base_candle: list) -> Optional[list]:
+        """
+        افزودن/آپدیت یک کندل پایه.
+        اگر با این آپدیت یک کندل تایم‌فریم بالا بسته شود، همان کندل بسته‌شده برگردانده می‌شود.
+        """
+        ts = base_candle[0]
+        bucket_ts = ts - (ts % self.period_ms)
+        closed_candle: Optional[list] = None
+
+        if self._bucket_ts is None or bucket_ts > self._bucket_ts:
+            # باکت جدید: کندل قبلی نهایی شده است
+            if self._bucket_ts is not None and self.candles:
+                closed_candle = self.candles[-1]
+            self._start_bucket(bucket_ts)
+            self.candles.append(None)  # جای کندل در حال شکل‌گیری
+        elif bucket_ts < self._bucket_ts:
+            return None  # داده قدیمی (خارج از ترتیب) نادیده گرفته می‌شود
+        elif self._current_base is not None and ts > self._current_base[0]:
+            # کندل پایه‌ی قبلی بسته شد؛ آن را در تجمیع ثابت باکت ادغام می‌کنیم
+            self._fold_base(self._current_base)
+        elif self._current_base is not None and ts < self._current_base[0]:
+            return None
+
+        self._current_base = base_candle
+        self.candles[-1] = self._build_candle()
+        return closed_candle
+
+    def _start_bucket(self, bucket_ts: int):
+        self._bucket_ts = bucket_ts
+        self._closed_h = 0.0
+        self._closed_l = 0.0
+        self._closed_v = 0.0
+        self._has_closed = False
+        self._current_base = None
+        self._open = None
+
+    def _fold_base(self, base: list):
+        if self._has_closed:
+            self._closed_h = max(self._closed_h, base[2])
+            self._closed_l = min(self._closed_l, base[3])
+        else:
+            self._closed_h = base[2]
+            self._closed_l = base[3]
+            self._has_closed = True
+        self._closed_v += base[5]
+
+    def _build_candle(self) -> list:
+        cur = self._current_base
+        if self._open is None:
+            self._open = cur[1]
+        if self._has_closed:
+            high = max(self._closed_h, cur[2])
+            low = min(self._closed_l, cur[3])
+        else:
+            high, low = cur[2], cur[3]
+        return [self._bucket_ts, self._open, high, low, cur[4], self._closed_v + cur[5]]
+
+
+class MultiTimeframeAggregator:
+    """ مجموعه‌ای از TimeframeAggregator ها برای یک نماد. """
+
+    def __init__(self, base_timeframe: str, timeframes: List[str], maxlen: int):
+        base_ms = timeframe_to_ms(base_timeframe)
+        self.aggregators: Dict[str, TimeframeAggregator] = {}
+        for tf in timeframes:
+            tf_ms = timeframe_to_ms(tf)
+            # فقط مضرب‌های صحیح تایم‌فریم پایه قابل ساخت هستند
+            if tf_ms <= base_ms or tf_ms % base_ms != 0:
+                print(f"⚠️ تایم‌فریم {tf} از {base_timeframe} قابل ساخت نیست و نادیده گرفته شد.")
+                continue
+            self.aggregators[tf] = TimeframeAggregator(tf, maxlen)
+
+    def update(self, base_candle: list) -> List[Tuple[str, list]]:
+        """ خروجی: لیست (تایم‌فریم، کندل بسته‌شده) برای تایم‌فریم‌هایی که در این آپدیت بسته شدند. """
+        closed = []
+        for tf, agg in self.aggregators.items():
+            candle = agg.update(base_candle)
+            if candle is not None:
+                closed.append((tf, candle))
+        return closed
+
+    def candles(self, timeframe: str) -> List[list]:
+        agg = self.aggregators.get(timeframe)
+        return list(agg.candles) if agg else []
@@ -0,0 +1,63 @@
+#
+# ------------------------------------------------------------
+# فایل: utils/clock.py
+# (جدید V2.3 - ساعت قابل تزریق: ساعت سیستم در اجرای زنده، ساعت مجازی در بازپخش)
+# ------------------------------------------------------------
+#
+
+import time
+from typing import Optional
+
+
+class VirtualClock:
+    """
+    ساعت مجازی برای بازپخش قطعی: زمان فقط با set/advance جلو می رود.
+    monotonic همان زمان مجازی است (هرگز به عقب برنمی گردد).
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def set(self, now: float):
+        if now > self._now:
+            self._now = float(now)
+
+    def advance(self, seconds: float):
+        if seconds > 0:
+            self._now += seconds
+
+
+class Clock:
+    """
+    ساعت مشترک ماژول‌ها. به صورت پیش‌فرض time.time/time.monotonic سیستم است؛
+    با use() یک منبع دیگر (مثلاً VirtualClock) جایگزین می شود.
+    (ماژول‌ها خود این شیء را وارد می کنند، پس جایگزینی منبع بدون import مجدد اثر دارد.)
+    """
+
+    def __init__(self):
+        self._source: Optional[VirtualClock] = None
+
+    def time(self) -> float:
+        source = self._source
+        return source.time() if source is not None else time.time()
+
+    def monotonic(self) -> float:
+        source = self._source
+        return source.monotonic() if source is not None else time.monotonic()
+
+    def use(self, source: Optional[VirtualClock]):
+        """ نصب منبع زمان (None = بازگشت به ساعت سیستم). """
+        self._source = source
+
+    @property
+    def is_virtual(self) -> bool:
+        return self._source is not None
+
+# --- نمونه سازی ---
+clock = Clock()
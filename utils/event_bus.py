@@ -0,0 +1,212 @@
+#
+# ------------------------------------------------------------
+# فایل: utils/event_bus.py
+# (جدید V2.3 - گذرگاه رویداد داخلی تایپ‌شده با صف محدود هر مشترک و تحویل دسته‌ای)
+# ------------------------------------------------------------
+#
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import (
+    EVENT_BUS_QUEUE_SIZE, EVENT_BUS_BATCH_SIZE, EVENT_BUS_BLOCK_TIMEOUT_SECONDS
+)
+
+# --- سیاست‌های فشار برگشتی (وقتی صف مشترک پر است) ---
+POLICY_DROP_OLDEST = "drop_oldest"   # قدیمی‌ترین رویداد صف حذف می شود (مناسب وضعیت/متریک)
+POLICY_DROP_NEWEST = "drop_newest"   # رویداد جدید رد می شود
+POLICY_BLOCK = "block"               # تولیدکننده حداکثر block_timeout منتظر می ماند، سپس رد (مناسب ضبط)
+POLICIES = (POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_BLOCK)
+
+# امضای handler: لیست رویدادها (حداکثر batch_size، به ترتیب انتشار)
+BatchHandler = Callable[[List[Any]], None]
+
+
+class Subscription:
+    """
+    یک مرحله مصرف‌کننده: صف محدود + نخ تحویل جداگانه.
+    تولیدکننده فقط رویداد را در صف می گذارد؛ اجرای handler (هرچقدر کند) روی نخ
+    همین مشترک انجام می شود و با سیاست فشار برگشتی، نخ فید را متوقف نمی کند.
+    """
+
+    def __init__(self, name: str, event_types: Tuple[type, ...], handler: BatchHandler,
+                 queue_size: int, policy: str, batch_size: int, block_timeout: float):
+        if policy not in POLICIES:
+            raise ValueError(f"سیاست ناشناخته: {policy}")
+        self.name = name
+        self.event_types = event_types
+        self.handler = handler
+        self.queue_size = max(1, queue_size)
+        self.policy = policy
+        self.batch_size = max(1, batch_size)
+        self.block_timeout = block_timeout
+
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._running = True
+        self._thread = threading.Thread(target=self._deliver_loop, name=f"bus-{name}", daemon=True)
+
+        # --- آمار (فقط زیر قفل صف یا از نخ تحویل نوشته می شوند) ---
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.batches = 0
+        self.handler_errors = 0
+        self.max_depth = 0
+        self.blocked_seconds = 0.0
+
+    def start(self):
+        self._thread.start()
+
+    # --- سمت تولیدکننده ---
+
+    def offer(self, event: Any) -> bool:
+        """ افزودن رویداد به صف؛ False اگر طبق سیاست رد شد. """
+        with self._lock:
+            if not self._running:
+                return False
+            self.published += 1
+            if len(self._queue) >= self.queue_size:
+                if self.policy == POLICY_DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                if self.policy == POLICY_DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    started = time.monotonic()
+                    deadline = started + self.block_timeout
+                    while len(self._queue) >= self.queue_size and self._running:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._not_full.wait(remaining)
+                    self.blocked_seconds += time.monotonic() - started
+                    if len(self._queue) >= self.queue_size or not self._running:
+                        self.dropped += 1
+                        return False
+            self._queue.append(event)
+            depth = len(self._queue)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._not_empty.notify()
+        return True
+
+    # --- سمت مصرف‌کننده ---
+
+    def _deliver_loop(self):
+        while True:
+            with self._lock:
+                while not self._queue and self._running:
+                    self._not_empty.wait()
+                if not self._queue:
+                    return  # (متوقف شده و صف خالی است)
+                n = min(self.batch_size, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(n)]
+                if self.policy == POLICY_BLOCK:
+                    self._not_full.notify_all()
+            try:
+                self.handler(batch)
+            except Exception as e:
+                self.handler_errors += 1
+                if self.handler_errors == 1 or self.handler_errors % 1000 == 0:
+                    print(f"❌ خطای مشترک رویداد {self.name} ({self.handler_errors} خطا): {e}")
+            self.delivered += n
+            self.batches += 1
+
+    def stop(self, drain: bool = True, timeout: float = 2.0):
+        """ توقف نخ تحویل؛ با drain=True رویدادهای باقی‌مانده صف ابتدا تحویل می شوند. """
+        with self._lock:
+            self._running = False
+            if not drain:
+                self.dropped += len(self._queue)
+                self._queue.clear()
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'events': [t.__name__ for t in self.event_types],
+            'policy': self.policy,
+            'depth': len(self._queue),
+            'max_depth': self.max_depth,
+            'queue_size': self.queue_size,
+            'published': self.published,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'handler_errors': self.handler_errors,
+            'blocked_seconds': round(self.blocked_seconds, 3),
+        }
+
+
+class EventBus:
+    """
+    مسیریابی رویداد بر اساس نوع دقیق (type(event)) به مشترکین.
+    - publish بدون قفل است: جدول مسیرها با هر subscribe/unsubscribe به صورت کامل
+      جایگزین می شود (copy-on-write) و فقط مرجع آن خوانده می شود.
+    - wants(نوع) برای مسیر داغ: اگر مشترکی نباشد، رویداد اصلاً ساخته نمی شود.
+    - مراحل پروسه‌ای: handler می تواند هر دسته را به یک multiprocessing.Queue/Pipe بفرستد.
+    """
+
+    def __init__(self):
+        self._routes: Dict[type, Tuple[Subscription, ...]] = {}
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, name: str, event_types: Iterable[type], handler: BatchHandler,
+                  queue_size: int = EVENT_BUS_QUEUE_SIZE, policy: str = POLICY_DROP_OLDEST,
+                  batch_size: int = EVENT_BUS_BATCH_SIZE,
+                  block_timeout: float = EVENT_BUS_BLOCK_TIMEOUT_SECONDS) -> Subscription:
+        """ ثبت یک مرحله جدید؛ نخ تحویل آن بلافاصله شروع می شود. """
+        sub = Subscription(name, tuple(event_types), handler, queue_size, policy, batch_size, block_timeout)
+        sub.start()
+        with self._lock:
+            self._subscriptions.append(sub)
+            self._rebuild_routes()
+        return sub
+
+    def unsubscribe(self, sub: Subscription, drain: bool = True):
+        with self._lock:
+            if sub not in self._subscriptions:
+                return
+            self._subscriptions.remove(sub)
+            self._rebuild_routes()
+        sub.stop(drain)
+
+    def _rebuild_routes(self):
+        routes: Dict[type, Tuple[Subscription, ...]] = {}
+        for sub in self._subscriptions:
+            for event_type in sub.event_types:
+                routes[event_type] = routes.get(event_type, ()) + (sub,)
+        self._routes = routes
+
+    def wants(self, event_type: type) -> bool:
+        return event_type in self._routes
+
+    def publish(self, event: Any):
+        subs = self._routes.get(type(event))
+        if subs:
+            for sub in subs:
+                sub.offer(event)
+
+    def stop(self, drain: bool = True):
+        """ توقف همه مشترکین (از stop_bot). """
+        with self._lock:
+            subs = self._subscriptions
+            self._subscriptions = []
+            self._routes = {}
+        for sub in subs:
+            sub.stop(drain)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {sub.name: sub.snapshot() for sub in self._subscriptions}
+
+# --- نمونه سازی ---
+event_bus = EventBus()
@@ -0,0 +1,278 @@
+#
+# ------------------------------------------------------------
+# فایل: utils/feed_monitor.py
+# (جدید V2.3 - پایش تازگی فید هر نماد، تأخیر صرافی و RTT ضربان WebSocket)
+# ------------------------------------------------------------
+#
+
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from config.settings import (
+    FEED_STALE_SECONDS, FEED_SWEEP_INTERVAL_SECONDS, FEED_RECOVERY_SECONDS,
+    FEED_HEARTBEAT_INTERVAL_SECONDS, FEED_TS_UTC_OFFSET_HOURS
+)
+from infra.telegram_bot import telegram_reporter
+from utils.clock import clock
+
+# (مرزهای سطل‌های هیستوگرام بر حسب میلی‌ثانیه؛ آخرین سطل = بیشتر از آخرین مرز)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+HEARTBEAT_ID_PREFIX = "zb-"
+
+
+class LatencyHistogram:
+    """ هیستوگرام سطل ثابت: ثبت O(تعداد سطل‌ها) بدون تخصیص حافظه؛ صدک‌ها = مرز بالای سطل. """
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float):
+        i = 0
+        for bound in LATENCY_BUCKETS_MS:
+            if value_ms <= bound:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                # (مرز بالای سطل، محدود به بیشینه مشاهده شده)
+                return round(min(float(LATENCY_BUCKETS_MS[i]), self.max_ms) if i < len(LATENCY_BUCKETS_MS) else self.max_ms, 1)
+        return round(self.max_ms, 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 1) if self.count else None,
+            'p50_ms': self.percentile(0.50),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 1),
+            'buckets': dict(zip([f"<={b}" for b in LATENCY_BUCKETS_MS] + ["inf"], self.counts)),
+        }
+
+
+class SymbolFeed:
+    """ وضعیت فید یک نماد (زمان‌ها بر اساس clock.monotonic). """
+
+    __slots__ = ("symbol", "last_update", "updates", "lag", "stale", "stale_since", "recovering_since")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.last_update: Optional[float] = None   # (None = هنوز kbar دریافت نشده)
+        self.updates = 0
+        self.lag = LatencyHistogram()
+        self.stale = False
+        self.stale_since = 0.0
+        self.recovering_since: Optional[float] = None
+
+
+def _parse_exchange_ts(value: str) -> Optional[float]:
+    """ برچسب TS صرافی ('2024-05-01T00:00:00.123') → ثانیه یونیکس. """
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp() - FEED_TS_UTC_OFFSET_HOURS * 3600.0
+
+
+class FeedMonitor:
+    """
+    - مسیر فید (on_kbar): فقط به‌روزرسانی چند فیلد و در صورت وجود TS یک ثبت هیستوگرام.
+    - sweep(): یک پیمایش ساده روی همه نمادها (هر FEED_SWEEP_INTERVAL_SECONDS، از مسیر فید
+      و حلقه زمان‌بندی شده) که نمادهای کهنه را در مجموعه blocked قرار می دهد.
+    - بررسی ورود (is_blocked) فقط عضویت در یک set است.
+    نماد پس از بازگشت فید تا FEED_RECOVERY_SECONDS مسدود می ماند (بافر کندل آن وقفه دارد).
+    """
+
+    def __init__(self, stale_seconds: float = FEED_STALE_SECONDS,
+                 sweep_interval: float = FEED_SWEEP_INTERVAL_SECONDS,
+                 recovery_seconds: float = FEED_RECOVERY_SECONDS,
+                 heartbeat_interval: float = FEED_HEARTBEAT_INTERVAL_SECONDS):
+        self.stale_seconds = stale_seconds
+        self.sweep_interval = sweep_interval
+        self.recovery_seconds = recovery_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.feeds: Dict[str, SymbolFeed] = {}
+        self.blocked: Set[str] = set()
+        self._started_at: Optional[float] = None   # (اولین پیام فید؛ مبنای نمادهای بدون kbar)
+        self._next_sweep = 0.0
+        self._sweep_lock = threading.Lock()  # (نخ فید و حلقه زمان‌بندی شده؛ sweep همزمان رد می شود)
+        self.sweeps = 0
+        self.stale_events = 0
+        self._pending_alerts: List[str] = []  # (نمادهای تازه کهنه شده؛ هشدار از حلقه زمان‌بندی شده)
+        # --- ضربان ---
+        self.rtt = LatencyHistogram()
+        self.last_rtt_ms: Optional[float] = None
+        self._ping_seq = 0
+        self._pending_pings: Dict[str, float] = {}
+        self._next_heartbeat = 0.0
+        self.server_pings = 0
+        self.last_server_ping: Optional[float] = None
+
+    def register(self, symbols: List[str]):
+        """ نمادهای فعال ('BTC/USDT'). """
+        for symbol in symbols:
+            if symbol not in self.feeds:
+                self.feeds[symbol] = SymbolFeed(symbol)
+
+    # --- مسیر فید ---
+
+    def on_message(self, now: float):
+        """ هر پیام فید (شامل ping): مبنای زمان و sweep دوره‌ای. """
+        if self._started_at is None:
+            self._started_at = now
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+    def on_kbar(self, symbol: str, now: float, exchange_ts: Optional[str] = None):
+        feed = self.feeds.get(symbol)
+        if feed is None:
+            return
+        feed.last_update = now
+        feed.updates += 1
+        if feed.stale:
+            self._mark_recovering(feed, now)
+        if exchange_ts:
+            sent_at = _parse_exchange_ts(exchange_ts)
+            if sent_at is not None:
+                feed.lag.observe(max(0.0, (clock.time() - sent_at) * 1000.0))
+
+    def is_blocked(self, symbol: str) -> bool:
+        return symbol in self.blocked
+
+    # --- بررسی دوره‌ای ---
+
+    def sweep(self, now: float):
+        """ بررسی یکجای همه نمادها؛ O(تعداد نمادها) با یک تفریق برای هر نماد. """
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sweep = now + self.sweep_interval
+            self.sweeps += 1
+            if self._started_at is not None:
+                self._sweep_feeds(now)
+        finally:
+            self._sweep_lock.release()
+
+    def _sweep_feeds(self, now: float):
+        deadline = now - self.stale_seconds
+        for feed in self.feeds.values():
+            last = feed.last_update if feed.last_update is not None else self._started_at
+            if not feed.stale:
+                if last < deadline:
+                    self._mark_stale(feed, now, last)
+            elif feed.recovering_since is not None:
+                if last < deadline:
+                    feed.recovering_since = None  # (دوباره قطع شد)
+                elif now - feed.recovering_since >= self.recovery_seconds:
+                    self._mark_fresh(feed, now)
+
+    def _mark_stale(self, feed: SymbolFeed, now: float, last: float):
+        feed.stale = True
+        feed.stale_since = now
+        feed.recovering_since = None
+        self.blocked.add(feed.symbol)
+        self.stale_events += 1
+        detail = f"{now - last:.0f} ثانیه بدون kbar"
+        print(f"🧊 فید {feed.symbol} کهنه است ({detail}؛ ورود جدید مسدود شد.)")
+        self._pending_alerts.append(f"{feed.symbol}: {detail}")
+
+    def send_pending_alerts(self):
+        """
+        یک هشدار تلگرام برای همه نمادهای تازه کهنه شده. فقط از حلقه زمان‌بندی شده
+        فراخوانی می شود (ارسال همزمان تلگرام نباید نخ فید را متوقف کند).
+        """
+        with self._sweep_lock:
+            alerts, self._pending_alerts = self._pending_alerts, []
+        if alerts:
+            telegram_reporter.send_error_report(f"فید کهنه ({len(alerts)} نماد)",
+                                                "\n".join(alerts) + "\nورود جدید این نمادها مسدود شد.")
+
+    def _mark_recovering(self, feed: SymbolFeed, now: float):
+        if feed.recovering_since is None:
+            feed.recovering_since = now
+            print(f"🔄 فید {feed.symbol} برگشت؛ ورود پس از {self.recovery_seconds:.0f} ثانیه به‌روزرسانی پیوسته آزاد می شود.")
+
+    def _mark_fresh(self, feed: SymbolFeed, now: float):
+        feed.stale = False
+        feed.recovering_since = None
+        self.blocked.discard(feed.symbol)
+        print(f"✅ فید {feed.symbol} پس از {now - feed.stale_since:.0f} ثانیه دوباره تازه است.")
+
+    # --- ضربان (ping/pong) ---
+
+    def on_server_ping(self, now: float):
+        self.server_pings += 1
+        self.last_server_ping = now
+
+    def heartbeat_message(self, now: float) -> Optional[str]:
+        """ پیام ping کلاینت اگر زمان آن رسیده باشد (از حلقه زمان‌بندی شده). """
+        if now < self._next_heartbeat:
+            return None
+        self._next_heartbeat = now + self.heartbeat_interval
+        self._ping_seq += 1
+        ping_id = f"{HEARTBEAT_ID_PREFIX}{self._ping_seq}"
+        # (pingهای بی‌پاسخ قدیمی حذف می شوند تا دیکشنری رشد نکند)
+        for old_id, sent in list(self._pending_pings.items()):
+            if now - sent > 10 * self.heartbeat_interval:
+                self._pending_pings.pop(old_id, None)
+        self._pending_pings[ping_id] = now
+        return json.dumps({'action': 'ping', 'ping': ping_id})
+
+    def on_pong(self, ping_id: Any, now: float):
+        sent = self._pending_pings.pop(ping_id, None) if isinstance(ping_id, str) else None
+        if sent is None:
+            return
+        self.last_rtt_ms = (now - sent) * 1000.0
+        self.rtt.observe(self.last_rtt_ms)
+
+    # --- گزارش ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = clock.monotonic()
+        symbols = {}
+        for symbol, feed in self.feeds.items():
+            lag = feed.lag
+            symbols[symbol] = {
+                'age_seconds': round(now - feed.last_update, 1) if feed.last_update is not None else None,
+                'updates': feed.updates,
+                'stale': feed.stale,
+                'lag_p50_ms': lag.percentile(0.50),
+                'lag_p99_ms': lag.percentile(0.99),
+                'lag_max_ms': round(lag.max_ms, 1),
+            }
+        return {
+            'blocked': sorted(self.blocked),
+            'stale_events': self.stale_events,
+            'heartbeat': {
+                'last_rtt_ms': round(self.last_rtt_ms, 1) if self.last_rtt_ms is not None else None,
+                'rtt': self.rtt.as_dict(),
+                'pending': len(self._pending_pings),
+                'server_pings': self.server_pings,
+                'last_server_ping_age': (round(now - self.last_server_ping, 1)
+                                         if self.last_server_ping is not None else None),
+            },
+            'symbols': symbols,
+        }
+
+# --- نمونه سازی ---
+feed_monitor = FeedMonitor()
@@ -58,3 +58,14 @@ def calculate_pnl(entry_price: float, exit_price: float, size_usdt: float) -> Tu
     pnl_usdt = (pnl_pct / 100.0) * size_usdt
     
     return pnl_pct, pnl_usdt
+
+
+# (جدید V2.3) - تبدیل تایم‌فریم به میلی‌ثانیه
+_TIMEFRAME_UNITS_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000}
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """ تبدیل رشته تایم‌فریم ccxt (مثلاً '1m', '15m', '1h') به میلی‌ثانیه. """
+    unit = timeframe[-1]
+    if unit not in _TIMEFRAME_UNITS_MS:
+        raise ValueError(f"تایم‌فریم ناشناخته: {timeframe}")
+    return int(timeframe[:-1]) * _TIMEFRAME_UNITS_MS[unit]
@@ -4,8 +4,6 @@
 # (جدید V2.0 - محاسبه اندیکاتورهای مورد نیاز استراتژی)
 # ------------------------------------------------------------
 #
-import pandas as pd
-import numpy as np
 from typing import List, Dict, Any
 
 # --- پارامترهای ثابت اندیکاتور (توافق نهایی) ---
@@ -24,6 +22,10 @@ def calculate_all_indicators(candles_list: List[list]) -> Dict[str, Any]:
     if not candles_list or len(candles_list) < max(BB_PERIOD, EMA_SLOW_PERIOD):
         return {} # داده کافی برای محاسبه وجود ندارد
 
+    # (V2.3) - pandas/numpy فقط در اولین محاسبه وارد می شوند (import سبک در زمان راه‌اندازی)
+    import pandas as pd
+    import numpy as np
+
     # تبدیل به DataFrame برای محاسبات سریع
     try:
         df = pd.DataFrame(candles_list, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
@@ -0,0 +1,152 @@
+#
+# ------------------------------------------------------------
+# فایل: utils/market_scanner.py
+# (جدید V2.3 - اسکن کامل مارکت‌های USDT با کندل، اسپرد و امتیازدهی برداری)
+# ------------------------------------------------------------
+#
+
+import heapq
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import (
+    SCANNER_TIMEFRAME, SCANNER_CANDLES, SCANNER_CONCURRENCY,
+    SCANNER_MIN_REQUEST_INTERVAL, SCANNER_CACHE_TTL_SECONDS
+)
+
+# وزن ویژگی‌ها در امتیاز نهایی (روی z-score هر ویژگی)
+W_VOLATILITY = 1.0   # نوسان تحقق‌یافته اخیر
+W_TREND = 1.0        # قدرت روند (نسبت کارایی قیمت)
+W_LIQUIDITY = 0.5    # لگاریتم حجم دلاری ۲۴ ساعت
+W_SPREAD = 1.0       # (منفی) اسپرد bid/ask
+
+
+class _RequestPacer:
+    """ فاصله حداقل بین درخواست‌ها (مشترک بین همه نخ‌ها) تا زیر محدودیت نرخ صرافی بمانیم. """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class MarketScanner:
+    """
+    اسکن همه مارکت‌های USDT:
+      ۱. یک fetch_tickers برای کل بازار (حجم، bid/ask) و حذف اولیه مارکت‌های کم‌حجم
+      ۲. کندل‌های اخیر هر مارکت با همزمانی محدود و کش TTL
+      ۳. امتیازدهی برداری (numpy) روی ماتریس قیمت‌های پایانی
+      ۴. انتخاب n برتر با heap (بدون مرتب‌سازی کامل)
+    """
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self._cache: Dict[str, Tuple[float, List[list]]] = {}  # {symbol: (زمان monotonic، کندل‌ها)}
+        self._pacer = _RequestPacer(SCANNER_MIN_REQUEST_INTERVAL)
+        self.last_scores: Dict[str, Dict[str, float]] = {}
+
+    # --- دریافت داده ---
+
+    def _fetch_ohlcv(self, symbol: str) -> Optional[List[list]]:
+        cached = self._cache.get(symbol)
+        if cached is not None and time.monotonic() - cached[0] < SCANNER_CACHE_TTL_SECONDS:
+            return cached[1]
+        self._pacer.wait()
+        try:
+            candles = self.exchange.fetch_ohlcv(symbol, timeframe=SCANNER_TIMEFRAME, limit=SCANNER_CANDLES)
+        except Exception as e:
+            print(f"خطای fetch_ohlcv در اسکنر برای {symbol}: {e}")
+            return None
+        self._cache[symbol] = (time.monotonic(), candles)
+        return candles
+
+    def _fetch_all(self, symbols: List[str]) -> Dict[str, List[list]]:
+        with ThreadPoolExecutor(max_workers=SCANNER_CONCURRENCY, thread_name_prefix="scanner") as pool:
+            results = pool.map(self._fetch_ohlcv, symbols)
+            return {s: c for s, c in zip(symbols, results) if c and len(c) >= 3}
+
+    # --- امتیازدهی ---
+
+    @staticmethod
+    def _score(closes_by_symbol: Dict[str, List[float]], features: Dict[str, Tuple[float, float]]) -> Dict[str, Dict[str, float]]:
+        """ features: {symbol: (حجم دلاری، اسپرد درصد)}. همه ویژگی‌ها به صورت ستونی محاسبه می شوند. """
+        import numpy as np
+
+        symbols = list(closes_by_symbol.keys())
+        width = max(len(c) for c in closes_by_symbol.values())
+        # (ماتریس m × width؛ سری‌های کوتاه‌تر از ابتدا با اولین قیمت پر می شوند)
+        closes = np.empty((len(symbols), width))
+        for i, s in enumerate(symbols):
+            series = closes_by_symbol[s]
+            closes[i, width - len(series):] = series
+            closes[i, :width - len(series)] = series[0]
+
+        log_p = np.log(np.clip(closes, 1e-12, None))
+        rets = np.diff(log_p, axis=1)
+        volatility = rets.std(axis=1) * 100.0                        # نوسان تحقق‌یافته (% هر کندل)
+        path = np.abs(rets).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            trend = np.where(path > 0, np.abs(log_p[:, -1] - log_p[:, 0]) / path, 0.0)  # نسبت کارایی 0..1
+        liquidity = np.log10(np.array([max(features[s][0], 1.0) for s in symbols]))
+        spread = np.array([features[s][1] for s in symbols])
+
+        def _z(x):
+            sd = x.std()
+            return (x - x.mean()) / sd if sd > 0 else np.zeros_like(x)
+
+        score = (W_VOLATILITY * _z(volatility) + W_TREND * _z(trend)
+                 + W_LIQUIDITY * _z(liquidity) - W_SPREAD * _z(spread))
+
+        return {
+            s: {
+                'score': float(score[i]),
+                'volatility_pct': float(volatility[i]),
+                'trend': float(trend[i]),
+                'quote_volume': float(features[s][0]),
+                'spread_pct': float(spread[i]),
+            }
+            for i, s in enumerate(symbols)
+        }
+
+    # --- اسکن ---
+
+    def scan(self, tickers: Dict[str, Dict[str, Any]], candidates: Dict[str, float], n: int) -> List[str]:
+        """
+        candidates: {symbol: حجم دلاری} (بعد از فیلتر اولیه).
+        خروجی: n نماد برتر به فرمت ccxt ('BTC/USDT').
+        """
+        started = time.monotonic()
+        features: Dict[str, Tuple[float, float]] = {}
+        for symbol, quote_volume in candidates.items():
+            t = tickers.get(symbol, {})
+            bid, ask = t.get('bid'), t.get('ask')
+            if bid and ask and ask > 0 and bid > 0:
+                spread_pct = (ask - bid) / ((ask + bid) / 2.0) * 100.0
+            else:
+                spread_pct = 1.0  # (بدون bid/ask: اسپرد محافظه‌کارانه)
+            features[symbol] = (quote_volume, spread_pct)
+
+        candles = self._fetch_all(list(candidates.keys()))
+        if not candles:
+            return []
+        closes = {s: [float(c[4]) for c in rows if c[4]] for s, rows in candles.items()}
+        closes = {s: c for s, c in closes.items() if len(c) >= 3}
+        if not closes:
+            return []
+
+        self.last_scores = self._score(closes, features)
+        top = heapq.nlargest(n, self.last_scores.items(), key=lambda kv: kv[1]['score'])
+        print(f"🔎 اسکن {len(candidates)} مارکت در {time.monotonic() - started:.1f} ثانیه "
+              f"({len(candles)} سری کندل، {SCANNER_CONCURRENCY} درخواست همزمان).")
+        return [symbol for symbol, info in top if not math.isnan(info['score'])]
@@ -5,8 +5,11 @@
 # ------------------------------------------------------------
 #
 from __future__ import annotations
+import heapq
 import time
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
+
+from config.settings import MARKET_SCANNER_ENABLED
 
 # توکن های اهرمی یا شورت را حذف می کنیم
 BAD_TOKENS = ("UP/", "DOWN/", "BULL/", "BEAR/", "3L/", "3S/")
@@ -44,6 +47,16 @@ def _volume_from_ticker(t: dict) -> float:
     except Exception:
         return 0.0
 
+# (V2.3) - اسکنر مشترک بین فراخوانی‌ها تا کش کندل‌ها حفظ شود
+_scanner = None
+
+def _get_scanner(exchange):
+    global _scanner
+    if _scanner is None or _scanner.exchange is not exchange:
+        from utils.market_scanner import MarketScanner
+        _scanner = MarketScanner(exchange)
+    return _scanner
+
 def pick_top_pairs(exchange, n: int = 25, min_quote_vol: float = 500_000.0) -> List[str]:
     """
     25 مارکت برتر USDT را بر اساس حجم و نوسان انتخاب می کند.
@@ -58,6 +71,7 @@ def pick_top_pairs(exchange, n: int = 25, min_quote_vol: float = 500_000.0) -> L
         return ["btc_usdt"] # بازگشت به حالت امن
 
     pairs: List[Tuple[str, float]] = []
+    candidates: Dict[str, float] = {}
     
     try:
         tickers = exchange.fetch_tickers()
@@ -73,17 +87,27 @@ def pick_top_pairs(exchange, n: int = 25, min_quote_vol: float = 500_000.0) -> L
         if vol_q < min_quote_vol: # حذف مارکت های با حجم کم
             continue
             
+        candidates[symbol] = vol_q
         volat = _volatility_from_ticker(t)
         
         # امتیازدهی: (حجم * نوسان)
         score = vol_q * max(0.0001, volat) 
         pairs.append((symbol, score))
 
-    # مرتب سازی بر اساس بیشترین امتیاز
-    pairs.sort(key=lambda x: x[1], reverse=True)
+    # (V2.3) - اسکن کامل با کندل‌ها؛ در صورت خطا، امتیاز ساده تیکر
+    selected: Optional[List[str]] = None
+    if MARKET_SCANNER_ENABLED and candidates:
+        try:
+            selected = _get_scanner(exchange).scan(tickers, candidates, n) or None
+        except Exception as e:
+            print(f"خطای اسکنر مارکت‌ها: {e} (استفاده از امتیاز تیکر)")
+
+    if selected is None:
+        # n امتیاز برتر با heap (بدون مرتب‌سازی کامل)
+        selected = [sym for sym, _ in heapq.nlargest(n, pairs, key=lambda x: x[1])]
     
     # تبدیل فرمت 'BTC/USDT' به 'btc_usdt'
-    top = [sym.replace("/", "_").lower() for sym, _ in pairs[:n]]
+    top = [sym.replace("/", "_").lower() for sym in selected]
     
     if not top:
         print("🚫 هیچ مارکتی با حداقل حجم یافت نشد. فقط از btc_usdt استفاده می شود.")
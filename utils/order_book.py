@@ -0,0 +1,166 @@
+#
+# ------------------------------------------------------------
+# فایل: utils/order_book.py
+# (جدید V2.3 - دفتر سفارش L2 سبک با آرایه‌های مرتب برای کانال depth)
+# ------------------------------------------------------------
+#
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+
+class _BookSide:
+    """
+    یک سمت دفتر سفارش (bid یا ask) در قالب دو آرایه فشرده و مرتب.
+
+    کلید مرتب‌سازی برای ask ها خود قیمت و برای bid ها منفی قیمت است؛
+    بنابراین در هر دو سمت بهترین قیمت همیشه در اندیس صفر قرار دارد.
+    مجموع تجمعی حجم و ارزش دلاری به صورت تنبل (فقط پس از تغییر) بازسازی می‌شود
+    تا پرس‌وجوی قیمت پر شدن با یک bisect در O(log n) انجام شود.
+    """
+
+    def __init__(self, is_bid: bool, max_levels: int):
+        self.is_bid = is_bid
+        self.max_levels = max_levels
+        self.keys = array('d')    # قیمت (یا منفی قیمت برای bid)
+        self.sizes = array('d')   # حجم هر سطح (بر حسب کوین)
+        self._cum_qty = array('d')
+        self._cum_notional = array('d')
+        self._dirty = True
+
+    def _key(self, price: float) -> float:
+        return -price if self.is_bid else price
+
+    def price_at(self, index: int) -> float:
+        key = self.keys[index]
+        return -key if self.is_bid else key
+
+    def replace(self, levels: Iterable[Tuple[float, float]]):
+        """ جایگزینی کامل سمت دفتر (اسنپ‌شات). """
+        clean = sorted(
+            ((self._key(float(p)), float(q)) for p, q in levels if float(q) > 0),
+            key=lambda x: x[0]
+        )[:self.max_levels]
+        self.keys = array('d', (k for k, _ in clean))
+        self.sizes = array('d', (q for _, q in clean))
+        self._dirty = True
+
+    def apply(self, price: float, size: float):
+        """ اعمال تغییر یک سطح (size=0 یعنی حذف سطح). """
+        key = self._key(float(price))
+        size = float(size)
+        i = bisect_left(self.keys, key)
+        exists = i < len(self.keys) and self.keys[i] == key
+
+        if size <= 0:
+            if exists:
+                del self.keys[i]
+                del self.sizes[i]
+                self._dirty = True
+            return
+
+        if exists:
+            self.sizes[i] = size
+        else:
+            if i >= self.max_levels:
+                return  # خارج از عمق نگهداری شده
+            self.keys.insert(i, key)
+            self.sizes.insert(i, size)
+            if len(self.keys) > self.max_levels:
+                self.keys.pop()
+                self.sizes.pop()
+        self._dirty = True
+
+    def _rebuild(self):
+        cum_qty = array('d')
+        cum_notional = array('d')
+        total_q = 0.0
+        total_n = 0.0
+        for i in range(len(self.keys)):
+            q = self.sizes[i]
+            total_q += q
+            total_n += q * self.price_at(i)
+            cum_qty.append(total_q)
+            cum_notional.append(total_n)
+        self._cum_qty = cum_qty
+        self._cum_notional = cum_notional
+        self._dirty = False
+
+    def fill(self, amount_usdt: float, limit_price: Optional[float] = None) -> Tuple[float, float]:
+        """
+        شبیه‌سازی پر شدن یک سفارش taker به ارزش amount_usdt روی این سمت.
+        خروجی: (حجم پر شده به کوین، میانگین قیمت پر شدن). اگر چیزی پر نشود (0, 0).
+        """
+        if not self.keys or amount_usdt <= 0:
+            return 0.0, 0.0
+        if self._dirty:
+            self._rebuild()
+
+        # سطوح مجاز بر اساس قیمت محدود (limit)
+        n_levels = len(self.keys)
+        if limit_price is not None:
+            n_levels = bisect_right(self.keys, self._key(limit_price))
+            if n_levels == 0:
+                return 0.0, 0.0
+
+        max_notional = self._cum_notional[n_levels - 1]
+        if amount_usdt >= max_notional:
+            qty = self._cum_qty[n_levels - 1]
+            return qty, max_notional / qty
+
+        i = bisect_left(self._cum_notional, amount_usdt, 0, n_levels)
+        prev_q = self._cum_qty[i - 1] if i > 0 else 0.0
+        prev_n = self._cum_notional[i - 1] if i > 0 else 0.0
+        qty = prev_q + (amount_usdt - prev_n) / self.price_at(i)
+        return qty, amount_usdt / qty
+
+
+class OrderBook:
+    """ دفتر سفارش top-N یک نماد. """
+
+    def __init__(self, symbol: str, max_levels: int = 50):
+        self.symbol = symbol
+        self.bids = _BookSide(is_bid=True, max_levels=max_levels)
+        self.asks = _BookSide(is_bid=False, max_levels=max_levels)
+        self.last_update_ms: int = 0
+
+    # --- به‌روزرسانی ---
+
+    def apply_snapshot(self, bids: List[list], asks: List[list], ts_ms: int = 0):
+        self.bids.replace((lvl[0], lvl[1]) for lvl in bids)
+        self.asks.replace((lvl[0], lvl[1]) for lvl in asks)
+        self.last_update_ms = ts_ms
+
+    def apply_diff(self, bids: List[list], asks: List[list], ts_ms: int = 0):
+        for price, size in ((lvl[0], lvl[1]) for lvl in bids):
+            self.bids.apply(price, size)
+        for price, size in ((lvl[0], lvl[1]) for lvl in asks):
+            self.asks.apply(price, size)
+        self.last_update_ms = ts_ms
+
+    # --- پرس‌وجو ---
+
+    def is_ready(self) -> bool:
+        return len(self.bids.keys) > 0 and len(self.asks.keys) > 0
+
+    def best_bid(self) -> Optional[float]:
+        return self.bids.price_at(0) if len(self.bids.keys) else None
+
+    def best_ask(self) -> Optional[float]:
+        return self.asks.price_at(0) if len(self.asks.keys) else None
+
+    def spread_pct(self) -> Optional[float]:
+        """ اسپرد به درصد نسبت به قیمت میانی. """
+        bid, ask = self.best_bid(), self.best_ask()
+        if not bid or not ask:
+            return None
+        mid = (bid + ask) / 2.0
+        return (ask - bid) / mid * 100.0
+
+    def estimate_fill(self, side: str, amount_usdt: float, limit_price: Optional[float] = None) -> Tuple[float, float]:
+        """
+        میانگین قیمت وزنی پر شدن برای خرید (روی ask ها) یا فروش (روی bid ها).
+        خروجی: (حجم پر شده به کوین، میانگین قیمت).
+        """
+        book_side = self.asks if side == 'buy' else self.bids
+        return book_side.fill(amount_usdt, limit_price)
@@ -0,0 +1,220 @@
+#
+# ------------------------------------------------------------
+# فایل: utils/profiler.py
+# (جدید V2.3 - پروفایلر نمونه‌برداری پشته نخ‌ها در پروسه زنده + اسنپ‌شات اختیاری tracemalloc)
+# ------------------------------------------------------------
+#
+
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import (
+    PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS, PROFILER_MAX_DEPTH,
+    PROFILER_TRACEMALLOC, PROFILER_OUTPUT_DIR
+)
+
+TOP_FUNCTIONS = 30      # (تعداد سطرهای خلاصه)
+TOP_MEMORY_LINES = 30
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    نمونه‌برداری دوره‌ای از sys._current_frames() در یک نخ daemon.
+    - هزینه هر نمونه فقط پیمایش frame ها و شمارش یک tuple از code object هاست؛
+      تبدیل به متن فقط در stop() انجام می شود.
+    - خروجی: فایل collapsed stacks (ورودی flamegraph.pl / speedscope) و خلاصه توابع برتر
+      (self = نوک پشته، total = حضور در پشته).
+    - memory=True: اسنپ‌شات tracemalloc در شروع و پایان و مقایسه رشد حافظه بر اساس خط.
+    """
+
+    def __init__(self, interval_ms: float = PROFILER_INTERVAL_MS, output_dir: str = PROFILER_OUTPUT_DIR,
+                 max_depth: int = PROFILER_MAX_DEPTH):
+        self.interval = interval_ms / 1000.0
+        self.output_dir = output_dir
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._stacks: Counter = Counter()   # {(نام نخ، code leaf→root...): تعداد}
+        self._thread_filter: Optional[Tuple[str, ...]] = None
+        self._memory_start = None
+        self.samples = 0
+        self.started_at = 0.0
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    # --- کنترل ---
+
+    def start(self, seconds: float = PROFILER_MAX_SECONDS, memory: bool = PROFILER_TRACEMALLOC,
+              threads: Optional[List[str]] = None) -> bool:
+        """ threads: پیشوند نام نخ‌ها (مثلاً ["ws-feed", "order"])؛ None = همه نخ‌ها. """
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._stacks = Counter()
+            self._thread_filter = tuple(threads) if threads else None
+            self.samples = 0
+            self.started_at = time.time()
+            self._memory_start = None
+            if memory:
+                import tracemalloc
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(25)
+                self._memory_start = tracemalloc.take_snapshot()
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._sample_loop, args=(seconds,),
+                                            name="profiler", daemon=True)
+            self._thread.start()
+        print(f"🔬 پروفایلر فعال شد (هر {self.interval * 1000:.0f}ms، حداکثر {seconds:g} ثانیه"
+              f"{'، با tracemalloc' if memory else ''}).")
+        return True
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """ توقف نمونه‌برداری و نوشتن خروجی‌ها. خروجی: مسیر فایل‌ها و خلاصه. """
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return None
+            self._stop_event.set()
+            if thread is not threading.current_thread():
+                thread.join()
+            self._thread = None
+            result = self._write_outputs()
+            self.last_result = result
+        print(f"🔬 پروفایلر متوقف شد: {result['samples']} نمونه → {result['collapsed']}")
+        return result
+
+    def toggle(self) -> Optional[Dict[str, Any]]:
+        if self.running:
+            return self.stop()
+        self.start()
+        return None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'samples': self.samples,
+            'elapsed_seconds': round(time.time() - self.started_at, 1) if self.running else 0.0,
+            'last_result': self.last_result,
+        }
+
+    # --- نمونه‌برداری ---
+
+    def _sample_loop(self, seconds: float):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        names: Dict[int, str] = {}
+        names_refreshed = 0.0
+        while not self._stop_event.wait(self.interval):
+            now = time.monotonic()
+            if now - names_refreshed > 1.0:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                names_refreshed = now
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                name = names.get(thread_id, str(thread_id))
+                if self._thread_filter is not None and not name.startswith(self._thread_filter):
+                    continue
+                codes = []
+                depth = 0
+                while frame is not None and depth < self.max_depth:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                    depth += 1
+                self._stacks[(name, tuple(codes))] += 1
+            self.samples += 1
+
+            if now >= deadline:
+                # (توقف خودکار؛ stop() در نخ جداگانه تا join روی همین نخ انجام نشود)
+                threading.Thread(target=self.stop, name="profiler-stop", daemon=True).start()
+                return
+
+    # --- خروجی ---
+
+    def _write_outputs(self) -> Dict[str, Any]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        base = os.path.join(self.output_dir, f"profile-{stamp}-{os.getpid()}")
+
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        labels: Dict[Any, str] = {}
+
+        def label(code) -> str:
+            text = labels.get(code)
+            if text is None:
+                text = labels[code] = _frame_label(code)
+            return text
+
+        collapsed_path = base + ".collapsed"
+        with open(collapsed_path, 'w', encoding='utf-8') as f:
+            for (thread_name, codes), count in self._stacks.items():
+                # (collapsed: ریشه به برگ، جدا شده با ';' و سپس تعداد)
+                frames = [label(code) for code in reversed(codes)]
+                f.write(f"{thread_name};{';'.join(frames)} {count}\n")
+                if codes:
+                    self_counts[label(codes[0])] += count
+                for text in set(frames):
+                    total_counts[text] += count
+
+        samples = sum(self._stacks.values()) or 1
+        top_path = base + "-top.txt"
+        top = self_counts.most_common(TOP_FUNCTIONS)
+        with open(top_path, 'w', encoding='utf-8') as f:
+            f.write(f"# {self.samples} sampling rounds, {samples} thread samples, interval {self.interval * 1000:.0f}ms\n")
+            f.write(f"{'self%':>7} {'total%':>7}  function\n")
+            for text, count in top:
+                f.write(f"{count / samples * 100:7.2f} {total_counts[text] / samples * 100:7.2f}  {text}\n")
+
+        result: Dict[str, Any] = {
+            'samples': self.samples,
+            'collapsed': collapsed_path,
+            'top': top_path,
+            'top_functions': [(text, round(count / samples * 100, 2)) for text, count in top[:10]],
+        }
+
+        if self._memory_start is not None:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            stats = snapshot.compare_to(self._memory_start, 'lineno')
+            memory_path = base + "-memory.txt"
+            with open(memory_path, 'w', encoding='utf-8') as f:
+                for stat in stats[:TOP_MEMORY_LINES]:
+                    f.write(f"{stat}\n")
+            tracemalloc.stop()
+            self._memory_start = None
+            result['memory'] = memory_path
+        return result
+
+
+def install_signal_handler(profiler: "SamplingProfiler", signum: Optional[int] = None) -> bool:
+    """
+    SIGUSR1 (پیش‌فرض) → روشن/خاموش کردن پروفایلر. فقط از نخ اصلی قابل فراخوانی است.
+    کار اصلی در یک نخ جدا انجام می شود تا handler سیگنال سبک بماند.
+    """
+    signum = signum if signum is not None else getattr(signal, "SIGUSR1", None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def _handler(_signum, _frame):
+        threading.Thread(target=profiler.toggle, name="profiler-toggle", daemon=True).start()
+
+    signal.signal(signum, _handler)
+    return True
+
+# --- نمونه سازی ---
+profiler = SamplingProfiler()
@@ -0,0 +1,121 @@
+#
+# ------------------------------------------------------------
+# فایل: utils/rate_limiter.py
+# (جدید V2.3 - محدودکننده فرکانس با پنجره لغزان و Cooldown با ساعت monotonic)
+# ------------------------------------------------------------
+#
+
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+# دلایل رد درخواست (خروجی RateLimiter.check)
+REASON_COOLDOWN = "COOLDOWN"
+REASON_KEY_LIMIT = "KEY_LIMIT"
+REASON_GLOBAL_LIMIT = "GLOBAL_LIMIT"
+
+
+class SlidingWindowCounter:
+    """
+    شمارنده رویدادها در پنجره لغزان.
+    زمان‌ها به ترتیب در deque ثبت می شوند؛ هر زمان فقط یک بار اضافه و یک بار حذف می شود
+    (هزینه سرشکن O(1) برای هر بررسی، بدون ساختن دوباره لیست).
+    """
+
+    __slots__ = ("limit", "window", "_events")
+
+    def __init__(self, limit: int, window_seconds: float):
+        self.limit = limit
+        self.window = window_seconds
+        self._events: Deque[float] = deque()
+
+    def _expire(self, now: float):
+        events = self._events
+        cutoff = now - self.window
+        while events and events[0] <= cutoff:
+            events.popleft()
+
+    def count(self, now: float) -> int:
+        self._expire(now)
+        return len(self._events)
+
+    def is_full(self, now: float) -> bool:
+        return self.limit > 0 and self.count(now) >= self.limit
+
+    def record(self, now: float):
+        self._events.append(now)
+
+
+class RateLimiter:
+    """
+    محدودیت ورود به تفکیک کلید (نماد) و سراسری، به همراه Cooldown هر کلید.
+    همه زمان‌ها از ساعت monotonic هستند (تغییر ساعت سیستم روی آن‌ها اثری ندارد).
+    limit <= 0 یعنی آن محدودیت غیرفعال است.
+    """
+
+    def __init__(self, per_key_limit: int, global_limit: int = 0, window_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.per_key_limit = per_key_limit
+        self.window = window_seconds
+        self.clock = clock
+        self._per_key: Dict[str, SlidingWindowCounter] = {}
+        self._global = SlidingWindowCounter(global_limit, window_seconds)
+        self._cooldown_until: Dict[str, float] = {}
+
+    def _counter(self, key: str) -> SlidingWindowCounter:
+        counter = self._per_key.get(key)
+        if counter is None:
+            counter = SlidingWindowCounter(self.per_key_limit, self.window)
+            self._per_key[key] = counter
+        return counter
+
+    # --- Cooldown ---
+
+    def start_cooldown(self, key: str, seconds: float):
+        """ شروع (یا تمدید) Cooldown برای یک کلید. """
+        until = self.clock() + seconds
+        if until > self._cooldown_until.get(key, 0.0):
+            self._cooldown_until[key] = until
+
+    def in_cooldown(self, key: str) -> bool:
+        until = self._cooldown_until.get(key)
+        if until is None:
+            return False
+        if self.clock() >= until:
+            del self._cooldown_until[key]
+            return False
+        return True
+
+    def clear_cooldown(self, key: str):
+        self._cooldown_until.pop(key, None)
+
+    # --- پنجره لغزان ---
+
+    def check(self, key: str) -> Optional[str]:
+        """ None اگر رویداد جدید مجاز باشد، در غیر این صورت دلیل رد (REASON_*). """
+        if self.in_cooldown(key):
+            return REASON_COOLDOWN
+        now = self.clock()
+        if self._counter(key).is_full(now):
+            return REASON_KEY_LIMIT
+        if self._global.is_full(now):
+            return REASON_GLOBAL_LIMIT
+        return None
+
+    def record(self, key: str):
+        """ ثبت یک رویداد (مثلاً ورود پذیرفته شده) برای کلید و شمارنده سراسری. """
+        now = self.clock()
+        self._counter(key).record(now)
+        self._global.record(now)
+
+    def count(self, key: Optional[str] = None) -> int:
+        """ تعداد رویدادهای پنجره جاری برای یک کلید (یا سراسری اگر key خالی باشد). """
+        now = self.clock()
+        if key is None:
+            return self._global.count(now)
+        counter = self._per_key.get(key)
+        return counter.count(now) if counter is not None else 0
+
+    def remaining_cooldown(self, key: str) -> float:
+        until = self._cooldown_until.get(key)
+        return max(0.0, until - self.clock()) if until is not None else 0.0
@@ -0,0 +1,62 @@
+#
+# ------------------------------------------------------------
+# فایل: utils/signal_gate.py
+# (جدید V2.3 - تصمیم‌گیری درباره ارزیابی اندیکاتور/سیگنال برای هر به‌روزرسانی kbar)
+# ------------------------------------------------------------
+#
+
+from typing import Dict, Tuple
+
+from utils.clock import clock
+
+# --- حالت‌های ارزیابی ---
+EVAL_EVERY_UPDATE = "every_update"  # هر پیام kbar (رفتار قبلی)
+EVAL_CANDLE_CLOSE = "candle_close"  # فقط با بسته شدن کندل
+EVAL_PRICE_CHANGE = "price_change"  # وقتی قیمت حداقل به اندازه آستانه تغییر کند
+EVAL_MAX_RATE = "max_rate"          # حداکثر یک ارزیابی در هر بازه برای هر نماد
+
+EVAL_MODES = (EVAL_EVERY_UPDATE, EVAL_CANDLE_CLOSE, EVAL_PRICE_CHANGE, EVAL_MAX_RATE)
+
+
+class SignalGate:
+    """
+    فیلتر ارزیابی‌های تکراری: LBank برای یک دقیقه باز چندین kbar با قیمت یکسان می فرستد.
+    بسته شدن کندل در همه حالت‌ها باعث ارزیابی می شود.
+    (بررسی خروج پوزیشن‌های باز به این فیلتر وابسته نیست.)
+    """
+
+    def __init__(self, mode: str, min_change_pct: float = 0.0, min_interval_seconds: float = 0.0):
+        if mode not in EVAL_MODES:
+            raise ValueError(f"حالت ارزیابی نامعتبر: {mode} (مجاز: {', '.join(EVAL_MODES)})")
+        self.mode = mode
+        self.min_change_pct = min_change_pct
+        self.min_interval = min_interval_seconds
+        self._last: Dict[str, Tuple[float, float]] = {}  # {symbol: (قیمت، زمان monotonic آخرین ارزیابی)}
+        self.evaluated = 0
+        self.skipped = 0
+
+    def should_evaluate(self, symbol: str, price: float, candle_closed: bool) -> bool:
+        """ True اگر این به‌روزرسانی باید ارزیابی شود (و در این صورت به عنوان ارزیابی ثبت می شود). """
+        if self.mode == EVAL_EVERY_UPDATE:
+            return True
+
+        now = clock.monotonic()
+        last = self._last.get(symbol)
+
+        if candle_closed or last is None:
+            allowed = self.mode != EVAL_CANDLE_CLOSE or candle_closed
+        elif self.mode == EVAL_CANDLE_CLOSE:
+            allowed = False
+        elif self.mode == EVAL_PRICE_CHANGE:
+            last_price = last[0]
+            change_pct = abs(price - last_price) / last_price * 100.0 if last_price else 100.0
+            allowed = change_pct > 0 and change_pct >= self.min_change_pct
+        else:  # EVAL_MAX_RATE
+            allowed = now - last[1] >= self.min_interval
+
+        if allowed:
+            self._last[symbol] = (price, now)
+            self.evaluated += 1
+        else:
+            self.skipped += 1
+        return allowed